@@ -12,6 +12,7 @@
 from .city_map import CityMapResource
 from .iptc_map import IPTCMapResource
 from .country_map import CountryMapResource
+from .user_cache import AgendaUserCacheResource, AgendaUserCacheService
 from superdesk.services import BaseService
 import superdesk
 from apps.prepopulate.app_initialize import __entities__
@@ -33,3 +34,7 @@ def init_app(app):
     endpoint_name = 'agenda_country_map'
     service = BaseService(endpoint_name, backend=superdesk.get_backend())
     CountryMapResource(endpoint_name, app=app, service=service)
+
+    endpoint_name = 'agenda_user_cache'
+    service = AgendaUserCacheService(endpoint_name, backend=superdesk.get_backend())
+    AgendaUserCacheResource(endpoint_name, app=app, service=service)
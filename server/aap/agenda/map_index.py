@@ -0,0 +1,71 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import time
+import superdesk
+from eve.utils import ParsedRequest
+
+
+class AgendaMapIndex():
+    """In memory index of one of the Agenda map resources.
+
+    The map resources are small and rarely change, so the entries are loaded once and looked up by the key fields
+    instead of querying the resource for each event. The first entry for a key wins, as with a ``find`` of the key.
+
+    At most every ``refresh_interval`` seconds the count and the latest update of the resource are checked and the
+    index is reloaded if they changed.
+
+    :param str resource: map resource
+    :param tuple fields: key fields
+    """
+
+    refresh_interval = 60
+
+    def __init__(self, resource, fields):
+        self.resource = resource
+        self.fields = fields
+        self._index = None
+        self._fingerprint = None
+        self._checked = 0
+
+    def get(self, *key):
+        """Get the agenda id of the key
+
+        :param key: values of the key fields
+        :return: agenda id, None if there is no entry for the key
+        """
+        self._refresh()
+        return self._index.get(key)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked < self.refresh_interval:
+            return
+
+        service = superdesk.get_resource_service(self.resource)
+        fingerprint = self._get_fingerprint(service)
+        if self._index is None or fingerprint != self._fingerprint:
+            self._index = self._load(service)
+            self._fingerprint = fingerprint
+        self._checked = now
+
+    def _load(self, service):
+        index = {}
+        for entry in service.find({}):
+            index.setdefault(tuple(entry.get(field) for field in self.fields), entry.get('agenda_id'))
+        return index
+
+    def _get_fingerprint(self, service):
+        req = ParsedRequest()
+        req.sort = '[("_updated", -1)]'
+        req.max_results = 1
+        cursor = service.get_from_mongo(req=req, lookup={})
+        latest = next(iter(cursor), None) or {}
+        return cursor.count(), latest.get('_updated')
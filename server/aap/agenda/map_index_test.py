@@ -0,0 +1,38 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import mock
+from superdesk.tests import TestCase
+from aap.agenda import init_app as init_agenda
+from .map_index import AgendaMapIndex
+
+
+class AgendaMapIndexTest(TestCase):
+    def setUp(self):
+        init_agenda(self.app)
+        self.app.data.insert('agenda_city_map', [{'country_id': 16, 'agenda_id': 106, 'name': 'Dandenong'},
+                                                 {'country_id': 16, 'agenda_id': 107, 'name': 'Dandenong'}])
+        self.index = AgendaMapIndex('agenda_city_map', ('country_id', 'name'))
+
+    def test_get(self):
+        self.assertEqual(self.index.get(16, 'Dandenong'), 106)
+        self.assertIsNone(self.index.get(16, 'Sydney'))
+        self.assertIsNone(self.index.get(1, 'Dandenong'))
+
+    def test_refresh_on_change(self):
+        self.assertIsNone(self.index.get(16, 'Sydney'))
+        self.app.data.insert('agenda_city_map', [{'country_id': 16, 'agenda_id': 108, 'name': 'Sydney'}])
+        self.assertIsNone(self.index.get(16, 'Sydney'))
+
+        with mock.patch.object(self.index, 'refresh_interval', 0):
+            self.assertEqual(self.index.get(16, 'Sydney'), 108)
+            with mock.patch.object(self.index, '_load', wraps=self.index._load) as load:
+                self.index.get(16, 'Sydney')
+                load.assert_not_called()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import logging
+
+from superdesk.resource import Resource
+from superdesk.services import BaseService
+from superdesk.utc import utcnow
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgendaUserCacheResource(Resource):
+    schema = {
+        # assets url of the Agenda destination
+        'assets_url': {
+            'type': 'string'
+        },
+        'user_id': {
+            'type': 'string'
+        },
+        # what the value is for the user, the resource id as the api keys are only cached in memory
+        'kind': {
+            'type': 'string'
+        },
+        # Agenda value for the user, None if the user could not be matched in Agenda
+        'value': {
+            'nullable': True
+        },
+        'expiry': {
+            'type': 'datetime'
+        }
+    }
+    internal_resource = True
+    mongo_indexes = {
+        'assets_url_1_user_id_1_kind_1': ([('assets_url', 1), ('user_id', 1), ('kind', 1)], {'unique': True}),
+        'expiry_1': ([('expiry', 1)], {'expireAfterSeconds': 0})
+    }
+    item_methods = []
+    resource_methods = []
+
+
+class AgendaUserCacheService(BaseService):
+    """Superdesk users matched with the Agenda users, kept until the entry expires"""
+
+    def get_entry(self, assets_url, user_id, kind):
+        """Get the entry for the user if it has not expired
+
+        :param str assets_url:
+        :param str user_id:
+        :param str kind:
+        :return dict: entry, None if there is no entry
+        """
+        return self.find_one(req=None, assets_url=assets_url, user_id=str(user_id), kind=kind,
+                             expiry={'$gt': utcnow()})
+
+    def set_entry(self, assets_url, user_id, kind, value, expiry):
+        """Set the entry for the user
+
+        :param str assets_url:
+        :param str user_id:
+        :param str kind:
+        :param value: Agenda value, None if the user could not be matched
+        :param datetime expiry:
+        """
+        self.find_and_modify(
+            query={'assets_url': assets_url, 'user_id': str(user_id), 'kind': kind},
+            update={'$set': {'value': value, 'expiry': expiry}},
+            upsert=True
+        )
+
+    def delete_entry(self, assets_url, user_id, kind):
+        """Delete the entry for the user
+
+        :param str assets_url:
+        :param str user_id:
+        :param str kind:
+        """
+        self.delete(lookup={'assets_url': assets_url, 'user_id': str(user_id), 'kind': kind})
@@ -17,6 +17,7 @@ from .export_legal_archive_to_archived import ExportLegalArchiveToArchived  # no
 from .export_to_newroom import ExportToNewsroom  # noqa
 from .import_sport_calendar import ImportSportCalendarDoc  # noqa
 from .fulfill_image_assignments import FullfillImageAssignments  # noqa
+from .benchmark_formatters import BenchmarkFormattersCommand  # noqa
 from superdesk.celery_app import celery
 from superdesk.default_settings import celery_queue
 from datetime import timedelta
@@ -0,0 +1,372 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import json
+import math
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from copy import deepcopy
+from datetime import timedelta
+
+import superdesk
+import unidecode
+from eve.utils import config
+from flask import current_app as app
+from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, ITEM_STATE, CONTENT_STATE, FORMAT, FORMATS
+from superdesk.publish.formatters import get_formatter, formatters
+from superdesk.utc import utcnow
+
+from aap.publish.formatters.unicodetoascii import TextNormaliser, QUOTES, CONTROL_CHARACTERS
+
+#: Subscriber format types of the formatters in aap.publish.formatters
+FORMAT_TYPES = ('AAP ANPA', 'NZN ANPA', 'AAP IPNEWS', 'NZN IPNEWS', 'AAP NEWSCENTRE', 'NZN NEWSCENTRE', 'AAP TEXT',
+                'AAP BULLETIN BUILDER', 'AAP SMS', 'aap ticker', 'aap_nitf', 'iress_nitf', 'kvh_newsml12',
+                'reuters_newsml', 'aap ninjs', 'aap newsroom ninjs', 'marketplace ninjs', 'AAP Apple News',
+                'agenda_planning')
+
+#: Subscriber the benchmarked items are formatted for, it only owns a sequence number
+SUBSCRIBER = {'_id': 'formatter_benchmark', 'name': 'Formatter Benchmark',
+              'sequence_num_settings': {'min': 1, 'max': 9999}}
+
+WORDS = ('the', 'council', 'said', 'on', 'tuesday', 'minister', 'budget', 'police', 'sydney', 'melbourne', 'would',
+         'announced', 'government', 'report', 'market', 'shares', 'closed', 'higher', 'after', 'a', 'week', 'of')
+
+
+def _sentence(index, length):
+    words = [WORDS[(index * 7 + i * 3) % len(WORDS)] for i in range(length)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraphs(count, words_per_paragraph):
+    return ''.join('<p>{} {}</p>'.format(_sentence(i, words_per_paragraph // 2),
+                                         _sentence(i + 1, words_per_paragraph - words_per_paragraph // 2))
+                   for i in range(count))
+
+
+def _article(name, body_html, word_count, **kwargs):
+    now = utcnow()
+    article = {
+        '_id': 'urn:benchmark:{}'.format(name),
+        'item_id': 'urn:benchmark:{}'.format(name),
+        'guid': 'urn:benchmark:{}'.format(name),
+        '_current_version': 1,
+        ITEM_TYPE: CONTENT_TYPE.TEXT,
+        ITEM_STATE: CONTENT_STATE.PUBLISHED,
+        FORMAT: FORMATS.HTML,
+        'headline': 'Benchmark {} headline'.format(name),
+        'slugline': 'Benchmark {}'.format(name),
+        'anpa_take_key': '',
+        'abstract': '<p>{}</p>'.format(_sentence(1, 20)),
+        'body_html': body_html,
+        'word_count': word_count,
+        'byline': 'Benchmark Writer',
+        'source': 'AAP',
+        'priority': 3,
+        'urgency': 3,
+        'anpa_category': [{'qcode': 'a', 'name': 'Australian General News'}],
+        'subject': [{'qcode': '04001005', 'name': 'livestock'}],
+        'place': [{'qcode': 'NSW', 'name': 'NSW', 'state': 'New South Wales', 'country': 'Australia',
+                   'world_region': 'Oceania'}],
+        'genre': [{'qcode': 'Article', 'name': 'Article'}],
+        'dateline': {'text': 'SYDNEY, June 1 AAP -', 'source': 'AAP',
+                     'located': {'city': 'Sydney', 'state': 'New South Wales', 'country': 'Australia',
+                                 'country_code': 'AU', 'state_code': 'NSW', 'tz': 'Australia/Sydney'}},
+        'sign_off': 'bw/mm',
+        'flags': {'marked_for_sms': False},
+        'language': 'en',
+        'firstcreated': now - timedelta(minutes=30),
+        'firstpublished': now - timedelta(minutes=5),
+        'versioncreated': now,
+        '_updated': now,
+        '_created': now - timedelta(minutes=30),
+    }
+    article.update(kwargs)
+    return article
+
+
+def get_corpus():
+    """Get the synthetic articles the formatters are benchmarked against
+
+    :return list: tuples of the corpus name and the article
+    """
+    racing_results = '\n'.join('{:<3}{:<24}{:>6}{:>8}'.format(i, 'Runner Number {}'.format(i), '{}kg'.format(50 + i),
+                                                              '${:.2f}'.format(i * 1.5)) for i in range(1, 25))
+    fact_check_body = ''.join([
+        '<p>The Statement</p>', '<p>"{}"</p>'.format(_sentence(2, 25)), '<p>Federal Minister, June 1, 2020</p>',
+        '<p>The Analysis</p>', _paragraphs(12, 60),
+        '<p>The Verdict</p>', '<p>False.</p>', '<p>{}</p>'.format(_sentence(3, 30)),
+        '<p>The References</p>', ''.join('<p><a href="https://example.com/{0}">Reference {0}</a></p>'.format(i)
+                                         for i in range(10))])
+
+    return [
+        ('brief', _article('brief', _paragraphs(2, 25), 50,
+                           flags={'marked_for_sms': True}, sms_message='Benchmark brief sms message')),
+        ('feature', _article('feature', _paragraphs(50, 40), 2000, body_footer='<p>Benchmark footer</p>')),
+        ('racing_results', _article('racing_results', '<pre>{}</pre>'.format(racing_results), 200,
+                                    **{FORMAT: FORMATS.PRESERVED, 'anpa_category': [{'qcode': 'r', 'name': 'Racing'}],
+                                       'slugline': 'Racing Results'})),
+        ('multi_category', _article('multi_category', _paragraphs(10, 40), 400,
+                                    anpa_category=[{'qcode': 'a', 'name': 'Australian General News'},
+                                                   {'qcode': 'f', 'name': 'Finance'},
+                                                   {'qcode': 'i', 'name': 'International News'}])),
+        ('fact_check', _article('fact_check', fact_check_body, 800,
+                                genre=[{'qcode': 'Fact Check', 'name': 'Fact Check'}])),
+    ]
+
+
+class LocalSequences():
+    """Sequence numbers of the subscribers kept in memory"""
+
+    def __init__(self):
+        self.numbers = {}
+
+    def generate_sequence_number(self, subscriber):
+        return self.find_and_modify(query={'key': 'subscribers_{})'.format(subscriber[config.ID_FIELD])},
+                                    update={'$inc': {'sequence_number': 1}})['sequence_number']
+
+    def find_and_modify(self, query, update, upsert=True, new=False):
+        key = query['key']
+        if '$inc' in update:
+            self.numbers[key] = self.numbers.get(key, 0) + update['$inc']['sequence_number']
+        else:
+            self.numbers[key] = update['$set']['sequence_number']
+        return {'sequence_number': self.numbers[key]}
+
+
+@contextmanager
+def local_writes():
+    """Replace the writes of the formatters with stand-ins kept in memory
+
+    The formatters take the sequence numbers of the subscriber and record the SMS messages they send, the benchmark
+    must not use up the numbers or block the messages of the real subscribers.
+    """
+    sequences = LocalSequences()
+    stand_ins = [('subscribers', 'generate_sequence_number', sequences.generate_sequence_number),
+                 ('sequences', 'find_and_modify', sequences.find_and_modify),
+                 ('sms_messages', 'reserve', lambda message, item_id, item_version: True)]
+    patched = []
+    try:
+        for endpoint_name, method, stand_in in stand_ins:
+            service = superdesk.get_resource_service(endpoint_name)
+            setattr(service, method, stand_in)
+            patched.append((service, method))
+        yield sequences
+    finally:
+        for service, method in patched:
+            delattr(service, method)
+
+
+def normalise_with_chain(text):
+    """Normalisation of the text as the formatters did before the single pass TextNormaliser"""
+    text = text.translate(''.maketrans(QUOTES))
+    text = unidecode.unidecode(text)
+    text = re.sub('[\x00-\x09\x0b\x0c\x0e-\x1f]', '', text)
+    text = text.replace('\xA0', ' ')
+    return re.sub(' +', ' ', re.sub('(?<!\r)\n+', ' ', text))
+
+
+def percentile(values, percent):
+    """Nearest rank percentile of the values
+
+    :param list values: sorted values
+    :param int percent:
+    """
+    if not values:
+        return 0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Get the regressions of the results compared to the baseline
+
+    :param dict results: benchmark results by format type
+    :param dict baseline: previously saved results by format type
+    :param float tolerance: allowed relative change, e.g. 0.2 for 20%
+    :return list: messages describing the regressions
+    """
+    regressions = []
+    for format_type, result in sorted(results.items()):
+        previous = baseline.get(format_type)
+        if not previous:
+            continue
+
+        if result['items_per_sec'] < previous['items_per_sec'] * (1 - tolerance):
+            regressions.append('{}: {:.1f} items/sec, baseline {:.1f}'.format(
+                format_type, result['items_per_sec'], previous['items_per_sec']))
+
+        for field, unit in (('p99_ms', 'ms p99'), ('peak_kb', 'KB peak')):
+            if result[field] > previous[field] * (1 + tolerance):
+                regressions.append('{}: {:.1f} {}, baseline {:.1f}'.format(
+                    format_type, result[field], unit, previous[field]))
+    return regressions
+
+
+class BenchmarkFormattersCommand(superdesk.Command):
+    """Measure the throughput of the AAP formatters on a synthetic corpus.
+
+    Formats short briefs, 2,000 word features, preserved racing results, multi category stories and fact checks with
+    every formatter that accepts them and reports items/sec, p50/p99 latency and peak allocations per formatter.
+
+    The formatters read vocabularies, so run it against a Mongo and Elastic initialised with ``app:initialize_data``,
+    e.g. the ones used for the tests. The sequence numbers and SMS messages the formatters write are kept in memory
+    while the benchmark runs.
+
+    Example:
+    ::
+
+        $ python manage.py app:benchmark_formatters --save --baseline=formatters_baseline.json
+        $ python manage.py app:benchmark_formatters --baseline=formatters_baseline.json --tolerance=0.2
+
+    When comparing against a baseline the command exits with status 1 if any formatter regressed.
+    """
+
+    option_list = [
+        superdesk.Option('--iterations', '-i', dest='iterations', default=50),
+        superdesk.Option('--formats', '-f', dest='formats', required=False,
+                         help='Comma separated format types, all by default'),
+        superdesk.Option('--baseline', '-b', dest='baseline', required=False),
+        superdesk.Option('--save', '-s', dest='save', action='store_true', default=False,
+                         help='Save the results as the baseline'),
+        superdesk.Option('--tolerance', '-t', dest='tolerance', default=0.2),
+        superdesk.Option('--normalisation', '-n', dest='normalisation', action='store_true', default=False,
+                         help='Compare the text normalisation with the chain it replaced')
+    ]
+
+    def run(self, iterations=50, formats=None, baseline=None, save=False, tolerance=0.2, normalisation=False):
+        if normalisation:
+            return self.benchmark_normalisation(get_corpus(), int(iterations))
+
+        format_types = [f.strip() for f in formats.split(',')] if formats else FORMAT_TYPES
+        corpus = get_corpus()
+
+        # measure the formatters, not the cache of the rendered output
+        render_cache = app.config.get('FORMATTER_RENDER_CACHE')
+        app.config['FORMATTER_RENDER_CACHE'] = False
+        try:
+            results = {}
+            with local_writes():
+                for format_type in format_types:
+                    result = self.benchmark(format_type, corpus, int(iterations))
+                    if result:
+                        results[format_type] = result
+        finally:
+            app.config['FORMATTER_RENDER_CACHE'] = render_cache
+
+        self.print_results(results)
+        self.print_missing_formatters(results)
+
+        if baseline and save:
+            with open(baseline, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            print('Saved baseline to {}'.format(baseline))
+        elif baseline:
+            with open(baseline) as f:
+                regressions = compare_to_baseline(results, json.load(f), float(tolerance))
+            for regression in regressions:
+                print('REGRESSION {}'.format(regression))
+            if regressions:
+                return 1
+
+    def benchmark(self, format_type, corpus, iterations):
+        """Format the corpus with the formatter for the format type
+
+        :param str format_type:
+        :param list corpus: corpus as returned by get_corpus
+        :param int iterations: number of times each article is formatted
+        :return dict: results, None if the format type can not format any of the corpus
+        """
+        articles = []
+        formatter = None
+        for name, article in corpus:
+            formatter = get_formatter(format_type, article) or formatter
+            if formatter and formatter.can_format(format_type, article):
+                articles.append(article)
+
+        if not articles:
+            return None
+
+        # formatters may update the article, each call gets its own copy which is made before the clock starts
+        items = [deepcopy(article) for article in articles for _ in range(iterations)]
+        latencies = []
+        started = time.perf_counter()
+        for item in items:
+            start = time.perf_counter()
+            formatter.format(item, SUBSCRIBER)
+            latencies.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+
+        # allocations are traced in a separate pass, tracing slows down the formatters
+        items = [deepcopy(article) for article in articles]
+        tracemalloc.start()
+        try:
+            for item in items:
+                formatter.format(item, SUBSCRIBER)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'formatter': type(formatter).__name__,
+            'items': len(latencies),
+            'items_per_sec': len(latencies) / elapsed if elapsed else 0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'peak_kb': peak / 1024,
+        }
+
+    def benchmark_normalisation(self, corpus, iterations):
+        """Time the single pass text normalisation against the chain of passes it replaced
+
+        :param list corpus: corpus as returned by get_corpus
+        :param int iterations: number of times each text is normalised
+        """
+        normaliser = TextNormaliser(fold_quotes=True, transliterate=True, replace={'\xA0': ' '},
+                                    strip=CONTROL_CHARACTERS, collapse_whitespace=True)
+        print('{:<28}{:>12}{:>12}'.format('Text', 'Chain ms', 'Single ms'))
+        for name, article in corpus:
+            for field in ('headline', 'byline', 'body_html'):
+                # smart quotes, non breaking spaces and accents as found in the wire copy
+                text = article[field].replace('"', '\u201c').replace(' a ', '\xA0a ').replace('e', '\u00e9')
+                if normalise_with_chain(text) != normaliser(text):
+                    print('{}.{}: output differs'.format(name, field))
+                    return 1
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    normalise_with_chain(text)
+                chain = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    normaliser(text)
+                single = time.perf_counter() - start
+                print('{:<28}{:>12.3f}{:>12.3f}'.format('{}.{}'.format(name, field), chain * 1000, single * 1000))
+
+    def print_results(self, results):
+        print('{:<22}{:<30}{:>8}{:>12}{:>10}{:>10}{:>11}'.format('Format', 'Formatter', 'Items', 'Items/sec',
+                                                                 'p50 ms', 'p99 ms', 'Peak KB'))
+        for format_type, result in sorted(results.items()):
+            print('{:<22}{:<30}{:>8}{:>12.1f}{:>10.2f}{:>10.2f}{:>11.1f}'.format(
+                format_type, result['formatter'], result['items'], result['items_per_sec'], result['p50_ms'],
+                result['p99_ms'], result['peak_kb']))
+
+    def print_missing_formatters(self, results):
+        benchmarked = {result['formatter'] for result in results.values()}
+        for formatter_cls in formatters:
+            if formatter_cls.__module__.startswith('aap.publish.formatters') \
+                    and formatter_cls.__name__ not in benchmarked:
+                print('Not benchmarked: {}'.format(formatter_cls.__name__))
+
+
+superdesk.command('app:benchmark_formatters', BenchmarkFormattersCommand())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import TestCase, mock
+
+from .benchmark_formatters import percentile, compare_to_baseline, get_corpus, local_writes
+
+
+class BenchmarkFormattersTest(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_compare_to_baseline(self):
+        baseline = {'AAP ANPA': {'items_per_sec': 100, 'p99_ms': 10, 'peak_kb': 100}}
+        self.assertEqual(compare_to_baseline({'AAP ANPA': {'items_per_sec': 90, 'p99_ms': 11, 'peak_kb': 110},
+                                              'AAP SMS': {'items_per_sec': 1, 'p99_ms': 1, 'peak_kb': 1}},
+                                             baseline, 0.2), [])
+        regressions = compare_to_baseline({'AAP ANPA': {'items_per_sec': 70, 'p99_ms': 13, 'peak_kb': 100}},
+                                          baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('items/sec', regressions[0])
+        self.assertIn('p99', regressions[1])
+
+    def test_corpus(self):
+        corpus = dict(get_corpus())
+        self.assertEqual(set(corpus), {'brief', 'feature', 'racing_results', 'multi_category', 'fact_check'})
+        self.assertEqual(len(corpus['multi_category']['anpa_category']), 3)
+        self.assertEqual(corpus['fact_check']['genre'][0]['qcode'], 'Fact Check')
+
+    def test_local_writes(self):
+        class Service():
+            def __init__(self):
+                self.calls = []
+
+            def generate_sequence_number(self, subscriber):
+                self.calls.append('generate_sequence_number')
+
+            def find_and_modify(self, query, update, upsert=True, new=False):
+                self.calls.append('find_and_modify')
+
+            def reserve(self, message, item_id, item_version):
+                self.calls.append('reserve')
+
+        services = {name: Service() for name in ('subscribers', 'sequences', 'sms_messages')}
+        with mock.patch('superdesk.get_resource_service', side_effect=services.get):
+            with local_writes():
+                self.assertEqual(services['subscribers'].generate_sequence_number({'_id': 'sub1'}), 1)
+                self.assertEqual(services['sequences'].find_and_modify(
+                    query={'key': 'subscribers_sub1)'}, update={'$inc': {'sequence_number': 3}})['sequence_number'], 4)
+                self.assertTrue(services['sms_messages'].reserve('message', 'item', 1))
+                self.assertTrue(services['sms_messages'].reserve('message', 'item', 1))
+        self.assertEqual([service.calls for service in services.values()], [[], [], []])
+
+        # the services are restored
+        services['subscribers'].generate_sequence_number({'_id': 'sub1'})
+        self.assertEqual(services['subscribers'].calls, ['generate_sequence_number'])
@@ -8,12 +8,11 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
-from superdesk.services import BaseService
 import superdesk
-from .fuel import FuelMapResource
+from .fuel import FuelMapResource, FuelService
 
 
 def init_app(app):
     endpoint_name = 'fuel'
-    service = BaseService(endpoint_name, backend=superdesk.get_backend())
+    service = FuelService(endpoint_name, backend=superdesk.get_backend())
     FuelMapResource(endpoint_name, app=app, service=service)
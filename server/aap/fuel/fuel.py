@@ -10,7 +10,12 @@
 
 import logging
 
+from eve.utils import config, document_etag
+from flask import current_app as app
+from pymongo import DeleteMany, InsertOne, UpdateOne
 from superdesk.resource import Resource
+from superdesk.services import BaseService
+from superdesk.utc import utcnow
 
 
 logger = logging.getLogger(__name__)
@@ -44,7 +49,76 @@ class FuelMapResource(Resource):
         },
         # The available price for the fuel of type fuel_type
         'price': {
-            'type': 'string'
+            'type': 'number'
         }
     }
-    mongo_indexes = {'geo_index': [('location', '2dsphere')]}
+    mongo_indexes = {'geo_index': [('location', '2dsphere')],
+                     'market_date_index': [('market', 1), ('sample_date', 1)]}
+
+
+def get_price(price):
+    """Get the price as a number, the APIs can return it as a string
+
+    :param price: price returned by the API
+    :return float: price, None if it is not a number
+    """
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None
+
+
+class FuelService(BaseService):
+
+    def _get_key(self, fuel):
+        return fuel.get('fuel_type'), tuple((fuel.get('location') or {}).get('coordinates') or [])
+
+    def save_prices(self, market, sample_date, fuel_records):
+        """Save the fuel prices of a market for a day
+
+        The records are matched to the saved ones by the location of the servo and the fuel type, and only the new
+        records and the changed prices are written, with unordered bulk writes. The saved records that are not in
+        ``fuel_records`` are removed.
+
+        :param str market: market of the records
+        :param str sample_date: date of the records
+        :param list fuel_records: fuel records
+        """
+        if not fuel_records:
+            return
+
+        records = {}
+        for fuel_record in fuel_records:
+            record = dict(fuel_record, market=market, sample_date=sample_date,
+                          price=get_price(fuel_record.get('price')))
+            records[self._get_key(record)] = record
+
+        saved = {}
+        removed = []
+        for fuel in self.find({'market': market, 'sample_date': sample_date}):
+            key = self._get_key(fuel)
+            if key in records and key not in saved:
+                saved[key] = fuel
+            else:
+                removed.append(fuel[config.ID_FIELD])
+
+        now = utcnow()
+        writes = []
+        for key, record in records.items():
+            fuel = saved.get(key)
+            if fuel is None:
+                record[config.ETAG] = document_etag(record)
+                record[config.DATE_CREATED] = record[config.LAST_UPDATED] = now
+                writes.append(InsertOne(record))
+            elif fuel.get('price') != record['price'] or fuel.get('address') != record.get('address'):
+                writes.append(UpdateOne({config.ID_FIELD: fuel[config.ID_FIELD]},
+                                        {'$set': {'price': record['price'], 'address': record.get('address'),
+                                                  config.LAST_UPDATED: now}}))
+        if removed:
+            writes.append(DeleteMany({config.ID_FIELD: {'$in': removed}}))
+
+        if writes:
+            result = app.data.mongo.pymongo(resource=self.datasource).db[self.datasource].bulk_write(writes,
+                                                                                                     ordered=False)
+            logger.info('Saved the {} fuel prices for {}: {} inserted, {} updated, {} removed'.format(
+                market, sample_date, result.inserted_count, result.modified_count, result.deleted_count))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk import get_resource_service
+from superdesk.tests import TestCase
+from aap.fuel import init_app
+
+
+def fuel_record(fuel_type, lon, price):
+    return {'fuel_type': fuel_type, 'price': price, 'address': {'street': '9 Wallaby Way'},
+            'location': {'type': 'Point', 'coordinates': [lon, -33.8971]}}
+
+
+class FuelServiceTestCase(TestCase):
+    def setUp(self):
+        init_app(self.app)
+        self.service = get_resource_service('fuel')
+
+    def _get_prices(self):
+        return {(fuel['fuel_type'], fuel['location']['coordinates'][0]): fuel['price']
+                for fuel in self.service.find({'market': 'Sydney', 'sample_date': '2020-01-01'})}
+
+    def test_save_prices(self):
+        self.service.save_prices('Sydney', '2020-01-01', [fuel_record('ULP', 151.1, '113.9'),
+                                                          fuel_record('DSL', 151.1, 120.9),
+                                                          fuel_record('ULP', 151.2, 115.9)])
+        self.assertEqual(self._get_prices(), {('ULP', 151.1): 113.9, ('DSL', 151.1): 120.9, ('ULP', 151.2): 115.9})
+        ulp = self.service.find({'fuel_type': 'ULP', 'location.coordinates': 151.1})[0]
+
+        self.service.save_prices('Sydney', '2020-01-01', [fuel_record('ULP', 151.1, 113.9),
+                                                          fuel_record('DSL', 151.1, 119.9),
+                                                          fuel_record('LPG', 151.1, 80.9)])
+        self.assertEqual(self._get_prices(), {('ULP', 151.1): 113.9, ('DSL', 151.1): 119.9, ('LPG', 151.1): 80.9})
+        self.assertEqual(self.service.find_one(req=None, _id=ulp['_id'])['_updated'], ulp['_updated'])
+
+    def test_save_no_prices(self):
+        self.service.save_prices('Sydney', '2020-01-01', [fuel_record('ULP', 151.1, 113.9)])
+        self.service.save_prices('Sydney', '2020-01-01', [])
+        self.assertEqual(self._get_prices(), {('ULP', 151.1): 113.9})
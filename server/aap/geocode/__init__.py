@@ -0,0 +1,49 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import logging
+from datetime import timedelta
+
+import superdesk
+from flask import current_app as app
+from superdesk.celery_app import celery
+from superdesk.celery_task_utils import get_lock_id
+from superdesk.lock import lock, unlock
+from .resource import GeocodeCacheResource
+from .service import GeocodeCacheService
+from .resolver import GeocodeResolver
+
+logger = logging.getLogger(__name__)
+
+
+def init_app(app):
+    endpoint_name = 'geocode_cache'
+    service = GeocodeCacheService(endpoint_name, backend=superdesk.get_backend())
+    GeocodeCacheResource(endpoint_name, app=app, service=service)
+
+    if not app.config.get('CELERY_BEAT_SCHEDULE').get('geocode:resolve'):
+        app.config['CELERY_BEAT_SCHEDULE']['geocode:resolve'] = {
+            'task': 'aap.geocode.resolve',
+            'schedule': timedelta(minutes=1)
+        }
+
+
+@celery.task(soft_time_limit=300)
+def resolve():
+    """Look up the pending location strings of the geocode cache"""
+    lock_name = get_lock_id('Geocode', 'Resolve')
+    if not lock(lock_name, expire=310):
+        logger.info('Task: {} is already running.'.format(lock_name))
+        return
+
+    try:
+        GeocodeResolver(interval=app.config.get('GEOCODE_INTERVAL', 2)).run(app.config.get('GEOCODE_MAX_LOOKUPS', 20))
+    finally:
+        unlock(lock_name)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import logging
+import time
+
+import superdesk
+from geopy.geocoders import Nominatim
+from geopy.location import Location
+
+logger = logging.getLogger(__name__)
+
+LOCALITY_HIERARCHY = [
+    'city',
+    'state',
+    'state_district',
+    'region',
+    'county',
+    'island',
+    'town',
+    'moor',
+    'waterways',
+    'village',
+    'district',
+    'borough',
+]
+
+AREA_HIERARCHY = [
+    'island',
+    'town',
+    'moor',
+    'waterways',
+    'village',
+    'hamlet',
+    'municipality',
+    'district',
+    'borough',
+    'airport',
+    'national_park',
+    'suburb',
+    'croft',
+    'subdivision',
+    'farm',
+    'locality',
+    'islet',
+]
+
+#: types of the geocoder results used for a venue, in order of preference
+VENUE_TYPES = ['stadium', 'pitch', 'sports_centre']
+
+
+class LocalGeocoder():
+    """Geocoder answering from a dict of raw results by location string, it stands in for Nominatim in the tests
+
+    :param dict results: list of raw Nominatim results by location string
+    """
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.queries = []
+
+    def geocode(self, query, exactly_one=True, **kwargs):
+        self.queries.append(query)
+        locations = [Location(raw.get('display_name', ''), (float(raw['lat']), float(raw['lon'])), raw)
+                     for raw in self.results.get(query, [])]
+        if not locations:
+            return None
+        return locations[0] if exactly_one else locations
+
+
+def get_venue(geo_locations):
+    """Get the raw result of the venue from the geocoder results
+
+    :param list geo_locations: geocoder results
+    :return dict: raw result, None if none of the results is a venue
+    """
+    for venue_type in VENUE_TYPES:
+        venues = [location for location in geo_locations or [] if location.raw.get('type') == venue_type]
+        if venues:
+            return venues[0].raw
+    return None
+
+
+def create_location(location_string, raw):
+    """Create the location of the geocoded venue
+
+    :param str location_string: location string, the unique name of the location
+    :param dict raw: raw Nominatim result of the venue
+    :return dict: location
+    """
+    address = raw.get('address', {})
+    localities = [locality for locality in LOCALITY_HIERARCHY if address.get(locality)]
+    areas = [area for area in AREA_HIERARCHY if address.get(area)]
+    line = address.get('house_number', '')
+    line = address.get('road', '') if line == '' else line + ' ' + address.get('road', '')
+
+    location = dict()
+    location['unique_name'] = location_string
+    location['original_source'] = 'AAP Sports Results'
+    location['position'] = {'longitude': float(raw['lon']), 'latitude': float(raw['lat']), 'altitude': 0.0}
+    location['address'] = {
+        'locality': address.get(localities[0], '') if len(localities) > 0 else '',
+        'area': address.get(areas[0], '') if len(areas) > 0 else '',
+        'country': address.get('country', ''),
+        'postal_code': address.get('postcode', ''),
+        'external': {'nominatim': raw},
+        'line': [line]
+    }
+    location['name'] = address.get(raw.get('type', 'stadium'), '')
+
+    locations_service = superdesk.get_resource_service('locations')
+    ret = locations_service.post([location])
+    return locations_service.find_one(req=None, _id=ret[0])
+
+
+def get_item_location(location):
+    """Get the location of an item from the location
+
+    :param dict location:
+    :return dict: item location
+    """
+    return {
+        'name': location.get('name', ''),
+        'address': {
+            'line': location.get('address', {}).get('line', []),
+            'area': location.get('address', {}).get('area', ''),
+            'locality': location.get('address', {}).get('locality', ''),
+            'postal_code': location.get('address', {}).get('postal_code', ''),
+            'country': location.get('address', {}).get('country', ''),
+        },
+        'qcode': location.get('guid')
+    }
+
+
+class GeocodeResolver():
+    """Look up the pending location strings of the geocode cache, at most one every ``interval`` seconds.
+
+    The location of a venue that is found is created, and the events ingested while it was pending are back-filled
+    with it, unless a user has updated them.
+
+    :param geocoder: geocoder, Nominatim by default
+    :param int interval: seconds between the lookups
+    """
+
+    def __init__(self, geocoder=None, interval=2):
+        self.geocoder = geocoder or Nominatim(user_agent='Superdesk Planning')
+        self.interval = interval
+
+    def run(self, max_lookups=20):
+        """Look up the pending location strings
+
+        :param int max_lookups: number of location strings looked up
+        """
+        for index, entry in enumerate(superdesk.get_resource_service('geocode_cache').get_pending(max_lookups)):
+            if index:
+                time.sleep(self.interval)
+            self.resolve(entry)
+
+    def resolve(self, entry):
+        query = entry['query']
+        try:
+            geo_locations = self.geocoder.geocode(query, exactly_one=False, addressdetails=True, language='en')
+        except Exception as ex:
+            # the entry stays pending and is looked up again by the next run
+            logger.exception(ex)
+            return
+
+        raw = get_venue(geo_locations)
+        guids = entry.get('guids') or []
+        location = None
+        if raw:
+            location = superdesk.get_resource_service('locations').find_one(req=None, unique_name=query) or \
+                create_location(query, raw)
+            self._backfill(guids, location)
+        superdesk.get_resource_service('geocode_cache').set_result(query, raw, guids)
+        logger.info('Geocoded {}: {}'.format(query, 'found' if location else 'not found'))
+
+    def _backfill(self, guids, location):
+        if not guids:
+            return
+
+        events_service = superdesk.get_resource_service('events')
+        for event in events_service.find({'guid': {'$in': guids}}):
+            # the location of an event updated by a user is left as it is
+            if 'version_creator' in event:
+                continue
+            events_service.system_update(event['_id'], {'location': [get_item_location(location)]}, event)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+from superdesk.tests import TestCase
+from planning import init_app as planning_init_app
+from aap.geocode import init_app as geocode_init_app
+from .resolver import GeocodeResolver, LocalGeocoder
+
+
+class GeocodeResolverTest(TestCase):
+    results = {
+        'Optus Stadium, Perth': [
+            {'type': 'car_park', 'lat': '-31.95', 'lon': '115.88', 'address': {}},
+            {'type': 'stadium', 'lat': '-31.9512', 'lon': '115.8891',
+             'address': {'stadium': 'Optus Stadium', 'road': 'Victoria Park Drive', 'suburb': 'Burswood',
+                         'city': 'Perth', 'country': 'Australia', 'postcode': '6100'}}
+        ]
+    }
+
+    def setUp(self):
+        planning_init_app(self.app)
+        geocode_init_app(self.app)
+        self.cache = superdesk.get_resource_service('geocode_cache')
+        self.geocoder = LocalGeocoder(self.results)
+        self.resolver = GeocodeResolver(self.geocoder, interval=0)
+
+    def test_found(self):
+        self.app.data.insert('events', [{'guid': 'event1', 'location': [{'name': 'Optus Stadium, Perth'}]},
+                                        {'guid': 'event2', 'version_creator': 'user'}])
+        self.cache.request('Optus Stadium, Perth', 'event1')
+        self.cache.request('Optus Stadium, Perth', 'event2')
+        self.assertEqual(self.cache.get_entry('Optus Stadium, Perth')['status'], 'pending')
+
+        self.resolver.run()
+
+        entry = self.cache.get_entry('Optus Stadium, Perth')
+        self.assertEqual(entry['status'], 'found')
+        self.assertEqual(entry['guids'], [])
+        location = superdesk.get_resource_service('locations').find_one(req=None, unique_name='Optus Stadium, Perth')
+        self.assertEqual(location['name'], 'Optus Stadium')
+        self.assertEqual(location['address']['locality'], 'Perth')
+        self.assertEqual(location['address']['area'], 'Burswood')
+
+        event = superdesk.get_resource_service('events').find_one(req=None, guid='event1')
+        self.assertEqual(event['location'][0]['name'], 'Optus Stadium')
+        self.assertEqual(event['location'][0]['qcode'], location['guid'])
+        event = superdesk.get_resource_service('events').find_one(req=None, guid='event2')
+        self.assertNotIn('location', event)
+
+    def test_not_found(self):
+        self.cache.request('Unknown Oval, Nowhere')
+        self.resolver.run()
+        self.assertEqual(self.cache.get_entry('Unknown Oval, Nowhere')['status'], 'not_found')
+
+        self.resolver.run()
+        self.assertEqual(self.geocoder.queries, ['Unknown Oval, Nowhere'])
+
+    def test_lookup_failed(self):
+        self.cache.request('Optus Stadium, Perth')
+        self.resolver.geocoder = None
+        self.resolver.run()
+        self.assertEqual(self.cache.get_entry('Optus Stadium, Perth')['status'], 'pending')
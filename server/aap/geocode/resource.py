@@ -0,0 +1,46 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk.resource import Resource
+
+
+class GeocodeCacheResource(Resource):
+    schema = {
+        # location string that is geocoded
+        'query': {
+            'type': 'string'
+        },
+        # pending until the resolver looks the location string up, then found or not_found
+        'status': {
+            'type': 'string',
+            'allowed': ['pending', 'found', 'not_found']
+        },
+        # raw geocoder result that the location was created from
+        'result': {
+            'type': 'dict',
+            'nullable': True
+        },
+        # guids of the items waiting for the location
+        'guids': {
+            'type': 'list',
+            'schema': {'type': 'string'}
+        },
+        'expiry': {
+            'type': 'datetime'
+        }
+    }
+    internal_resource = True
+    mongo_indexes = {
+        'query_1': ([('query', 1)], {'unique': True}),
+        'status_1': ([('status', 1)], {'background': True}),
+        'expiry_1': ([('expiry', 1)], {'expireAfterSeconds': 0})
+    }
+    item_methods = []
+    resource_methods = []
@@ -0,0 +1,82 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from datetime import timedelta
+
+from superdesk.services import BaseService
+from superdesk.utc import utcnow
+
+
+class GeocodeCacheService(BaseService):
+    """Geocoded location strings, kept until the entry expires.
+
+    Found and not found results are kept, so a restart does not look the same venues up again. A location string
+    that is not in the cache is requested, and stays pending until the resolver looks it up.
+    """
+
+    #: a found location string is looked up again after a month
+    found_ttl = timedelta(days=30)
+    #: a location string that was not found is looked up again after a week
+    not_found_ttl = timedelta(days=7)
+    #: a pending location string is dropped if the resolver could not look it up in a day
+    pending_ttl = timedelta(days=1)
+
+    def get_entry(self, query):
+        """Get the entry of the location string if it has not expired
+
+        :param str query: location string
+        :return dict: entry, None if there is no entry
+        """
+        return self.find_one(req=None, query=query, expiry={'$gt': utcnow()})
+
+    def request(self, query, guid=None):
+        """Request the location string to be looked up
+
+        :param str query: location string
+        :param str guid: guid of the item to back-fill with the location
+        """
+        now = utcnow()
+        # an expired entry that was not removed yet is looked up again
+        self.find_and_modify(
+            query={'query': query, 'expiry': {'$lte': now}},
+            update={'$set': {'status': 'pending', 'expiry': now + self.pending_ttl}}
+        )
+
+        update = {'$setOnInsert': {'status': 'pending', 'expiry': now + self.pending_ttl}}
+        if guid:
+            update['$addToSet'] = {'guids': guid}
+        self.find_and_modify(query={'query': query}, update=update, upsert=True)
+
+    def get_pending(self, max_results):
+        """Get the pending entries
+
+        :param int max_results:
+        :return list: entries
+        """
+        return list(self.find({'status': 'pending'}, max_results=max_results))
+
+    def set_result(self, query, result, guids=None):
+        """Set the result of the lookup
+
+        :param str query: location string
+        :param dict result: raw geocoder result, None if the location string was not found
+        :param list guids: guids of the items that were back-filled, they are removed from the entry
+        """
+        self.find_and_modify(
+            query={'query': query},
+            update={
+                '$set': {
+                    'status': 'found' if result else 'not_found',
+                    'result': result,
+                    'expiry': utcnow() + (self.found_ttl if result else self.not_found_ttl)
+                },
+                '$pullAll': {'guids': guids or []}
+            }
+        )
@@ -13,4 +13,5 @@ from .feeding_services.aap_sports_service import AAPSportsHTTPFeedingService  #
 from .feeding_services.intelematics_fuel_service import IntelematicsFuelHTTPFeedingService  # noqa
 from .feeding_services.intelematics_incidents_service import IntelematicsIncidentHTTPFeedingService  # noqa
 from .feeding_services.ap_media_relay import APMediaRelayFeedingService  # noqa
-from .feeding_services.petrol_spy_fuel_service import PetrolSpyFuelHTTPFeedingService  # noqa
\ No newline at end of file
+from .feeding_services.petrol_spy_fuel_service import PetrolSpyFuelHTTPFeedingService  # noqa
+from .feeding_services.parallel_file_service import ParallelFileFeedingService  # noqa
@@ -12,12 +12,12 @@ import logging
 from superdesk.io.registry import register_feed_parser
 from superdesk.io.feed_parsers import XMLFeedParser
 from datetime import datetime, timedelta
+from copy import deepcopy
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, GUID_FIELD, CONTENT_STATE
 from superdesk.utc import utcnow, local_to_utc
 from eve.utils import config
 import superdesk
-from geopy.geocoders import Nominatim
-import time
+from aap.geocode.resolver import create_location, get_item_location
 from superdesk.io.iptc import subject_codes
 
 logger = logging.getLogger(__name__)
@@ -28,41 +28,6 @@ class AAPSportsFixturesParser(XMLFeedParser):
 
     label = 'AAP Sports Fixtures Parser'
 
-    localityHierarchy = [
-        'city',
-        'state',
-        'state_district',
-        'region',
-        'county',
-        'island',
-        'town',
-        'moor',
-        'waterways',
-        'village',
-        'district',
-        'borough',
-    ]
-
-    areaHierarchy = [
-        'island',
-        'town',
-        'moor',
-        'waterways',
-        'village',
-        'hamlet',
-        'municipality',
-        'district',
-        'borough',
-        'airport',
-        'national_park',
-        'suburb',
-        'croft',
-        'subdivision',
-        'farm',
-        'locality',
-        'islet',
-    ]
-
     # Map sport id to sport name, iptc code and a prefix used for the short description
     sport_map = {'1': {'name': 'Rugby League', 'iptc': '15048000', 'prefix': 'RL:'},
                  '2': {'name': 'Rugby Union', 'iptc': '15049000', 'prefix': 'RU:'},
@@ -78,7 +43,6 @@ class AAPSportsFixturesParser(XMLFeedParser):
                  '28': {'name': 'MotorCycle Racing', 'iptc': '15041000', 'prefix': 'MOTORCYCLING:'}}
 
     def __init__(self):
-        self.geolocator = Nominatim(user_agent='Superdesk Planning')
         self.not_found = set()
 
     def can_parse(self, xml):
@@ -86,39 +50,56 @@ class AAPSportsFixturesParser(XMLFeedParser):
 
     def parse(self, fixture, provider=None):
         self._clear_values()
-        self.eocstat_map = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='eventoccurstatus')
+        vocabularies = superdesk.get_resource_service('vocabularies')
+        self.eocstat_map = vocabularies.find_one(req=None, _id='eventoccurstatus')
+        calendars = vocabularies.find_one(req=None, _id='event_calendars')
+        self.calendars = [c for c in calendars.get('items', []) if c.get('qcode').lower() in ('sport', 'sportgeneral')]
         self.fixture = fixture
-        items = []
+        # the parsed items and their location strings
+        candidates = []
         xml = fixture.get('fixture_xml')
         if xml.attrib.get('Status_Code') == 'OK':
             if xml.find('.//Fixtures') is not None:
-                self._parse_fixtures(xml, items)
+                self._parse_fixtures(xml, candidates)
+                items = self._get_ingest_items(candidates)
                 logger.info('locations not found {}'.format(self.not_found))
+                return items
             elif xml.find('.//Fixture_List') is not None:
-                self._parse_fixture_list(fixture, items)
-            return items
+                self._parse_fixture_list(fixture, candidates)
+            return self._get_ingest_items(candidates)
         else:
             logger.warning('Failed to retrieve fixture {}'.format(fixture))
         return []
 
-    def _can_ingest_item(self, item):
+    def _get_ingest_items(self, candidates):
         """
-        Determine if the item has already been ingested, if it has and it's been updated by a user it returns false.
-        :param item:
-        :return:
+        Get the items that can be ingested, the items that have been ingested and then updated by a user are dropped.
+        The events of all the candidates are read with one query, and the locations are only set on the items that
+        can be ingested.
+        :param candidates: list of the items and their location string, None if the item has no location
+        :return: items
         """
-        service = superdesk.get_resource_service('events')
-        old = service.find_one(req=None, guid=item['guid'])
-        # If the item already exists
-        if old is not None:
-            # if it has been updated by a user
-            if 'version_creator' in old:
-                return False
-            else:
-                return True
-        else:
-            item['firstcreated'] = utcnow()
-            return True
+        guids = list({item[GUID_FIELD] for item, _location_string in candidates})
+        events = superdesk.get_resource_service('events').find({'guid': {'$in': guids}}) if guids else []
+        ingested = {}
+        for event in events:
+            ingested.setdefault(event['guid'], 'version_creator' in event)
+
+        items = []
+        for item, location_string in candidates:
+            # If the item already exists and it has been updated by a user
+            if ingested.get(item[GUID_FIELD]):
+                continue
+            if item[GUID_FIELD] not in ingested:
+                item['firstcreated'] = utcnow()
+            if location_string is not None:
+                try:
+                    self._set_location(item, location_string)
+                except Exception:
+                    logger.exception('Failed to set the location of the fixture.')
+                    continue
+            items.append(item)
+        return items
 
     def _set_default_item(self, sport_id, comp_id, match_id):
         """
@@ -141,9 +122,7 @@ class AAPSportsFixturesParser(XMLFeedParser):
         item['versioncreated'] = utcnow()
         item['state'] = CONTENT_STATE.INGESTED
         item['pubstatus'] = None
-        calendars = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='event_calendars')
-        item['calendars'] = [c for c in calendars.get('items', [])
-                             if c.get('qcode').lower() in ('sport', 'sportgeneral')]
+        item['calendars'] = deepcopy(self.calendars)
 
         return item
 
@@ -177,18 +156,17 @@ class AAPSportsFixturesParser(XMLFeedParser):
                     match_id = event.attrib.get('Event_ID')
                 if datetime.now() < end and match_id:
                     item = self._set_default_item(fixture.get('sport_id'), fixture.get('comp_id'), match_id)
-                    if self._can_ingest_item(item):
-                        item['name'] = '{} - {}'.format(
-                            self.sport_map.get(fixture.get('sport_id', {}), {}).get('name', ''),
-                            fixture.get('comp_name')
-                        )
-                        item['definition_short'] = competition_detail.attrib.get('Gender', '')
-                        item['dates'] = {
-                            'start': local_to_utc(config.DEFAULT_TIMEZONE, start),
-                            'end': local_to_utc(config.DEFAULT_TIMEZONE, end),
-                            'tz': config.DEFAULT_TIMEZONE,
-                        }
-                        items.append(item)
+                    item['name'] = '{} - {}'.format(
+                        self.sport_map.get(fixture.get('sport_id', {}), {}).get('name', ''),
+                        fixture.get('comp_name')
+                    )
+                    item['definition_short'] = competition_detail.attrib.get('Gender', '')
+                    item['dates'] = {
+                        'start': local_to_utc(config.DEFAULT_TIMEZONE, start),
+                        'end': local_to_utc(config.DEFAULT_TIMEZONE, end),
+                        'tz': config.DEFAULT_TIMEZONE,
+                    }
+                    items.append((item, None))
             except Exception:
                 logger.exception('Failed to parse event fixtures.')
         else:
@@ -213,37 +191,35 @@ class AAPSportsFixturesParser(XMLFeedParser):
                         venue_name = match.find('.//Venue').attrib.get('Venue_Name', '')
                         venue_location = match.find('.//Venue').attrib.get('Venue_Location', '')
                         item = self._set_default_item(fixture.get('sport_id'), fixture.get('comp_id'), match_id)
-                        if self._can_ingest_item(item):
-                            item['name'] = '{} - {} v {}'.format(
-                                self.sport_map.get(fixture.get('sport_id', {}), {}).get('name', ''), teamA_name,
-                                teamB_name)
-                            item['definition_short'] = '{} match {} {} v {}'.format(fixture.get('comp_name', ''),
-                                                                                    match_no,
-                                                                                    teamA_name,
-                                                                                    teamB_name)
-
-                            # kludge for cricket
-                            if fixture.get('sport_id') == '3':
-                                if 'test' in comp_type.lower():
-                                    delta = timedelta(days=5)
-                                elif 'shef' in comp_type.lower():
-                                    delta = timedelta(days=4)
-                                elif 't20' in comp_type.lower():
-                                    delta = timedelta(hours=4)
-                                elif 'odi' in comp_type.lower() or 'odd' in comp_type.lower():
-                                    delta = timedelta(hours=8)
-                                else:
-                                    delta = timedelta(hours=8)
+                        item['name'] = '{} - {} v {}'.format(
+                            self.sport_map.get(fixture.get('sport_id', {}), {}).get('name', ''), teamA_name,
+                            teamB_name)
+                        item['definition_short'] = '{} match {} {} v {}'.format(fixture.get('comp_name', ''),
+                                                                                match_no,
+                                                                                teamA_name,
+                                                                                teamB_name)
+
+                        # kludge for cricket
+                        if fixture.get('sport_id') == '3':
+                            if 'test' in comp_type.lower():
+                                delta = timedelta(days=5)
+                            elif 'shef' in comp_type.lower():
+                                delta = timedelta(days=4)
+                            elif 't20' in comp_type.lower():
+                                delta = timedelta(hours=4)
+                            elif 'odi' in comp_type.lower() or 'odd' in comp_type.lower():
+                                delta = timedelta(hours=8)
                             else:
-                                delta = timedelta(hours=2)
-                            item['dates'] = {
-                                'start': local_to_utc(config.DEFAULT_TIMEZONE, when),
-                                'end': local_to_utc(config.DEFAULT_TIMEZONE, when) + delta,
-                                'tz': config.DEFAULT_TIMEZONE,
-                            }
-                            # add location
-                            self._set_location(item, '{}, {}'.format(venue_name, venue_location))
-                            items.append(item)
+                                delta = timedelta(hours=8)
+                        else:
+                            delta = timedelta(hours=2)
+                        item['dates'] = {
+                            'start': local_to_utc(config.DEFAULT_TIMEZONE, when),
+                            'end': local_to_utc(config.DEFAULT_TIMEZONE, when) + delta,
+                            'tz': config.DEFAULT_TIMEZONE,
+                        }
+                        # the location is added if the item is ingested
+                        items.append((item, '{}, {}'.format(venue_name, venue_location)))
                     except Exception:
                         logger.exception('Failed to parse competition fixtures.')
 
@@ -308,24 +284,22 @@ class AAPSportsFixturesParser(XMLFeedParser):
                     teamA = self.teams.get(match.attrib.get('TeamA_ID')).get('name')
                     teamB = self.teams.get(match.attrib.get('TeamB_ID')).get('name')
                     item = self._set_default_item(self.fixture.get('sport_id'), self.fixture.get('comp_id'), match_id)
-                    if self._can_ingest_item(item):
-                        item['name'] = '{} - {} v {}'.format(
-                            self.sport_map.get(self.fixture.get('sport_id', {}), {}).get('name', ''), teamA, teamB)
-                        item['definition_short'] = '{}/{}/{} {} v {}'.format(self.sport,
-                                                                             self.series,
-                                                                             self.round,
-                                                                             teamA,
-                                                                             teamB)
-                        item['dates'] = {
-                            'start': local_to_utc(config.DEFAULT_TIMEZONE, when),
-                            'end': local_to_utc(config.DEFAULT_TIMEZONE, when) + timedelta(hours=2),
-                            'tz': config.DEFAULT_TIMEZONE,
-                        }
-                        # add location
-                        self._set_location(item, '{}, {}'.format(
-                            self.venues.get(match.attrib.get('Venue_ID')).get('name'),
-                            self.venues.get(match.attrib.get('Venue_ID')).get('location')))
-                        items.append(item)
+                    item['name'] = '{} - {} v {}'.format(
+                        self.sport_map.get(self.fixture.get('sport_id', {}), {}).get('name', ''), teamA, teamB)
+                    item['definition_short'] = '{}/{}/{} {} v {}'.format(self.sport,
+                                                                         self.series,
+                                                                         self.round,
+                                                                         teamA,
+                                                                         teamB)
+                    item['dates'] = {
+                        'start': local_to_utc(config.DEFAULT_TIMEZONE, when),
+                        'end': local_to_utc(config.DEFAULT_TIMEZONE, when) + timedelta(hours=2),
+                        'tz': config.DEFAULT_TIMEZONE,
+                    }
+                    # the location is added if the item is ingested
+                    items.append((item, '{}, {}'.format(
+                        self.venues.get(match.attrib.get('Venue_ID')).get('name'),
+                        self.venues.get(match.attrib.get('Venue_ID')).get('location'))))
             except Exception:
                 logger.exception('Failed to parse series fixtures.')
 
@@ -345,84 +319,22 @@ class AAPSportsFixturesParser(XMLFeedParser):
             return
 
         # lookup the location string as unique name in the location collection, if this is found then we use that
-        locations_service = superdesk.get_resource_service('locations')
-        location = locations_service.find_one(req=None, unique_name=location_string)
+        location = superdesk.get_resource_service('locations').find_one(req=None, unique_name=location_string)
         if location:
-            item['location'] = [{
-                'name': location.get('name', location.get('name', '')),
-                'address': {
-                    'line': location.get('address', {}).get('line', []),
-                    'area': location.get('address', {}).get('area', ''),
-                    'locality': location.get('address', {}).get('locality', ''),
-                    'postal_code': location.get('address', {}).get('postal_code', ''),
-                    'country': location.get('address', {}).get('country', ''),
-                },
-                'qcode': location.get('guid')
-            }]
+            item['location'] = [get_item_location(location)]
             return
 
-        # if we have not looked before and not found it
-        if location_string not in self.not_found:
-            # if it is not found then look it up using the web service
-            try:
-                geo_locations = self.geolocator.geocode(location_string, exactly_one=False, addressdetails=True,
-                                                        language='en')
-            except Exception as ex:
-                logger.exception(ex)
-                geo_locations = None
-
-            time.sleep(2)
-        else:
-            geo_locations = None
-
-        if geo_locations is None:
-            self._set_location_not_found(item, location_string)
+        # a location string that has not been geocoded yet is requested, the geocode resolver looks it up in the
+        # background and back-fills the item with the location it finds
+        geocode_cache = superdesk.get_resource_service('geocode_cache')
+        entry = geocode_cache.get_entry(location_string)
+        if entry is None or entry.get('status') == 'pending':
+            geocode_cache.request(location_string, item[GUID_FIELD])
+        elif entry.get('status') == 'found':
+            item['location'] = [get_item_location(create_location(location_string, entry['result']))]
             return
 
-        # Find any locations that are of type stadium
-        stadiums = [s for s in geo_locations if s.raw['type'] == 'stadium']
-        if len(stadiums) == 0:
-            stadiums = [s for s in geo_locations if s.raw['type'] == 'pitch']
-            if len(stadiums) == 0:
-                stadiums = [s for s in geo_locations if s.raw['type'] == 'sports_centre']
-                if len(stadiums) == 0:
-                    self._set_location_not_found(item, location_string)
-                    return
-
-        stadium = stadiums[0]
-
-        location = dict()
-        location['unique_name'] = location_string
-        location['original_source'] = 'AAP Sports Results'
-        location['position'] = {'longitude': stadium.point.longitude, 'latitude': stadium.point.latitude,
-                                'altitude': stadium.point.altitude}
-        localities = [l for l in self.localityHierarchy if stadium.raw.get('address', {}).get(l)]
-        areas = [a for a in self.areaHierarchy if stadium.raw.get('address', {}).get(a)]
-        line = stadium.raw.get('address', {}).get('house_number', '')
-        line = stadium.raw.get('address', {}).get('road', '') if line == '' else \
-            line + ' ' + stadium.raw.get('address', {}).get('road', '')
-        location['address'] = {
-            'locality': stadium.raw.get('address', {}).get(localities[0], '') if len(localities) > 0 else '',
-            'area': stadium.raw.get('address', {}).get(areas[0], '') if len(areas) > 0 else '',
-            'country': stadium.raw.get('address', {}).get('country', ''),
-            'postal_code': stadium.raw.get('address', {}).get('postcode', ''),
-            'external': {'nominatim': stadium.raw},
-            'line': [line]
-        }
-        location['name'] = stadiums[0].raw.get('address', {}).get(stadiums[0].raw.get('type', 'stadium'), '')
-        ret = locations_service.post([location])
-        location = locations_service.find_one(req=None, _id=ret[0])
-        item['location'] = [{
-            'name': location.get('name', location.get('name')),
-            'address': {
-                'line': location.get('address', {}).get('line', []),
-                'area': location.get('address', {}).get('area', ''),
-                'locality': location.get('address', {}).get('locality', ''),
-                'postal_code': location.get('address', {}).get('postal_code', ''),
-                'country': location.get('address', {}).get('country', ''),
-            },
-            'qcode': location.get('guid')
-        }]
+        self._set_location_not_found(item, location_string)
 
 
 register_feed_parser(AAPSportsFixturesParser.NAME, AAPSportsFixturesParser())
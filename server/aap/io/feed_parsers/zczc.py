@@ -63,78 +63,111 @@ class ZCZCFeedParser(FileFeedParser):
     header_map = {KEYWORD: ITEM_SLUGLINE, TAKEKEY: ITEM_TAKE_KEY,
                   HEADLINE: ITEM_HEADLINE, SERVICELEVEL: None}
 
+    #: Number of characters read from the start of the file to find the start of a message
+    PROBE_SIZE = 8192
+
     def can_parse(self, file_path):
         try:
             with open(file_path, 'r', encoding='latin-1') as f:
-                lines = f.readlines()
-                for line in lines:
-                    if self.START_OF_MESSAGE in line:
-                        return True
-                return False
+                return self.START_OF_MESSAGE in f.read(self.PROBE_SIZE)
         except Exception as ex:
             logger.exception(ex)
             return False
 
     def parse(self, filename, provider=None):
-        try:
-            item = {}
-            self.set_item_defaults(item, provider)
+        """Parse the stories of the file
+
+        :return: the item if the file has a single story, otherwise the list of items
+        """
+        items = list(self.parse_stories(filename, provider))
+        return items[0] if len(items) == 1 else items
 
+    def parse_stories(self, filename, provider=None):
+        """Parse the file line by line, yielding an item for each story
+
+        A story starts at a line with the start of message and ends at the end of message, or at the start of the
+        next story. If the file has no story a single item with the defaults is yielded.
+        """
+        try:
             with open(filename, 'r', encoding='latin-1') as f:
-                lines = f.readlines()
+                item = None
                 header = False
-                body = False
-                for line in lines:
+                body = []
+                stories = 0
+                for line in f:
                     if self.START_OF_MESSAGE in line and not header:
+                        if item is not None:
+                            yield self._end_story(item, body, provider)
+                        item = {}
+                        self.set_item_defaults(item, provider)
                         item['guid'] = filename + str(uuid.uuid4())
                         header = True
+                        body = []
+                        stories += 1
+                        continue
+
+                    if item is None:
                         continue
                     if header:
-                        if line == '\n':
-                            continue
-                        if line[0] in self.header_map:
-                            if self.header_map[line[0]]:
-                                item[self.header_map[line[0]]] = line[1:-1]
-                            continue
-                        if line[0] == self.CATEGORY:
-                            item[self.ITEM_ANPA_CATEGORY] = [{'qcode': line[1]}]
-                            continue
-                        if line[0] == self.FORMAT:
-                            if line[1] == self.TEXT:
-                                item[ITEM_TYPE] = CONTENT_TYPE.TEXT
-                                continue
-                            if line[1] == self.TABULAR:
-                                item[FORMAT] = FORMATS.PRESERVED
-                                continue
-                            continue
-                        if line[0] == self.GENRE:
-                            genre = line[1:-1]
-                            if genre:
-                                genre_map = get_resource_service('vocabularies').find_one(req=None, _id='genre')
-                                item['genre'] = [x for x in genre_map.get('items', []) if
-                                                 x['qcode'] == genre and x['is_active']]
-                            continue
-                        if line[0] == self.IPTC:
-                            iptc_code = line[1:-1]
-                            if iptc_code.isdigit():
-                                item[self.ITEM_SUBJECT] = [{'qcode': iptc_code, 'name': subject_codes[iptc_code]}]
-                            continue
-                        header = False
-                        body = True
-                        item['body_html'] = line
+                        header = self._parse_header_line(item, line)
+                        if not header:
+                            body.append(line)
+                    elif self.END_OF_MESSAGE in line:
+                        yield self._end_story(item, body, provider)
+                        item = None
                     else:
-                        if self.END_OF_MESSAGE in line:
-                            break
-                        if body:
-                            item['body_html'] = item.get('body_html', '') + line
-                if item.get(FORMAT) == FORMATS.PRESERVED:
-                    item['body_html'] = '<pre>' + html.escape(item['body_html']) + '</pre>'
-
-            return self.post_process_item(item, provider)
-
+                        body.append(line)
+
+                if item is not None:
+                    yield self._end_story(item, body, provider)
+                elif not stories:
+                    item = {}
+                    self.set_item_defaults(item, provider)
+                    yield self._end_story(item, body, provider)
         except Exception as ex:
             raise AAPParserError.ZCZCParserError(exception=ex, provider=provider)
 
+    def _parse_header_line(self, item, line):
+        """Set the field of the header line on the item
+
+        :return bool: False if the line is not a header line, it is the first line of the body
+        """
+        if line == '\n':
+            return True
+        if line[0] in self.header_map:
+            if self.header_map[line[0]]:
+                item[self.header_map[line[0]]] = line[1:-1]
+            return True
+        if line[0] == self.CATEGORY:
+            item[self.ITEM_ANPA_CATEGORY] = [{'qcode': line[1]}]
+            return True
+        if line[0] == self.FORMAT:
+            if line[1] == self.TEXT:
+                item[ITEM_TYPE] = CONTENT_TYPE.TEXT
+            elif line[1] == self.TABULAR:
+                item[FORMAT] = FORMATS.PRESERVED
+            return True
+        if line[0] == self.GENRE:
+            genre = line[1:-1]
+            if genre:
+                genre_map = get_resource_service('vocabularies').find_one(req=None, _id='genre')
+                item['genre'] = [x for x in genre_map.get('items', []) if
+                                 x['qcode'] == genre and x['is_active']]
+            return True
+        if line[0] == self.IPTC:
+            iptc_code = line[1:-1]
+            if iptc_code.isdigit():
+                item[self.ITEM_SUBJECT] = [{'qcode': iptc_code, 'name': subject_codes[iptc_code]}]
+            return True
+        return False
+
+    def _end_story(self, item, body, provider):
+        if body:
+            item['body_html'] = ''.join(body)
+        if item.get(FORMAT) == FORMATS.PRESERVED:
+            item['body_html'] = '<pre>' + html.escape(item['body_html']) + '</pre>'
+        return self.post_process_item(item, provider)
+
     def set_item_defaults(self, item, provider):
         item['urgency'] = 5
         item['pubstatus'] = 'usable'
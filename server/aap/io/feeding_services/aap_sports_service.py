@@ -8,8 +8,12 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import hashlib
 import requests
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app as app
 
 import xml.etree.ElementTree as ET
 from superdesk.io.feeding_services.http_service import HTTPFeedingService
@@ -60,6 +64,9 @@ class AAPSportsHTTPFeedingService(HTTPFeedingService):
         },
     ]
 
+    #: number of threads fetching the competitions and fixtures
+    FETCH_THREADS = 4
+
     def _update(self, provider, update):
         self.provider = provider
         parser = self.get_feed_parser(provider)
@@ -73,36 +80,100 @@ class AAPSportsHTTPFeedingService(HTTPFeedingService):
         xml = ET.fromstring(content)
         if xml.attrib['Status_Code'] == 'OK':
             session = xml.attrib['Status_Session']
-            content = self._request(config.get('fixtures_url').format(session, '', '', ''))
+            fixtures_url = config.get('fixtures_url')
+            content = self._request(fixtures_url.format(session, '', '', ''))
             xml = ET.fromstring(content)
-            for s in xml.findall('.//Sports/Sport'):
-                sport_id = s.attrib['SportID']
-                if sport_id not in configured_sports:
-                    continue
-                sport_name = s.attrib['SportName']
-                content = self._request(config.get('fixtures_url').format(session, sport_id, '', ''))
-                sport_xml = ET.fromstring(content)
-                for c in sport_xml.findall('.//Competition'):
-                    comp_id = c.attrib.get('Comp_ID')
-                    comp_name = c.attrib.get('Comp_Name')
-                    content = self._request(config.get('fixtures_url').format(session, sport_id, comp_id, ''))
-                    comp_xml = ET.fromstring(content)
-                    for season in comp_xml.findall('.//Season'):
-                        season_id = season.attrib.get('SeasonID')
-                        if str(year) in season_id or str(year + 1) in season_id:
-                            content = self._request(
-                                config.get('fixtures_url').format(session, sport_id, comp_id, season_id))
-                            fixture_xml = ET.fromstring(content)
-                            logger.info('Parsing {}/{} {}/{}'.format(sport_id, sport_name, comp_id, comp_name))
-                            items = parser.parse({'fixture_xml': fixture_xml, 'sport_id': sport_id,
-                                                  'sport_name': sport_name, 'comp_name': comp_name, 'comp_id': comp_id},
-                                                 provider)
-                            if len(items) > 0:
-                                yield items
+            sports = [(s.attrib['SportID'], s.attrib['SportName']) for s in xml.findall('.//Sports/Sport')
+                      if s.attrib['SportID'] in configured_sports]
+
+            flask_app = app._get_current_object()
+            with ThreadPoolExecutor(max_workers=self.FETCH_THREADS) as executor:
+                sport_futures = [(sport_id, sport_name, executor.submit(
+                    self._fetch_xml, flask_app, fixtures_url.format(session, sport_id, '', '')))
+                    for sport_id, sport_name in sports]
+                comp_futures = [(sport_id, sport_name, c.attrib.get('Comp_ID'), c.attrib.get('Comp_Name'),
+                                 executor.submit(self._fetch_xml, flask_app,
+                                                 fixtures_url.format(session, sport_id, c.attrib.get('Comp_ID'), '')))
+                                for sport_id, sport_name, future in sport_futures
+                                for c in future.result().findall('.//Competition')]
+                seasons = [(sport_id, sport_name, comp_id, comp_name, season.attrib.get('SeasonID'))
+                           for sport_id, sport_name, comp_id, comp_name, future in comp_futures
+                           for season in future.result().findall('.//Season')
+                           if str(year) in season.attrib.get('SeasonID') or
+                           str(year + 1) in season.attrib.get('SeasonID')]
+
+                # the fixtures are fetched conditionally, the ones unchanged since the last update are not parsed
+                states = provider.get('private', {}).get('fixtures', {})
+                fixture_futures = []
+                for sport_id, sport_name, comp_id, comp_name, season_id in seasons:
+                    key = '{}-{}-{}'.format(sport_id, comp_id, season_id)
+                    fixture_futures.append((sport_id, sport_name, comp_id, comp_name, key, executor.submit(
+                        self._fetch_fixtures, flask_app, fixtures_url.format(session, sport_id, comp_id, season_id),
+                        states.get(key, {}))))
+
+                fixture_states = {}
+                update['private'] = dict(provider.get('private', {}), fixtures=fixture_states)
+                for sport_id, sport_name, comp_id, comp_name, key, future in fixture_futures:
+                    content, state = future.result()
+                    if content is None:
+                        logger.info('Fixtures {}/{} {}/{} unchanged'.format(sport_id, sport_name, comp_id, comp_name))
+                        fixture_states[key] = state
+                        continue
+
+                    fixture_xml = ET.fromstring(content)
+                    logger.info('Parsing {}/{} {}/{}'.format(sport_id, sport_name, comp_id, comp_name))
+                    items = parser.parse({'fixture_xml': fixture_xml, 'sport_id': sport_id,
+                                          'sport_name': sport_name, 'comp_name': comp_name, 'comp_id': comp_id},
+                                         provider)
+                    failed = None
+                    if len(items) > 0:
+                        failed = yield items
+                    # the new state is kept once the fixtures are ingested, so failed fixtures are parsed again
+                    if failed:
+                        if key in states:
+                            fixture_states[key] = states[key]
+                    else:
+                        fixture_states[key] = state
+
+    def _fetch_xml(self, flask_app, url):
+        with flask_app.app_context():
+            return ET.fromstring(self._request(url))
+
+    def _fetch_fixtures(self, flask_app, url, state):
+        """Fetch the fixtures of a season unless they are unchanged since the last update
+
+        :param flask_app: app, the fixtures are fetched in a thread
+        :param str url: fixtures url
+        :param dict state: ETag, Last-Modified and hash of the fixtures of the last update
+        :return: tuple of the fixtures, None if they are unchanged, and their state
+        """
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        with flask_app.app_context():
+            response = self._get(url, headers)
+        if response.status_code == 304:
+            return None, state
+
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        new_state = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': content_hash
+        }
+        if content_hash == state.get('hash'):
+            return None, new_state
+        return response.content, new_state
 
     def _request(self, url):
+        return self._get(url).content
+
+    def _get(self, url, headers=None):
         try:
-            response = requests.get(url, params={}, timeout=120)
+            response = requests.get(url, params={}, headers=headers, timeout=120)
         except requests.exceptions.Timeout as ex:
             # Maybe set up for a retry, or continue in a retry loop
             raise IngestApiError.apiTimeoutError(ex, self.provider)
@@ -119,7 +190,7 @@ class AAPSportsHTTPFeedingService(HTTPFeedingService):
         if response.status_code == 404:
             raise LookupError('Not found')
 
-        return response.content
+        return response
 
 
 register_feeding_service(AAPSportsHTTPFeedingService)
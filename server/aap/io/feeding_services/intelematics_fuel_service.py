@@ -141,11 +141,7 @@ class IntelematicsFuelHTTPFeedingService(HTTPFeedingService):
                                'location': servo_location, 'price': type_price.get('price')}
                 fuel_records.append(fuel_record)
 
-        if len(fuel_records):
-            # delete the old dataset for today
-            service.delete(lookup={'market': market.get('market'), 'sample_date': today})
-            # post the new ones
-            service.post(fuel_records)
+        service.save_prices(market.get('market'), today, fuel_records)
 
 
 register_feeding_service(IntelematicsFuelHTTPFeedingService)
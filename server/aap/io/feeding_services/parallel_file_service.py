@@ -0,0 +1,156 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import logging
+import os
+from datetime import datetime
+
+import billiard
+from flask import current_app as app
+from superdesk.errors import ParserError
+from superdesk.io.feed_parsers import XMLFeedParser
+from superdesk.io.feeding_services.file_service import FileFeedingService
+from superdesk.io.registry import register_feeding_service
+from superdesk.notification import push_notification
+from superdesk.utc import utc
+from superdesk.utils import get_sorted_files, FileSortAttributes
+
+logger = logging.getLogger(__name__)
+
+# state of a parser process
+_worker = {}
+
+
+def _init_worker(memory_limit):
+    """Create the app of the parser process, and limit the memory the process can allocate
+
+    :param int memory_limit: megabytes the process can allocate once the app is created, 0 for no limit
+    """
+    from app import get_app
+    worker_app = get_app()
+    worker_app.app_context().push()
+    _worker['service'] = ParallelFileFeedingService()
+
+    if memory_limit:
+        import resource
+        with open('/proc/self/statm') as f:
+            size = int(f.read().split()[0]) * resource.getpagesize()
+        limit = size + memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _parse_file(args):
+    """Parse the file in a parser process
+
+    :param tuple args: file path and provider
+    :return: tuple of the parsed item or items, and the error message if the file failed to parse
+    """
+    file_path, provider = args
+    try:
+        parser = _worker['service'].get_feed_parser(provider, file_path)
+        return parser.parse(file_path, provider), None
+    except Exception as ex:
+        logger.exception('Failed to parse {}'.format(file_path))
+        return None, '{}: {}'.format(type(ex).__name__, ex)
+
+
+class ParallelFileFeedingService(FileFeedingService):
+    """
+    Feeding Service class which reads the configured folder, as the file feed does, and parses the files in a pool of
+    processes.
+
+    The items are handed to ingest in the order of the files. The files are parsed in windows of a few files per
+    process, so a backlog is not held in memory, and each process can allocate at most
+    ``INGEST_PARSER_MEMORY_LIMIT`` megabytes and is replaced after ``INGEST_PARSER_MAX_TASKS`` files. If there are
+    fewer than ``INGEST_PARSER_MIN_FILES`` files they are parsed in the ingest worker.
+    """
+
+    NAME = 'parallel_file'
+
+    label = 'File feed (parallel parsing)'
+
+    def _update(self, provider, update):
+        if isinstance(self.get_feed_parser(provider), XMLFeedParser):
+            yield from super()._update(provider, update)
+            return
+
+        self.provider = provider
+        self.path = provider.get('config', {}).get('path', None)
+
+        if not self.path:
+            logger.warn('File Feeding Service {} is configured without path. Please check the configuration'
+                        .format(provider['name']))
+            return
+
+        files = []
+        for filename in get_sorted_files(self.path, sort_by=FileSortAttributes.created):
+            file_path = os.path.join(self.path, filename)
+            if os.path.isfile(file_path):
+                last_updated = datetime.fromtimestamp(os.lstat(file_path).st_mtime, tz=utc)
+                if self.is_latest_content(last_updated, provider.get('last_updated')):
+                    files.append((filename, last_updated))
+                else:
+                    self.move_file(self.path, filename, provider=provider, success=True)
+
+        processes = app.config.get('INGEST_PARSER_PROCESSES', 4)
+        if processes < 2 or len(files) < app.config.get('INGEST_PARSER_MIN_FILES', 4):
+            yield from self._parse_files(provider, files, self._parse_file_in_worker)
+        else:
+            # billiard, unlike multiprocessing, can start a pool from a daemonic celery worker process
+            pool = billiard.Pool(processes, initializer=_init_worker,
+                                 initargs=(app.config.get('INGEST_PARSER_MEMORY_LIMIT', 512),),
+                                 maxtasksperchild=app.config.get('INGEST_PARSER_MAX_TASKS', 100))
+            try:
+                yield from self._parse_files(provider, files, self._get_pool_parser(pool, provider, processes * 4))
+            finally:
+                pool.terminate()
+                pool.join()
+
+        push_notification('ingest:update')
+
+    def _parse_files(self, provider, files, parse):
+        """Hand the items of the files to ingest in the order of the files
+
+        :param list files: file names and modified times
+        :param parse: function parsing the files, it yields the items of each file in the order of the files
+        """
+        parsed = parse([os.path.join(self.path, filename) for filename, _last_updated in files])
+        for filename, last_updated in files:
+            try:
+                item = next(parsed)
+                self.after_extracting(item, provider)
+
+                if isinstance(item, list):
+                    failed = yield item
+                else:
+                    failed = yield [item]
+
+                self.move_file(self.path, filename, provider=provider, success=not failed)
+            except Exception as ex:
+                if self.is_old_content(last_updated):
+                    self.move_file(self.path, filename, provider=provider, success=False)
+                raise ParserError.parseFileError('{}-{}'.format(provider['name'], self.NAME), filename, ex, provider)
+
+    def _parse_file_in_worker(self, file_paths):
+        for file_path in file_paths:
+            yield self.get_feed_parser(self.provider, file_path).parse(file_path, self.provider)
+
+    def _get_pool_parser(self, pool, provider, window):
+        def parse(file_paths):
+            for start in range(0, len(file_paths), window):
+                args = [(file_path, provider) for file_path in file_paths[start:start + window]]
+                for item, error in pool.imap(_parse_file, args):
+                    if error:
+                        raise Exception(error)
+                    yield item
+        return parse
+
+
+register_feeding_service(ParallelFileFeedingService)
@@ -3,7 +3,9 @@ from superdesk.io.registry import register_feeding_service
 from superdesk.errors import IngestApiError
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
+import threading
 import time
 from superdesk import get_resource_service
 import logging
@@ -11,6 +13,34 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket():
+    """
+    Rate limiter allowing ``rate`` requests per second on average, and bursts of up to ``capacity`` requests
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a request is allowed
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
 class PetrolSpyFuelHTTPFeedingService(HTTPFeedingService):
     label = 'Petrol Spy Fuel API Feed'
     NAME = 'petrol_spy_api_feed'
@@ -41,6 +71,30 @@ class PetrolSpyFuelHTTPFeedingService(HTTPFeedingService):
                 "E85": "E85",
                 "BIODIESEL": "BDSL"}
 
+    # The provider's request rate contract, a request every 2 seconds on average
+    requests_per_second = 0.5
+    # The number of requests in flight at once
+    fetch_threads = 4
+    # A slice returning this many servos may be truncated, so it is split in two, at most max_split_depth times
+    max_results = 500
+    max_split_depth = 4
+
+    def _get_slice(self, provider, bucket, latE, neLng, latW, swLng):
+        bucket.acquire()
+        path = '?neLat={}&neLng={}&swLat={}&swLng={}'.format(latE, neLng, latW, swLng)
+
+        response = requests.get(provider.get('config', {}).get('api_url') + path, headers=self.headers)
+        response.raise_for_status()
+
+        returned = json.loads(response.content.decode('UTF-8'))
+
+        if returned.get('header', {}).get('type') == 'error':
+            logger.error('Error response from Petrol Spy {}'.format(
+                returned.get('message', {}).get('error', {}).get('message')))
+
+        logger.info('latE: {} LatW: {} Size : {}'.format(latE, latW, returned.get('header', {}).get('size')))
+        return returned.get('message', {}).get('list', [])
+
     def _get_prices(self, provider, market):
         # Longitude remains constant, we make slices with the latitude
         neLng = market.get('neLng')
@@ -52,31 +106,39 @@ class PetrolSpyFuelHTTPFeedingService(HTTPFeedingService):
         # Thickness of the slice
         deltaLat = market.get('deltaLat')
 
-        latE = neLat
-        latW = neLat - deltaLat
-
-        servoList = []
-
-        while latE >= swLat:
-            path = '?neLat={}&neLng={}&swLat={}&swLng={}'.format(latE, neLng, latW, swLng)
-
-            response = requests.get(provider.get('config', {}).get('api_url') + path, headers=self.headers)
-            response.raise_for_status()
-
-            returned = json.loads(response.content.decode('UTF-8'))
-
-            if returned.get('header', {}).get('type') == 'error':
-                logger.error('Error response from Petrol Spy {}'.format(
-                    returned.get('message', {}).get('error', {}).get('message')))
-
-            latE = latE - deltaLat
-            latW = latW - deltaLat
-
-            logger.info('latE: {} LatW: {} Size : {}'.format(latE, latW, returned.get('header', {}).get('size')))
-            servoList = servoList + returned.get('message', {}).get('list', [])
-            time.sleep(2)
-
-        return servoList
+        bucket = TokenBucket(self.requests_per_second)
+        servos = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.fetch_threads) as executor:
+            def fetch(latE, latW, depth):
+                future = executor.submit(self._get_slice, provider, bucket, latE, neLng, latW, swLng)
+                pending[future] = (latE, latW, depth)
+
+            latE = neLat
+            while latE >= swLat:
+                fetch(latE, latE - deltaLat, 0)
+                latE = latE - deltaLat
+
+            try:
+                while pending:
+                    done, _not_done = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        latE, latW, depth = pending.pop(future)
+                        servoList = future.result()
+                        if len(servoList) >= self.max_results and depth < self.max_split_depth:
+                            fetch(latE, (latE + latW) / 2, depth + 1)
+                            fetch((latE + latW) / 2, latW, depth + 1)
+
+                        # Servos on the edge of two slices are returned by both
+                        for servo in servoList:
+                            location = servo.get('location') or {}
+                            servos.setdefault(servo.get('id') or (location.get('x'), location.get('y')), servo)
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        return list(servos.values())
 
     def _save(self, servos, market):
         service = get_resource_service('fuel')
@@ -104,11 +166,7 @@ class PetrolSpyFuelHTTPFeedingService(HTTPFeedingService):
                                    'price': servoEntry.get('prices').get(fuelType).get('amount')}
                     fuel_records.append(fuel_record)
 
-        if len(fuel_records):
-            # delete the old dataset for today
-            service.delete(lookup={'market': market.get('market'), 'sample_date': today})
-            # post the new ones
-            service.post(fuel_records)
+        service.save_prices(market.get('market'), today, fuel_records)
 
     def _update(self, provider, update):
         # Each update run will retrieve the data for a single "market"
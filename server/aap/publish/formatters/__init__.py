@@ -8,6 +8,8 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+from .vocabulary_snapshot import init_app as init_vocabulary_snapshot
+from .sms_messages import init_app as init_sms_messages
 import aap.publish.formatters.aap_ipnews_formatter  # NOQA
 import aap.publish.formatters.anpa_formatter  # NOQA
 import aap.publish.formatters.aap_bulletinbuilder_formatter  # NOQA
@@ -26,4 +28,9 @@ import aap.publish.formatters.agenda_planning_formatter  # NOQA
 import aap.publish.formatters.marketplace_ninjs_formatter  # NOQA
 import aap.publish.formatters.aap_apple_news_formatter  # NOQA
 import aap.publish.formatters.aap_newsroom_ninjs_formatter  # NOQA
-import aap.publish.formatters.kvh_newsml_1_2_formatter  # NOQA
\ No newline at end of file
+import aap.publish.formatters.kvh_newsml_1_2_formatter  # NOQA
+
+
+def init_app(app):
+    init_vocabulary_snapshot(app)
+    init_sms_messages(app)
@@ -24,6 +24,7 @@ from superdesk.text_utils import get_text
 from aap.text_utils import format_text_content
 from aap.utils import is_fact_check
 from aap.errors import AppleNewsError
+from aap.revision_history.service import get_revision, REVISION_STATES
 
 
 logger = logging.getLogger(__name__)
@@ -643,27 +644,7 @@ class AAPAppleNewsFormatter(Formatter):
 
         :param dict article:
         """
-        query = {
-            'query': {
-                'filtered': {
-                    'filter': {
-                        'bool': {
-                            'must': {
-                                'term': {'item_id': article.get('item_id')}
-                            }
-                        }
-                    }
-                }
-            },
-            'sort': [
-                {'versioncreated': {'order': 'asc'}}
-            ]
-        }
-
-        req = ParsedRequest()
-        repos = 'published,archived'
-        req.args = {'source': json.dumps(query), 'repo': repos, 'aggregations': 0}
-        revisions = list(get_resource_service('search').get(req=req, lookup=None))
+        revisions = self._get_revisions(article)
         revisions_tag = []
 
         for rev in revisions:
@@ -683,3 +664,55 @@ class AAPAppleNewsFormatter(Formatter):
                 revisions_tag.append('<li>{}</li>'.format(revision_markup))
 
         article['_revision_history'] = '<ul>{}</ul>' .format(''.join(revisions_tag)) if revisions_tag else ''
+
+    def _get_revisions(self, article):
+        """Get the published revisions of the article from the revision history
+
+        The history of an article published before the revisions were recorded is taken from the published and
+        archived items and recorded. The revision being formatted is added if it is not recorded yet.
+
+        :param dict article:
+        :return list: revisions in the order they were published
+        """
+        service = get_resource_service('revision_history')
+        item_id = article.get('item_id')
+        revisions = service.get_revisions(item_id)
+
+        if revisions is None:
+            revisions = self._search_revisions(item_id)
+            service.set_revisions(item_id, revisions)
+            return revisions
+
+        if article.get(ITEM_STATE) in REVISION_STATES and \
+                all(rev.get('version') != article.get(config.VERSION) for rev in revisions):
+            service.add_revision(article)
+            revisions.append(get_revision(article))
+        return revisions
+
+    def _search_revisions(self, item_id):
+        """Search the published and archived items for the published versions of the article
+
+        :param str item_id:
+        :return list: published versions of the article
+        """
+        query = {
+            'query': {
+                'filtered': {
+                    'filter': {
+                        'bool': {
+                            'must': {
+                                'term': {'item_id': item_id}
+                            }
+                        }
+                    }
+                }
+            },
+            'sort': [
+                {'versioncreated': {'order': 'asc'}}
+            ]
+        }
+
+        req = ParsedRequest()
+        repos = 'published,archived'
+        req.args = {'source': json.dumps(query), 'repo': repos, 'aggregations': 0}
+        return list(get_resource_service('search').get(req=req, lookup=None))
@@ -17,6 +17,7 @@ from mock import patch, MagicMock
 
 def get_data(resource):
     service_mock = MagicMock()
+    service_mock.get_revisions.return_value = None
     service_mock.get = MagicMock()
     service_mock.get.return_value = [
         {
@@ -135,6 +136,27 @@ class AAPAppleNewsFormatterTest(TestCase):
             '<li>Revision published Feb 16, 2018 00:45 AEDT</li></ul>'
         )
 
+    def test_revision_history_from_recorded_revisions(self):
+        service = MagicMock()
+        service.get_revisions.return_value = [
+            {
+                'version': 2,
+                'state': 'published',
+                'firstpublished': datetime(year=2018, month=2, day=15, hour=12, minute=30, second=0, tzinfo=pytz.UTC)
+            }
+        ]
+        article = self._get_article()
+        article.update({'state': 'corrected', '_current_version': 3, 'ednote': '<p>Fixed the verdict</p>'})
+        with patch('aap.publish.formatters.aap_apple_news_formatter.get_resource_service', return_value=service):
+            self.formatter._set_revision_history(article)
+        service.get.assert_not_called()
+        service.add_revision.assert_called_once_with(article)
+        self.assertEqual(
+            article.get('_revision_history'),
+            '<ul><li>First published Feb 15, 2018 23:30 AEDT</li>'
+            '<li>Revision published Feb 16, 2018 00:45 AEDT<br><i>Fixed the verdict</i></li></ul>'
+        )
+
     def test_format_article_raises_exception_if_abstract_missing(self):
         article = self._get_article()
         article['abstract'] = ''
@@ -19,10 +19,11 @@ from superdesk.metadata.item import ITEM_TYPE, ITEM_STATE, CONTENT_STATE, ASSOCI
 from .field_mappers.locator_mapper import LocatorMapper
 from .field_mappers.slugline_mapper import SluglineMapper
 from .aap_formatter_common import set_subject
-from .unicodetoascii import to_ascii
+from .unicodetoascii import to_ascii, TextNormaliser, CONTROL_CHARACTERS
+from .parsed_body import get_parsed_body
+from .identity_cache import identity_cache
 from copy import deepcopy
 import json
-from superdesk.etree import parse_html, etree
 
 
 class AAPBulletinBuilderFormatter(Formatter):
@@ -30,6 +31,9 @@ class AAPBulletinBuilderFormatter(Formatter):
     Bulletin Builder Formatter
     """
 
+    # remove control chars except \n, new lines are spaces
+    text_normaliser = TextNormaliser(replace={'\n': ' '}, strip=CONTROL_CHARACTERS + '\r')
+
     def format(self, article, subscriber, codes=None):
         """
         Formats the article as require by the subscriber
@@ -45,8 +49,8 @@ class AAPBulletinBuilderFormatter(Formatter):
             body_html = to_ascii(self.append_body_footer(formatted_article)).strip('\r\n')
 
             # get the desk name
-            desk_name = superdesk.get_resource_service('desks').\
-                get_desk_name(formatted_article.get('task', {}).get('desk'))
+            desk = identity_cache.get('desks', formatted_article.get('task', {}).get('desk'))
+            desk_name = (desk or {}).get('name') or ''
 
             # force the content to source 'NZN' if desk is 'NZN'
             if 'new zealand' in desk_name.lower().strip():
@@ -108,28 +112,19 @@ class AAPBulletinBuilderFormatter(Formatter):
 
     def get_text_content(self, content):
         content = content.replace('<br>', '<br/>').replace('</br>', '')
-        # remove control chars except \n
-        content = re.sub('[\x00-\x09\x0b-\x1f]', '', content)
-        # new lines are spaces
-        content = re.sub('[\n]', ' ', content)
+        content = self.text_normaliser(content)
         if content == '':
             return ''
 
-        parsed = parse_html(content, content='html', space_on_elements=True)
-
         # breaks are replaced with spaces
-        for br in parsed.xpath('//br'):
-            br.tail = ' ' + br.tail if br.tail else ' '
-        etree.strip_elements(parsed, 'br', with_tail=False)
+        parsed = get_parsed_body(content, line_break=' ', space_on_elements=True)
 
-        text = ''
-        for top_level_tag in parsed.xpath('/html/div/child::*'):
-            text += self.format_text_content(top_level_tag)
+        text = ''.join(self.format_text_content(paragraph.content) for paragraph in parsed.paragraphs)
 
         return re.sub(' +', ' ', text)
 
-    def format_text_content(self, tag):
-        para_text = ''.join(tag.itertext(with_tail=True)).strip().replace('\n', ' ').replace('\xa0', ' ')
+    def format_text_content(self, para_text):
+        para_text = para_text.strip().replace('\n', ' ').replace('\xa0', ' ')
         if para_text != '':
             return '{}\r\n\r\n'.format(para_text)
         else:
@@ -9,7 +9,10 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 import superdesk
+from eve.utils import config
+from flask import current_app as app
 from superdesk.metadata.item import Priority
+from .vocabulary_snapshot import vocabulary_snapshot
 
 
 def map_priority(priority):
@@ -42,15 +45,13 @@ def set_subject(category, article):
         # we have multiple categories and multiple subjects
         if len(article['subject']) > 1 and category:
             # we need to find a more relevant subject reference if possible
-            all_categories = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='categories')
-            ref_cat = [cat for cat in all_categories['items'] if
-                       cat['qcode'].upper() == category['qcode'].upper()]
+            ref_cat = vocabulary_snapshot.get_item('categories', category['qcode'])
             # check if there is an associated subject with the category
-            if ref_cat and len(ref_cat) == 1 and 'subject' in ref_cat[0]:
+            if ref_cat and 'subject' in ref_cat:
                 # try to find the lowest level subject that matches
                 ref = 0
                 for s in article['subject']:
-                    if s['qcode'][:2] == ref_cat[0]['subject'][:2]:
+                    if s['qcode'][:2] == ref_cat['subject'][:2]:
                         if int(s['qcode']) > ref:
                             ref = int(s['qcode'])
                 if ref > 0:
@@ -97,3 +98,48 @@ def get_copyrights_info(article, copyrights):
     if not copyright_info:
         return next((c for c in (copyrights or []) if c.get('name') == 'default'), {})
     return copyright_info
+
+
+def reserve_sequence_numbers(subscriber, count):
+    """Reserve a block of consecutive published sequence numbers for the subscriber
+
+    The block is reserved with a single increment of the subscriber sequence, numbers that pass the maximum of the
+    subscriber sequence wrap around to the minimum in the same way as ``generate_sequence_number``.
+
+    :param dict subscriber:
+    :param int count: number of sequence numbers to reserve
+    :return list: reserved sequence numbers in order of use
+    """
+    if count <= 0:
+        return []
+
+    if count == 1:
+        return [superdesk.get_resource_service('subscribers').generate_sequence_number(subscriber)]
+
+    min_seq_number = 1
+    max_seq_number = app.config['MAX_VALUE_OF_PUBLISH_SEQUENCE']
+    if subscriber.get('sequence_num_settings'):
+        min_seq_number = subscriber['sequence_num_settings']['min']
+        max_seq_number = subscriber['sequence_num_settings']['max']
+
+    # same key as used by SubscribersService.generate_sequence_number
+    key_name = 'subscribers_{_id})'.format(_id=subscriber[config.ID_FIELD])
+    sequences = superdesk.get_resource_service('sequences')
+    last = sequences.find_and_modify(
+        query={'key': key_name},
+        update={'$inc': {'sequence_number': count}},
+        upsert=True,
+        new=True
+    ).get('sequence_number')
+
+    numbers = list(range(last - count + 1, last + 1))
+    if max_seq_number and last > max_seq_number:
+        seq_range = max_seq_number - min_seq_number + 1
+        numbers = [n if n <= max_seq_number else min_seq_number + (n - max_seq_number - 1) % seq_range
+                   for n in numbers]
+        sequences.find_and_modify(
+            query={'key': key_name},
+            update={'$set': {'sequence_number': numbers[-1]}},
+            upsert=True)
+
+    return numbers
@@ -0,0 +1,29 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk import get_resource_service
+from superdesk.tests import TestCase
+
+from .aap_formatter_common import reserve_sequence_numbers
+
+
+class ReserveSequenceNumbersTest(TestCase):
+    subscriber = {'_id': '1', 'name': 'notes', 'sequence_num_settings': {'max': 10, 'min': 1}}
+
+    def test_reserve_block(self):
+        self.assertEqual(reserve_sequence_numbers(self.subscriber, 0), [])
+        self.assertEqual(reserve_sequence_numbers(self.subscriber, 3), [1, 2, 3])
+        self.assertEqual(reserve_sequence_numbers(self.subscriber, 1), [4])
+        self.assertEqual(get_resource_service('subscribers').generate_sequence_number(self.subscriber), 5)
+
+    def test_reserve_block_wraps_at_max(self):
+        reserve_sequence_numbers(self.subscriber, 8)
+        self.assertEqual(reserve_sequence_numbers(self.subscriber, 4), [9, 10, 1, 2])
+        self.assertEqual(reserve_sequence_numbers(self.subscriber, 2), [3, 4])
@@ -15,17 +15,20 @@ from superdesk.publish.formatters import Formatter
 from superdesk.errors import FormatterError
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, FORMAT, FORMATS
 import json
-from .unicodetoascii import to_ascii
-from copy import deepcopy
+from .unicodetoascii import to_ascii, TextNormaliser, CONTROL_CHARACTERS
 from .category_list_map import get_aap_category_list
-from .aap_formatter_common import get_service_level
-import re
-import textwrap
-from superdesk.etree import parse_html, etree
+from .aap_formatter_common import get_service_level, reserve_sequence_numbers
+from .parsed_body import get_parsed_body
+from .render_cache import render_cache
+from .article_view import ArticleView
+from .fixed_width import wrap_text
 from superdesk.text_utils import get_text
 
 
 class AAPIpNewsFormatter(Formatter, AAPODBCFormatter):
+    # remove control chars except \r and \n, x0e denotes a line break, and remove runs of spaces and stray line feeds
+    text_normaliser = TextNormaliser(replace={'\x0e': '\r\n'}, strip=CONTROL_CHARACTERS, collapse_whitespace=True)
+
     def __init__(self):
         self.format_type = 'AAP IPNEWS'
         self.output_field = 'article_text'
@@ -33,7 +36,7 @@ class AAPIpNewsFormatter(Formatter, AAPODBCFormatter):
         self.can_export = True
 
     def format(self, article, subscriber, codes=None):
-        formatted_article = deepcopy(article)
+        formatted_article = ArticleView(article)
         # Anyhting sourced as NZN is passed off as AAP
         mapped_source = formatted_article.get('source', '') if formatted_article.get('source', '') != 'NZN' else 'AAP'
 
@@ -44,76 +47,76 @@ class AAPIpNewsFormatter(Formatter, AAPODBCFormatter):
         :type article: object
         :return: returns the sequence number of the subscriber and the constructed parameter dictionary
         """
-        pass_through = article.get('auto_publish', False)
         try:
-            docs = []
-            for category in self._get_category_list(article.get('anpa_category')):
-                # All NZN sourced content is AAP content for the AAP output formatted
-                article['source'] = source
-                pub_seq_num, odbc_item = self.get_odbc_item(article, subscriber, category, codes, pass_through)
-
-                if article.get(FORMAT) == FORMATS.PRESERVED:  # @article_text
-                    body = get_text(self.append_body_footer(article))
-                    odbc_item['article_text'] = body.replace('\'', '\'\'')
-                    odbc_item['texttab'] = 't'
-                elif article.get(FORMAT, FORMATS.HTML) == FORMATS.HTML:
-                    body = self.get_wrapped_text_content(
-                        to_ascii(self.append_body_footer(article))).replace('\'', '\'\'')
-                    # if we have a dateline inject it
-                    if 'dateline' in article and 'text' in article.get('dateline', {}) and not pass_through:
-                        if body.startswith('   '):
-                            body = '   {} {}'.format(article.get('dateline')
-                                                     .get('text').replace('\'', '\'\''),
-                                                     body[3:])
-
-                    odbc_item['article_text'] = body
-                    odbc_item['texttab'] = 'x'
-
-                if not pass_through:
-                    self.add_ednote(odbc_item, article)
-                    self.add_byline(odbc_item, article)
-
-                odbc_item['article_text'] += '\r\n' + article.get('source', '')
-                sign_off = article.get('sign_off', '') or ''
-                if len(sign_off) > 0:
-                    odbc_item['article_text'] += ' ' + sign_off
-
-                odbc_item['service_level'] = get_service_level(category, article)  # @service_level
-                odbc_item['wordcount'] = article.get('word_count') or 0   # @wordcount
-                odbc_item['priority'] = map_priority(article.get('priority'))  # @priority
-
-                docs.append((pub_seq_num, json.dumps(odbc_item)))
-            return docs
+            cache_key = render_cache.get_key(self, article)
+            odbc_items = render_cache.get(cache_key)
+            if odbc_items is None:
+                odbc_items = self._render_odbc_items(article, source)
+                render_cache.set(cache_key, odbc_items)
+
+            sequence_numbers = reserve_sequence_numbers(subscriber, len(odbc_items))
+            return [(pub_seq_num, json.dumps(self.get_subscriber_odbc_item(odbc_item, pub_seq_num, codes)))
+                    for odbc_item, pub_seq_num in zip(odbc_items, sequence_numbers)]
         except Exception as ex:
             raise FormatterError.AAPIpNewsFormatterError(ex, subscriber)
 
+    def _render_odbc_items(self, article, source):
+        """Render the odbc item for each category, the sequence number and selector codes are set per subscriber
+        :param article:
+        :param source:
+        :return: list of odbc items
+        """
+        pass_through = article.get('auto_publish', False)
+        odbc_items = []
+        for category in self._get_category_list(article.get('anpa_category')):
+            # All NZN sourced content is AAP content for the AAP output formatted
+            article['source'] = source
+            _, odbc_item = self.get_odbc_item(article, None, category, None, pass_through, pub_seq_num=0)
+
+            if article.get(FORMAT) == FORMATS.PRESERVED:  # @article_text
+                body = get_text(self.append_body_footer(article))
+                odbc_item['article_text'] = body.replace('\'', '\'\'')
+                odbc_item['texttab'] = 't'
+            elif article.get(FORMAT, FORMATS.HTML) == FORMATS.HTML:
+                body = self.get_wrapped_text_content(
+                    to_ascii(self.append_body_footer(article))).replace('\'', '\'\'')
+                # if we have a dateline inject it
+                if 'dateline' in article and 'text' in article.get('dateline', {}) and not pass_through:
+                    if body.startswith('   '):
+                        body = '   {} {}'.format(article.get('dateline')
+                                                 .get('text').replace('\'', '\'\''),
+                                                 body[3:])
+
+                odbc_item['article_text'] = body
+                odbc_item['texttab'] = 'x'
+
+            if not pass_through:
+                self.add_ednote(odbc_item, article)
+                self.add_byline(odbc_item, article)
+
+            odbc_item['article_text'] += '\r\n' + article.get('source', '')
+            sign_off = article.get('sign_off', '') or ''
+            if len(sign_off) > 0:
+                odbc_item['article_text'] += ' ' + sign_off
+
+            odbc_item['service_level'] = get_service_level(category, article)  # @service_level
+            odbc_item['wordcount'] = article.get('word_count') or 0   # @wordcount
+            odbc_item['priority'] = map_priority(article.get('priority'))  # @priority
+
+            odbc_items.append(odbc_item)
+        return odbc_items
+
     def get_wrapped_text_content(self, content):
         """Get a version of the body text that is wrapped
         :param content:
         :return:
         """
-        text = ''
         content = content.replace('<br>', '<br/>').replace('</br>', '')
-        # remove control chars except \r and \n
-        content = re.sub('[\x00-\x09\x0b\x0c\x0f-\x1f]', '', content)
-        # Special case x0e denotes a line break
-        content = re.sub('\x0e', '\r\n', content)
-        # remove runs of spaces and stray line feeds
-        content = re.sub(r' +', ' ', re.sub(r'(?<!\r)\n+', ' ', content).strip())
+        content = self.text_normaliser(content).strip()
 
-        parsed = parse_html(content, content='html')
+        parsed = get_parsed_body(content)
 
-        for br in parsed.xpath('//br'):
-            br.tail = '\r\n' + br.tail if br.tail else '\r\n'
-        etree.strip_elements(parsed, 'br', with_tail=False)
-
-        for tag in parsed.xpath('/html/div/child::*'):
-            ptext = ''
-            for x in tag.itertext():
-                ptext += x
-            text += self.format_wrapped_text_content(ptext)
-
-        return text
+        return ''.join(self.format_wrapped_text_content(paragraph.content) for paragraph in parsed.paragraphs)
 
     def format_wrapped_text_content(self, para_text):
         if para_text is None:
@@ -121,16 +124,8 @@ class AAPIpNewsFormatter(Formatter, AAPODBCFormatter):
         if para_text == '\r\n':
             return '\r\n'
 
-        wrapped_text = ''
-        # for each line in the paragraph we may need to wrap
-        for line in para_text.split('\n'):
-            # Wrap line if to long
-            if len(line) > 80:
-                line = textwrap.fill(line, 80)
-                wrapped_text += line.replace('\n', ' \r\n')
-            else:
-                wrapped_text += '{}\n'.format(line) if line.endswith('\r') else line
-
+        # wrap each line in the paragraph that is to long
+        wrapped_text = wrap_text(para_text, 80)
         wrapped_text = wrapped_text.strip()
         # inject the paragarph mark
         if wrapped_text != '':
@@ -11,64 +11,87 @@ from superdesk.publish.formatters import Formatter
 from superdesk.errors import FormatterError
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, FORMAT, FORMATS
 from .aap_odbc_formatter import AAPODBCFormatter
-import re
 import json
-from .unicodetoascii import to_ascii
-from copy import deepcopy
+from .unicodetoascii import to_ascii, collapse_whitespace, TextNormaliser, CONTROL_CHARACTERS
 from .category_list_map import get_aap_category_list
-from superdesk.etree import parse_html, etree
+from .aap_formatter_common import reserve_sequence_numbers
+from .parsed_body import get_parsed_body
+from .render_cache import render_cache
+from .article_view import ArticleView
 from superdesk.text_utils import get_text
 
 
 class AAPNewscentreFormatter(Formatter, AAPODBCFormatter):
+    # remove control chars except \r and \n
+    text_normaliser = TextNormaliser(strip=CONTROL_CHARACTERS)
+
     def format(self, article, subscriber, codes=None):
         """
         Constructs a dictionary that represents the parameters passed to the IPNews InsertNews stored procedure
         :return: returns the sequence number of the subscriber and the constructed parameter dictionary
         """
-        formatted_article = deepcopy(article)
+        formatted_article = ArticleView(article)
         mapped_source = formatted_article.get('source', '') if formatted_article.get('source', '') != 'NZN' else 'AAP'
 
         return self.format_for_source(formatted_article, subscriber, mapped_source, codes)
 
     def format_for_source(self, article, subscriber, source, codes=None):
         try:
-            pass_through = article.get('auto_publish', False)
-            docs = []
-            for category in self._get_category_list(article.get('anpa_category')):
-                article['source'] = source
-                pub_seq_num, odbc_item = self.get_odbc_item(article, subscriber, category, codes, pass_through)
-                if article.get(FORMAT) == FORMATS.PRESERVED:  # @article_text
-                    body = get_text(self.append_body_footer(article), content='html')
-                    odbc_item['article_text'] = body.replace('\'', '\'\'')
-                else:
-                    body = self.get_text_content(
-                        to_ascii(self.append_body_footer(article)))
-
-                    if 'dateline' in article \
-                            and 'text' in article.get('dateline', {}) and not pass_through:
-                        if body.startswith('   '):
-                            body = '   {} {}'.format(article.get('dateline').get('text'), body[3:])
-                    odbc_item['article_text'] = body.replace('\'', '\'\'')
-
-                if not pass_through:
-                    self.add_ednote(odbc_item, article)
-                    self.add_byline(odbc_item, article)
-
-                odbc_item['article_text'] += '\r\n' + source
-                sign_off = article.get('sign_off', '') or ''
-                if len(sign_off) > 0:
-                    odbc_item['article_text'] += ' ' + sign_off
-
-                odbc_item['category'] = odbc_item.get('category', '').upper()
-                odbc_item['selector_codes'] = odbc_item.get('selector_codes', '').upper()
-
-                docs.append((pub_seq_num, json.dumps(odbc_item)))
-
-            return docs
+            cache_key = render_cache.get_key(self, article)
+            odbc_items = render_cache.get(cache_key)
+            if odbc_items is None:
+                odbc_items = self._render_odbc_items(article, source)
+                render_cache.set(cache_key, odbc_items)
+
+            sequence_numbers = reserve_sequence_numbers(subscriber, len(odbc_items))
+            return [(pub_seq_num, json.dumps(self.get_subscriber_odbc_item(odbc_item, pub_seq_num, codes)))
+                    for odbc_item, pub_seq_num in zip(odbc_items, sequence_numbers)]
         except Exception as ex:
             raise FormatterError.AAPNewscentreFormatterError(ex, subscriber)
 
+    def _render_odbc_items(self, article, source):
+        """
+        Render the odbc item for each category, the sequence number and selector codes are set per subscriber
+        :param article:
+        :param source:
+        :return: list of odbc items
+        """
+        pass_through = article.get('auto_publish', False)
+        odbc_items = []
+        for category in self._get_category_list(article.get('anpa_category')):
+            article['source'] = source
+            _, odbc_item = self.get_odbc_item(article, None, category, None, pass_through, pub_seq_num=0)
+            if article.get(FORMAT) == FORMATS.PRESERVED:  # @article_text
+                body = get_text(self.append_body_footer(article), content='html')
+                odbc_item['article_text'] = body.replace('\'', '\'\'')
+            else:
+                body = self.get_text_content(
+                    to_ascii(self.append_body_footer(article)))
+
+                if 'dateline' in article \
+                        and 'text' in article.get('dateline', {}) and not pass_through:
+                    if body.startswith('   '):
+                        body = '   {} {}'.format(article.get('dateline').get('text'), body[3:])
+                odbc_item['article_text'] = body.replace('\'', '\'\'')
+
+            if not pass_through:
+                self.add_ednote(odbc_item, article)
+                self.add_byline(odbc_item, article)
+
+            odbc_item['article_text'] += '\r\n' + source
+            sign_off = article.get('sign_off', '') or ''
+            if len(sign_off) > 0:
+                odbc_item['article_text'] += ' ' + sign_off
+
+            odbc_item['category'] = odbc_item.get('category', '').upper()
+
+            odbc_items.append(odbc_item)
+
+        return odbc_items
+
+    def get_selector_codes(self, codes):
+        return super().get_selector_codes(codes).upper()
+
     def add_byline(self, odbc_item, article):
         """
         Add the byline to the article text
@@ -87,24 +110,12 @@ class AAPNewscentreFormatter(Formatter, AAPODBCFormatter):
         return get_aap_category_list(category_list)
 
     def get_text_content(self, content):
-        text = ''
         content = content.replace('<br>', '<br/>').replace('</br>', '')
-        content = re.sub(' +', ' ', re.sub('(?<!\r)\n+', ' ', content).strip())
-        content = re.sub('[\x00-\x09\x0b\x0c\x0e-\x1f]', '', content)
-
-        parsed = parse_html(content, content='html')
-
-        for br in parsed.xpath('//br'):
-            br.tail = '\r\n' + br.tail if br.tail else '\r\n'
-        etree.strip_elements(parsed, 'br', with_tail=False)
+        content = self.text_normaliser(collapse_whitespace(content).strip())
 
-        for tag in parsed.xpath('/html/div/child::*'):
-            ptext = ''
-            for x in tag.itertext():
-                ptext += x
-            text += self.format_text_content(ptext)
+        parsed = get_parsed_body(content)
 
-        return text
+        return ''.join(self.format_text_content(paragraph.content) for paragraph in parsed.paragraphs)
 
     def format_text_content(self, para_text):
 
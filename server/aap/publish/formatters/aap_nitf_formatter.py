@@ -15,6 +15,7 @@ from lxml import etree as etree
 from lxml.etree import SubElement
 import re
 from .unicodetoascii import to_ascii
+from .identity_cache import identity_cache
 from superdesk.etree import parse_html, to_string
 from superdesk.text_utils import get_text
 
@@ -51,21 +52,19 @@ class AAPNITFFormatter(NITFFormatter):
         if article.get('anpa_take_key'):
             SubElement(head, 'meta', {'name': 'anpa-takekey', 'content': article.get('anpa_take_key', '')})
 
-        original_creator = superdesk.get_resource_service('users').find_one(req=None,
-                                                                            _id=article.get('original_creator', ''))
+        identity_cache.prefetch([article])
+        original_creator = identity_cache.get('users', article.get('original_creator', ''))
         if original_creator:
             SubElement(head, 'meta', {'name': 'aap-original-creator', 'content': original_creator.get('username')})
-        version_creator = superdesk.get_resource_service('users').find_one(req=None,
-                                                                           _id=article.get('version_creator', ''))
+        version_creator = identity_cache.get('users', article.get('version_creator', ''))
         if version_creator:
             SubElement(head, 'meta', {'name': 'aap-version-creator', 'content': version_creator.get('username')})
 
         if article.get('task', {}).get('desk') is not None:
-            desk = superdesk.get_resource_service('desks').find_one(_id=article.get('task', {}).get('desk'), req=None)
+            desk = identity_cache.get('desks', article.get('task', {}).get('desk'))
             SubElement(head, 'meta', {'name': 'aap-desk', 'content': desk.get('name', '')})
         if article.get('task', {}).get('stage') is not None:
-            stage = superdesk.get_resource_service('stages').find_one(_id=article.get('task', {}).get('stage'),
-                                                                      req=None)
+            stage = identity_cache.get('stages', article.get('task', {}).get('stage'))
             if stage is not None:
                 SubElement(head, 'meta', {'name': 'aap-stage', 'content': stage.get('name', '')})
 
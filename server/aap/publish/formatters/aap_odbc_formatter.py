@@ -17,7 +17,7 @@ from superdesk.text_utils import get_text
 
 
 class AAPODBCFormatter():
-    def get_odbc_item(self, article, subscriber, category, codes, pass_through=False):
+    def get_odbc_item(self, article, subscriber, category, codes, pass_through=False, pub_seq_num=None):
         """
         Construct an odbc_item with the common key value pairs populated, if pass_through is true then the headline
         original headline is maintained.
@@ -26,10 +26,12 @@ class AAPODBCFormatter():
         :param category:
         :param codes:
         :param pass_through:
+        :param pub_seq_num: sequence number reserved by the caller, if None a new one is generated
         :return:
         """
         article['headline'] = get_text(article.get('headline', ''), content='html')
-        pub_seq_num = superdesk.get_resource_service('subscribers').generate_sequence_number(subscriber)
+        if pub_seq_num is None:
+            pub_seq_num = superdesk.get_resource_service('subscribers').generate_sequence_number(subscriber)
         odbc_item = dict(originator=article.get('source', None), sequence=pub_seq_num,
                          category=category.get('qcode').lower(),
                          author=get_text(article.get('byline', '') or '', content='html').replace('\'', '\'\''),
@@ -46,7 +48,7 @@ class AAPODBCFormatter():
         odbc_item['news_item_type'] = 'News'
         odbc_item['fullStory'] = 1
         odbc_item['ident'] = '0'  # @ident
-        odbc_item['selector_codes'] = ' '.join(codes) if codes else ' '
+        odbc_item['selector_codes'] = self.get_selector_codes(codes)
 
         headline = to_ascii(LocatorMapper().get_formatted_headline(article, category.get('qcode').upper()))
         odbc_item['headline'] = headline.replace('\'', '\'\'').replace('\xA0', ' ')
@@ -56,6 +58,27 @@ class AAPODBCFormatter():
 
         return pub_seq_num, odbc_item
 
+    def get_selector_codes(self, codes):
+        """
+        Get the selector codes of the subscriber as passed to the stored procedure
+        :param codes:
+        :return:
+        """
+        return ' '.join(codes) if codes else ' '
+
+    def get_subscriber_odbc_item(self, odbc_item, pub_seq_num, codes):
+        """
+        Get a copy of the rendered odbc item with the sequence number and selector codes of the subscriber
+        :param odbc_item:
+        :param pub_seq_num:
+        :param codes:
+        :return:
+        """
+        subscriber_item = dict(odbc_item)
+        subscriber_item['sequence'] = pub_seq_num
+        subscriber_item['selector_codes'] = self.get_selector_codes(codes)
+        return subscriber_item
+
     def add_ednote(self, odbc_item, article):
         """
         Add the editorial note if required
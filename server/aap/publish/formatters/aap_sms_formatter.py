@@ -8,8 +8,9 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 import json
+import logging
 import superdesk
-from eve.utils import ParsedRequest
+from eve.utils import config
 from superdesk.publish.formatters import Formatter
 from .aap_formatter_common import map_priority
 from superdesk.errors import FormatterError
@@ -17,6 +18,8 @@ from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, CONTENT_STATE, ITEM
 from superdesk.text_utils import get_text
 from .unicodetoascii import to_ascii
 
+logger = logging.getLogger(__name__)
+
 
 class AAPSMSFormatter(Formatter):
     def format(self, article, subscriber, codes=None):
@@ -24,9 +27,15 @@ class AAPSMSFormatter(Formatter):
         Constructs a dictionary that represents the parameters passed to the SMS InsertAlerts stored procedure
         :return: returns the sequence number of the subscriber and the constructed parameter dictionary
         """
+        sms_message = article.get('sms_message', article.get('abstract', ''))
+        # the message is recorded when it is queued, a story with the same message queued since is not sent
+        if not superdesk.get_resource_service('sms_messages').reserve(
+                sms_message, article.get('item_id', article.get(config.ID_FIELD)), article.get(config.VERSION)):
+            logger.warning('SMS message of {} has already been sent'.format(article.get(config.ID_FIELD)))
+            return []
+
         try:
             pub_seq_num = superdesk.get_resource_service('subscribers').generate_sequence_number(subscriber)
-            sms_message = article.get('sms_message', article.get('abstract', ''))
 
             # category = 1 is used to indicate a test message
             category = '1' if superdesk.app.config.get('TEST_SMS_OUTPUT', True) is True \
@@ -53,23 +62,10 @@ class AAPSMSFormatter(Formatter):
                 or article.get(ITEM_STATE, '') in {CONTENT_STATE.KILLED, CONTENT_STATE.RECALLED} \
                 or not article.get('flags', {}).get('marked_for_sms', False):
             return False
-        # need to check that a story with the same sms_message has not been published to SMS before
-        query = {"query": {
-            "filtered": {
-                "filter": {
-                    "and": [
-                        {"term": {"state": CONTENT_STATE.PUBLISHED}},
-                        {"term": {"sms_message": article.get('sms_message', article.get('abstract', ''))}},
-                        {"term": {"flags.marked_for_sms": True}},
-                        {"not": {"term": {"queue_state": "in_progress"}}}
-                    ]
-                }
-            }
-        }
-        }
-        req = ParsedRequest()
-        req.args = {'source': json.dumps(query)}
-        published = superdesk.get_resource_service('published').get(req=req, lookup=None)
-        if published and published.count():
-            return False
-        return article.get('flags', {}).get('marked_for_sms', False)
+        # need to check that a story with the same sms_message has not been published to SMS before, the check is
+        # read only as it is also made for previews
+        return superdesk.get_resource_service('sms_messages').can_send(
+            article.get('sms_message', article.get('abstract', '')),
+            article.get('item_id', article.get(config.ID_FIELD)),
+            article.get(config.VERSION)
+        )
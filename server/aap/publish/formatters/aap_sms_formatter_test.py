@@ -11,9 +11,11 @@
 import json
 
 from apps.publish import init_app
+from superdesk import get_resource_service
 from superdesk.tests import TestCase
 
 from .aap_sms_formatter import AAPSMSFormatter
+from .sms_messages import init_app as init_sms_messages
 
 
 class AapSMSFormatterTest(TestCase):
@@ -74,13 +76,11 @@ class AapSMSFormatterTest(TestCase):
         'body_footer': 'call helpline 999 if you are planning to quit smoking'
     }
 
-    published = [{"_id": 1, "state": "published", "sms_message": "dont send again", "flags": {"marked_for_sms": True},
-                  "queue_state": "queued"}]
-
     def setUp(self):
         self.app.data.insert('subscribers', self.subscribers)
-        self.app.data.insert('published', self.published)
         init_app(self.app)
+        init_sms_messages(self.app)
+        get_resource_service('sms_messages').reserve('dont send again', 1, 1)
         self.app.config['TEST_SMS_OUTPUT'] = False
 
     def test_sms_can_format(self):
@@ -94,6 +94,33 @@ class AapSMSFormatterTest(TestCase):
         f = AAPSMSFormatter()
         self.assertFalse(f.can_format("AAP SMS", self.article3))
 
+    def test_send_once_per_item_version(self):
+        f = AAPSMSFormatter()
+        subscriber = self.app.data.find('subscribers', None, None)[0]
+        article = dict(self.article2, _id='urn:1', _current_version=2, sms_message='new message',
+                       flags={'marked_for_sms': True})
+        self.assertTrue(f.can_format("AAP SMS", article))
+        self.assertEqual(len(f.format(article, subscriber)), 1)
+        # other subscribers of the same version
+        self.assertTrue(f.can_format("AAP SMS", article))
+        self.assertEqual(len(f.format(article, subscriber)), 1)
+        # a correction or another story with the same message
+        self.assertFalse(f.can_format("AAP SMS", dict(article, _current_version=3)))
+        self.assertFalse(f.can_format("AAP SMS", dict(article, _id='urn:2')))
+        self.assertEqual(f.format(dict(article, _id='urn:2'), subscriber), [])
+
+    def test_preview_does_not_reserve(self):
+        f = AAPSMSFormatter()
+        subscriber = self.app.data.find('subscribers', None, None)[0]
+        draft = dict(self.article2, _id='urn:1', _current_version=1, sms_message='previewed message',
+                     flags={'marked_for_sms': True})
+        self.assertTrue(f.can_format("AAP SMS", draft))
+
+        published = dict(draft, _current_version=2, state='published')
+        self.assertTrue(f.can_format("AAP SMS", published))
+        self.assertEqual(len(f.format(published, subscriber)), 1)
+        self.assertFalse(f.can_format("AAP SMS", dict(draft, _id='urn:2')))
+
     def test_sms_formatter(self):
         subscriber = self.app.data.find('subscribers', None, None)[0]
 
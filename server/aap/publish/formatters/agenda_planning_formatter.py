@@ -13,6 +13,7 @@ import superdesk
 from superdesk.publish.formatters import Formatter
 from superdesk.utils import json_serialize_datetime_objectId
 from superdesk.utc import utc_to_local
+from aap.agenda.map_index import AgendaMapIndex
 from copy import deepcopy
 
 
@@ -20,6 +21,9 @@ class AgendaPlanningFormatter(Formatter):
     def __init__(self):
         self.can_preview = False
         self.can_export = False
+        self.city_map = AgendaMapIndex('agenda_city_map', ('country_id', 'name'))
+        self.iptc_map = AgendaMapIndex('agenda_iptc_map', ('iptc_code',))
+        self.country_map = AgendaMapIndex('agenda_country_map', ('name',))
 
     # select '''' + lower(Code) + ''': ' + CONVERT(varchar(10), IDCategory) + ',' from tbl_AGN_Category
     category_map = {'courts': 1, 'entertainment': 2, 'finance': 3, 'national': 4, 'sport': 5, 'world': 6,
@@ -156,10 +160,11 @@ class AgendaPlanningFormatter(Formatter):
         agenda_event['Country'] = {'ID': 16}
         agenda_event['City'] = {'ID': 106}
 
-    def _format_event(self, item):
+    def _format_event(self, item, plannings=None):
         """
         Format the passed event item for Agenda
         :param item:
+        :param plannings: planning items of the event, if they have been read already
         :return:
         """
         agenda_event = dict()
@@ -253,7 +258,8 @@ class AgendaPlanningFormatter(Formatter):
 
         # track down any associated planning and coverage
         coverages = []
-        plannings = superdesk.get_resource_service('events').get_plannings_for_event(item)
+        if plannings is None:
+            plannings = superdesk.get_resource_service('events').get_plannings_for_event(item)
         for planning in plannings:
             # Only include the coverages if the planning item is published
             if planning.get('pubstatus') == 'usable':
@@ -409,10 +415,11 @@ class AgendaPlanningFormatter(Formatter):
                 agenda_event = self._format_planning(format_item)
         else:
             # not published to agenda before
+            plannings = None
             if not agenda_id:
                 # Check if the event has a published child planning item, the id of that is promoted to the event
                 service = superdesk.get_resource_service('events')
-                plannings = service.get_plannings_for_event(format_item)
+                plannings = list(service.get_plannings_for_event(format_item))
                 for planning in plannings:
                     if planning.get('unique_id'):
                         agenda_id = planning.get('unique_id')
@@ -422,7 +429,7 @@ class AgendaPlanningFormatter(Formatter):
                     # item.
                     service.system_update(format_item.get('_id'), {'unique_id': agenda_id}, format_item)
 
-            agenda_event = self._format_event(format_item)
+            agenda_event = self._format_event(format_item, plannings)
 
         agenda_event['Type'] = format_item.get('type')
         agenda_event['ExternalIdentifier'] = format_item.get('_id')
@@ -433,14 +440,11 @@ class AgendaPlanningFormatter(Formatter):
         return [(pub_seq_num, json.dumps(agenda_event, default=json_serialize_datetime_objectId))]
 
     def _get_city_id(self, location, country=16):
-        service = superdesk.get_resource_service('agenda_city_map')
-        entry = service.find({'country_id': int(country), 'name': location.get('address', {}).get('locality', '')})
-        if not entry or entry.count() <= 0:
-            entry = service.find({'country_id': int(country), 'name': location.get('address', {}).get('area', '')})
-        if not entry or entry.count() <= 0:
-            entry = service.find({'country_id': int(country), 'name': location.get('address', {}).get('name', '')})
-        if entry:
-            return entry.next().get('agenda_id') if entry.count() > 0 else None
+        address = location.get('address', {})
+        for name in (address.get('locality', ''), address.get('area', ''), address.get('name', '')):
+            city_id = self.city_map.get(int(country), name)
+            if city_id is not None:
+                return city_id
         return None
 
     def _set_city(self, agenda_event, location, country=16):
@@ -459,15 +463,8 @@ class AgendaPlanningFormatter(Formatter):
             agenda_event['City'] = {'ID': city_id}
 
     def _get_iptc_id(self, lookup_code):
-        service = superdesk.get_resource_service('agenda_iptc_map')
-        entry = service.find({'iptc_code': lookup_code})
-        if entry and entry.count() > 0:
-            return entry.next().get('agenda_id') if entry else None
-        return None
+        return self.iptc_map.get(lookup_code)
 
     def _get_country_id(self, country):
-        service = superdesk.get_resource_service('agenda_country_map')
-        entry = service.find({'name': country})
-        if entry and entry.count() > 0:
-            return entry.next().get('agenda_id') if entry else None
-        return 16
+        agenda_id = self.country_map.get(country)
+        return agenda_id if agenda_id is not None else 16
@@ -11,12 +11,15 @@
 from datetime import datetime
 
 import io
+from unittest import mock
+
 from apps.publish import init_app
 from superdesk.publish.subscribers import SUBSCRIBER_TYPES
 from superdesk.tests import TestCase
 
 from .aap_formatter_common import map_priority
 from .anpa_formatter import AAPAnpaFormatter
+from .render_cache import render_cache
 
 
 class ANPAFormatterTest(TestCase):
@@ -101,6 +104,41 @@ class ANPAFormatterTest(TestCase):
         line = lines.readline()
         self.assertEqual(line.strip(), 'AAP')
 
+    def test_render_cache(self):
+        self.app.config['FORMATTER_RENDER_CACHE'] = True
+        self.addCleanup(render_cache.clear)
+        self.app.data.insert('subscribers', [{'_id': '2', 'name': 'other', 'subscriber_type': SUBSCRIBER_TYPES.WIRE,
+                                              'media_type': 'media', 'is_active': True,
+                                              'sequence_num_settings': {'max': 999, 'min': 500}}])
+        subscriber1 = self.app.data.find_one('subscribers', None, _id='1')
+        subscriber2 = self.app.data.find_one('subscribers', None, _id='2')
+        article = dict(self.article, item_id='urn:render-cache', _current_version=1)
+
+        def get_lines(resp):
+            return io.StringIO(resp['encoded_item'].decode()).readlines()
+
+        f = AAPAnpaFormatter()
+        with mock.patch.object(AAPAnpaFormatter, '_render', side_effect=f._render) as render:
+            resp1 = f.format(article.copy(), subscriber1, ['axx'])[0]
+            resp2 = f.format(article.copy(), subscriber2, ['bzz', 'bxx'])[0]
+            self.assertEqual(render.call_count, 1)
+
+            # the cached output carries the sequence number and the selector codes of the subscriber
+            self.assertLessEqual(int(resp1['published_seq_num']), 10)
+            self.assertGreaterEqual(int(resp2['published_seq_num']), 500)
+            lines1, lines2 = get_lines(resp1), get_lines(resp2)
+            self.assertEqual(lines1[0], '\x05axx\r\n')
+            self.assertEqual(lines2[0], '\x05bzz bxx\r\n')
+            self.assertTrue(lines1[1].endswith(str(int(resp1['published_seq_num'])).zfill(4) + '\n'))
+            self.assertTrue(lines2[1].endswith(str(int(resp2['published_seq_num'])).zfill(4) + '\n'))
+            self.assertEqual(lines1[2:6], lines2[2:6])
+
+            # a new version is rendered again
+            resp3 = f.format(dict(article, _current_version=2, headline='A corrected headline'), subscriber2)[0]
+            self.assertEqual(render.call_count, 2)
+            self.assertIn('A corrected headline', resp3['formatted_item'])
+            self.assertNotIn('\x05', resp3['formatted_item'])
+
     def testANPAWithNoSelectorsFormatter(self):
         subscriber = self.app.data.find('subscribers', None, None)[0]
         subscriber['name'] = 'not notes'
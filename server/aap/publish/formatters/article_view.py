@@ -0,0 +1,78 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from collections.abc import MutableMapping
+
+_missing = object()
+
+
+class ArticleView(MutableMapping):
+    """Copy on write view of an article.
+
+    Reads fall through to the original article, top level writes and deletes are recorded in the view and never
+    reach the original. It replaces the ``deepcopy`` of the article in formatters that only rewrite top level fields
+    like the headline, source or ``_id``, so associations and renditions are not copied for each subscriber.
+
+    Nested values are shared with the original, they must be replaced rather than modified in place.
+    """
+
+    __slots__ = ('_article', '_updates', '_deleted')
+
+    def __init__(self, article, **updates):
+        self._article = article
+        self._updates = updates
+        self._deleted = set()
+
+    @property
+    def updates(self):
+        """The fields written to the view"""
+        return dict(self._updates)
+
+    def __getitem__(self, key):
+        value = self._updates.get(key, _missing)
+        if value is not _missing:
+            return value
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._article[key]
+
+    def get(self, key, default=None):
+        value = self._updates.get(key, _missing)
+        if value is not _missing:
+            return value
+        if key in self._deleted:
+            return default
+        return self._article.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._updates or (key not in self._deleted and key in self._article)
+
+    def __setitem__(self, key, value):
+        self._updates[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._updates.pop(key, None)
+        if key in self._article:
+            self._deleted.add(key)
+
+    def __iter__(self):
+        yield from self._updates
+        for key in self._article:
+            if key not in self._updates and key not in self._deleted:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({!r}, updates={!r})'.format(type(self).__name__, self._article.get('_id'), self._updates)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import TestCase
+
+from .article_view import ArticleView
+
+
+class ArticleViewTest(TestCase):
+    def setUp(self):
+        self.article = {'_id': 'urn:1', 'item_id': 'urn:1', 'headline': '<b>Headline</b>', 'source': 'NZN',
+                        'associations': {'featuremedia': {'renditions': {}}}}
+
+    def test_writes_do_not_reach_the_article(self):
+        view = ArticleView(self.article)
+        view['headline'] = 'Headline'
+        view['source'] = 'AAP'
+        self.assertEqual(view['headline'], 'Headline')
+        self.assertEqual(view.get('source'), 'AAP')
+        self.assertEqual(self.article['headline'], '<b>Headline</b>')
+        self.assertEqual(self.article['source'], 'NZN')
+        self.assertEqual(view.updates, {'headline': 'Headline', 'source': 'AAP'})
+
+    def test_reads_fall_through(self):
+        view = ArticleView(self.article, guid='tag:1')
+        self.assertIs(view['associations'], self.article['associations'])
+        self.assertEqual(view.get('guid'), 'tag:1')
+        self.assertIsNone(view.get('body_html'))
+        self.assertIn('item_id', view)
+        self.assertEqual(len(view), 6)
+        self.assertEqual(dict(view)['guid'], 'tag:1')
+
+    def test_delete(self):
+        view = ArticleView(self.article)
+        del view['source']
+        self.assertNotIn('source', view)
+        self.assertIsNone(view.get('source'))
+        self.assertIn('source', self.article)
+        with self.assertRaises(KeyError):
+            view['source']
+        view['source'] = 'AAP'
+        self.assertEqual(view['source'], 'AAP')
@@ -9,7 +9,7 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 
-import superdesk
+from .vocabulary_snapshot import vocabulary_snapshot
 
 
 def get_aap_category_list(category_list):
@@ -18,16 +18,13 @@ def get_aap_category_list(category_list):
     :param category_list:
     :return: category list with N replaced with I
     """
-    all_categories = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='categories')
     list = []
     for c in category_list:
         if c.get('qcode').upper() == 'N' and not any(e.get('qcode', None) == 'I' for e in list):
-            list.append(next((x for x in all_categories['items'] if x.get('qcode').upper() == 'I'), None))
+            list.append(vocabulary_snapshot.get_item('categories', 'I'))
         else:
             if not any(e.get('qcode', None) == c.get('qcode').upper() for e in list):
-                list.append(
-                    next((x for x in all_categories['items'] if x.get('qcode').upper() == c.get('qcode').upper()),
-                         None))
+                list.append(vocabulary_snapshot.get_item('categories', c.get('qcode')))
     return list
 
 
@@ -38,15 +35,14 @@ def get_nzn_category_list(category_list):
     :param category_list:
     :return category_list:
     """
-    all_categories = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='categories')
     list = []
     for c in category_list:
         keep_set = {'S', 'T', 'F', 'I'}
         for k in keep_set:
             if c.get('qcode').upper() == k and not any(e.get('qcode', None) == k for e in list):
-                list.append(next((x for x in all_categories['items'] if x.get('qcode').upper() == k), None))
+                list.append(vocabulary_snapshot.get_item('categories', k))
 
         if c.get('qcode').upper() not in keep_set \
                 and not any(e.get('qcode', None) == 'N' for e in list):
-            list.append(next((x for x in all_categories['items'] if x.get('qcode').upper() == 'N'), None))
+            list.append(vocabulary_snapshot.get_item('categories', 'N'))
     return list
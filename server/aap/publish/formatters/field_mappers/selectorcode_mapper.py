@@ -9,12 +9,33 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 from . import FieldMapper
-import superdesk
+from ..vocabulary_snapshot import vocabulary_snapshot
+from ..identity_cache import identity_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def compile_selector_codes(selector_codes):
+    """Compile the selector codes of each distribution group and subscriber into an integer bitset
+
+    :param dict selector_codes: space separated selector codes by distribution group and subscriber
+    :return: tuple of the list of the selector codes, the bit of each code is its index in the list, and the bitsets
+        by distribution group and subscriber
+    """
+    codes = sorted({code for subscribers in selector_codes.values() for value in subscribers.values()
+                    for code in value.split()})
+    bits = {code: 1 << index for index, code in enumerate(codes)}
+    masks = {}
+    for dist_group, subscribers in selector_codes.items():
+        for subscriber, value in subscribers.items():
+            mask = 0
+            for code in value.split():
+                mask |= bits[code]
+            masks[(dist_group, subscriber)] = mask
+    return codes, masks
+
+
 class SelectorcodeMapper(FieldMapper):
     SELECTOR_CODES = {'sportdmedia': {'ipnews': '0ah 0fh 0hw 0nl 0px psd pxd pxx'},
                       'rnewsdnt': {'ipnews': '0fh bn8 bx8 rn8 rx8'},
@@ -125,6 +146,8 @@ class SelectorcodeMapper(FieldMapper):
                                     'ipnews': 'cfi cxi cxx',
                                     'notes': 'cfi cxi cxx'}}
 
+    SELECTOR_CODE_LIST, SELECTOR_CODE_MASKS = compile_selector_codes(SELECTOR_CODES)
+
     def map(self, article, category, **kwargs):
         handlers = {
             'NATIONAL': self._set_ndx_selector_codes,
@@ -134,7 +157,7 @@ class SelectorcodeMapper(FieldMapper):
 
         desk_id = article.get('task', {}).get('desk', None)
         if desk_id:
-            desk = superdesk.get_resource_service('desks').find_one(req=None, _id=desk_id)
+            desk = identity_cache.get('desks', desk_id)
             subscriber = kwargs['subscriber']
             formatted_item = kwargs['formatted_item']
             handler = handlers.get(desk['name'].upper(), lambda *args: None)
@@ -145,9 +168,7 @@ class SelectorcodeMapper(FieldMapper):
         :param name:
         :return: the abbreviatoin for the geographical restriction
         """
-        geo_resource = superdesk.get_resource_service('vocabularies').find_one(req=None,
-                                                                               _id='geographical_restrictions')
-        item = next((i for i in geo_resource.get('items') if i['name'] == name), None)
+        item = vocabulary_snapshot.get_item_by_name('geographical_restrictions', name)
         if item:
             return item.get('qcode')
         else:
@@ -161,29 +182,22 @@ class SelectorcodeMapper(FieldMapper):
         :param dist_groups:
         :return: Space seperated string of selector codes
         """
+        subscriber = subscriber_name.lower()
         # if the is a geographical block
         if 'targeted_for' in article and len(article.get('targeted_for')) > 0:
-            selector_set = set()
+            selector_mask = 0
             # scan each block clause
             for geo_block in article.get('targeted_for'):
+                abbreviation = self._get_geo_abbreviation(geo_block.get('name')).lower()
                 # scan each distribution group
                 for dg in dist_groups:
                     if geo_block.get('allow'):
-                        geo_value = dg + self._get_geo_abbreviation(geo_block.get('name')).lower()
-                        if geo_value in self.SELECTOR_CODES and subscriber_name.lower() in \
-                                self.SELECTOR_CODES[geo_value]:
-                            selector_set = selector_set | \
-                                set(self.SELECTOR_CODES[geo_value][subscriber_name.lower()].split(' '))
+                        selector_mask |= self.SELECTOR_CODE_MASKS.get((dg + abbreviation, subscriber), 0)
                     else:
-                        geo_value = dg + 'not' + self._get_geo_abbreviation(geo_block.get('name')).lower()
-                        if geo_value in self.SELECTOR_CODES and subscriber_name.lower() in \
-                                self.SELECTOR_CODES[geo_value]:
-                            if selector_set:
-                                selector_set = selector_set & \
-                                    set(self.SELECTOR_CODES[geo_value][subscriber_name.lower()].split(' '))
-                            else:
-                                selector_set = set(self.SELECTOR_CODES[geo_value][subscriber_name.lower()].split(' '))
-            return ' '.join((list(selector_set)))
+                        mask = self.SELECTOR_CODE_MASKS.get((dg + 'not' + abbreviation, subscriber))
+                        if mask is not None:
+                            selector_mask = selector_mask & mask if selector_mask else mask
+            return self._get_selector_codes(selector_mask)
         else:  # normal case just join the distribution groups
             return self._join_selector_codes(subscriber_name, *dist_groups)
 
@@ -285,11 +299,15 @@ class SelectorcodeMapper(FieldMapper):
         logger.error('No Selector code derived from Finance desk')
 
     def _join_selector_codes(self, subscriber_name, *args):
-        codes = []
+        subscriber = subscriber_name.lower()
+        selector_mask = 0
         for arg in args:
-            if arg in self.SELECTOR_CODES and subscriber_name.lower() in self.SELECTOR_CODES[arg]:
-                codes.extend(self.SELECTOR_CODES[arg][subscriber_name.lower()].split())
-        return ' '.join(list(set(codes)))
+            selector_mask |= self.SELECTOR_CODE_MASKS.get((arg, subscriber), 0)
+        return self._get_selector_codes(selector_mask)
+
+    def _get_selector_codes(self, selector_mask):
+        """Get the space separated selector codes of the bitset"""
+        return ' '.join(code for index, code in enumerate(self.SELECTOR_CODE_LIST) if selector_mask >> index & 1)
 
     def _is_in_subject(self, article, qcode):
         def compare(code1, code2):
@@ -38,6 +38,13 @@ class SelectorcodeMapperTest(TestCase):
         result = f._join_selector_codes('ipnewS', 'newsi', 'cnewsi', 'cnewsi')
         result_list = result.split()
         self.assertEqual(len(result_list), 12)
+        self.assertEqual(f._join_selector_codes('ipnews', 'unknown'), '')
+
+    def test_compiled_selector_codes(self):
+        for dist_group, subscribers in SelectorcodeMapper.SELECTOR_CODES.items():
+            for subscriber, codes in subscribers.items():
+                self.assertSetEqual(set(SelectorcodeMapper()._join_selector_codes(subscriber, dist_group).split()),
+                                    set(codes.split()))
 
     def test_set_selector_codes(self):
         article = {
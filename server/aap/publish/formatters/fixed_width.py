@@ -0,0 +1,90 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import re
+import textwrap
+from functools import lru_cache
+
+# printable ascii without the hyphen, textwrap splits these lines on the spaces only
+PLAIN_LINE_REGEX = re.compile('[ !-,.-~]*')
+SPACES_REGEX = re.compile('( +)')
+
+
+@lru_cache(maxsize=8)
+def _get_text_wrapper(width):
+    return textwrap.TextWrapper(width=width)
+
+
+def _wrap_plain_line(line, width):
+    chunks = [chunk for chunk in SPACES_REGEX.split(line) if chunk]
+    lines = []
+    index = 0
+    while index < len(chunks):
+        current_line = []
+        current_length = 0
+
+        # whitespace at the start of a line is dropped, unless it is the start of the text
+        if lines and chunks[index].strip() == '':
+            index += 1
+
+        while index < len(chunks) and current_length + len(chunks[index]) <= width:
+            current_line.append(chunks[index])
+            current_length += len(chunks[index])
+            index += 1
+
+        # break a word that does not fit on any line
+        if index < len(chunks) and len(chunks[index]) > width:
+            space_left = width - current_length
+            current_line.append(chunks[index][:space_left])
+            chunks[index] = chunks[index][space_left:]
+
+        if current_line and current_line[-1].strip() == '':
+            del current_line[-1]
+
+        if current_line:
+            lines.append(''.join(current_line))
+    return lines
+
+
+def wrap_line(line, width=80):
+    """
+    Wrap a single line of text at the given width, the result is the same as textwrap.wrap
+    Plain ascii lines, the bulk of the wire copy, are split on the spaces in one pass, other lines are wrapped by a
+    shared TextWrapper.
+    :param str line:
+    :param int width:
+    :return list: wrapped lines
+    """
+    munged = line.replace('\r', ' ')
+    if PLAIN_LINE_REGEX.fullmatch(munged):
+        return _wrap_plain_line(munged, width)
+    return _get_text_wrapper(width).wrap(line)
+
+
+def wrap_text(text, width=80, line_break=' \r\n'):
+    """
+    Wrap the lines of the text that are longer than the width
+    The lines that are wrapped are joined by line_break and, as the fixed width formats expect, are not followed by
+    a line break of their own; the lines that fit are kept with their \\r\\n.
+    :param str text:
+    :param int width:
+    :param str line_break:
+    :return str: wrapped text
+    """
+    wrapped = []
+    for line in text.split('\n'):
+        if len(line) > width:
+            wrapped.append(line_break.join(wrap_line(line, width)))
+        elif line.endswith('\r'):
+            wrapped.append(line)
+            wrapped.append('\n')
+        else:
+            wrapped.append(line)
+    return ''.join(wrapped)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import textwrap
+from unittest import TestCase
+
+from .fixed_width import wrap_line, wrap_text
+
+
+class FixedWidthTest(TestCase):
+    def test_wrap_line_same_as_textwrap(self):
+        lines = ['The quick brown fox jumps over the lazy dog ' * 5,
+                 '   leading spaces ' + 'x' * 100 + ' trailing   \r',
+                 '1  Runner Number 1          51kg   $1.50 2  Runner Number 2          52kg   $3.00 3  Runner',
+                 'a well-known hyphenated-word line that is long enough to be wrapped at eighty columns wide',
+                 ' ' * 90]
+        for line in lines:
+            self.assertEqual(wrap_line(line, 80), textwrap.wrap(line, 80))
+            self.assertEqual(wrap_line(line, 7), textwrap.wrap(line, 7))
+
+    def test_wrap_text(self):
+        self.assertEqual(wrap_text('short\r\n' + 'word ' * 20 + '\r\nend', 40),
+                         'short\r\n' + ' \r\n'.join(['word ' * 7 + 'word'] * 2 + ['word ' * 3 + 'word']) + 'end')
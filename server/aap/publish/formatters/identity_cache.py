@@ -0,0 +1,88 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+from flask import g, current_app as app
+
+#: The resources held in the cache, and the fields of an article that refer to them
+IDENTITY_FIELDS = {
+    'users': (('original_creator',), ('version_creator',)),
+    'desks': (('task', 'desk'),),
+    'stages': (('task', 'stage'),)
+}
+
+
+def _get_field(article, path):
+    value = article
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+
+class IdentityCache():
+    """Users, desks and stages read by the AAP formatters and field mappers.
+
+    The documents are held for the app context, that is the publish job of the celery task or the request, so all
+    the formatters and subscribers of the job share one read of each user, desk and stage. ``prefetch`` reads the
+    users, desks and stages of a batch of articles with one query per resource.
+
+    The cache is used if ``FORMATTER_IDENTITY_CACHE`` is enabled, otherwise every call reads the database.
+    """
+
+    def get(self, resource, _id):
+        """Get the document
+
+        :param str resource: users, desks or stages
+        :param _id: id of the document
+        :return dict: document or None if it does not exist
+        """
+        if not _id:
+            return None
+
+        cache = self._get_cache(resource)
+        if cache is None:
+            return superdesk.get_resource_service(resource).find_one(req=None, _id=_id)
+
+        key = str(_id)
+        if key not in cache:
+            cache[key] = superdesk.get_resource_service(resource).find_one(req=None, _id=_id)
+        return cache[key]
+
+    def prefetch(self, articles):
+        """Read the users, desks and stages referred to by the articles that are not in the cache yet
+
+        :param list articles:
+        """
+        for resource, paths in IDENTITY_FIELDS.items():
+            cache = self._get_cache(resource)
+            if cache is None:
+                return
+
+            ids = {str(_id) for article in articles for _id in (_get_field(article, path) for path in paths) if _id}
+            missing = [_id for _id in ids if _id not in cache]
+            if not missing:
+                continue
+
+            for doc in superdesk.get_resource_service(resource).find({'_id': {'$in': missing}}):
+                cache[str(doc['_id'])] = doc
+            for _id in missing:
+                cache.setdefault(_id, None)
+
+    def _get_cache(self, resource):
+        if not app.config.get('FORMATTER_IDENTITY_CACHE', False):
+            return None
+
+        caches = g.get('formatter_identities')
+        if caches is None:
+            caches = g.formatter_identities = {}
+        return caches.setdefault(resource, {})
+
+
+identity_cache = IdentityCache()
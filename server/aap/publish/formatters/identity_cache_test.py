@@ -0,0 +1,53 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import mock
+from bson import ObjectId
+from flask import g
+from superdesk import get_resource_service
+from superdesk.tests import TestCase
+
+from .identity_cache import IdentityCache
+
+
+class IdentityCacheTest(TestCase):
+    def setUp(self):
+        self.app.config['FORMATTER_IDENTITY_CACHE'] = True
+        g.pop('formatter_identities', None)
+        self.user_id = ObjectId()
+        self.app.data.insert('users', [{'_id': self.user_id, 'username': 'foo'}])
+        self.cache = IdentityCache()
+
+    def tearDown(self):
+        self.app.config['FORMATTER_IDENTITY_CACHE'] = False
+
+    def test_get(self):
+        service = get_resource_service('users')
+        with mock.patch.object(service, 'find_one', wraps=service.find_one) as find_one:
+            self.assertEqual(self.cache.get('users', self.user_id)['username'], 'foo')
+            self.assertEqual(self.cache.get('users', str(self.user_id))['username'], 'foo')
+            self.assertIsNone(self.cache.get('users', ObjectId()))
+            self.assertIsNone(self.cache.get('users', ''))
+            self.assertEqual(find_one.call_count, 2)
+
+    def test_prefetch(self):
+        missing_id = ObjectId()
+        self.cache.prefetch([{'original_creator': str(self.user_id), 'version_creator': missing_id, 'task': {}}])
+        service = get_resource_service('users')
+        with mock.patch.object(service, 'find_one') as find_one:
+            self.assertEqual(self.cache.get('users', self.user_id)['username'], 'foo')
+            self.assertIsNone(self.cache.get('users', missing_id))
+            find_one.assert_not_called()
+
+    def test_disabled(self):
+        self.app.config['FORMATTER_IDENTITY_CACHE'] = False
+        self.cache.prefetch([{'original_creator': self.user_id}])
+        self.assertEqual(self.cache.get('users', self.user_id)['username'], 'foo')
+        self.assertIsNone(g.get('formatter_identities'))
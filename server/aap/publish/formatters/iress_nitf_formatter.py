@@ -22,13 +22,18 @@ from eve.utils import config
 from superdesk.text_utils import get_text
 from .field_mappers.locator_mapper import LocatorMapper
 from .field_mappers.slugline_mapper import SluglineMapper
-from aap.publish.formatters.unicodetoascii import to_ascii
+from aap.publish.formatters.unicodetoascii import to_ascii, collapse_whitespace, TextNormaliser, \
+    CONTROL_CHARACTERS
+from .parsed_body import get_parsed_body
+from .vocabulary_snapshot import vocabulary_snapshot
 
 
 class IRESSNITFFormatter(NITFFormatter):
     line_ender = b'\x19\x0D\x0A'.decode()
     line_feed = b'\x0D\x0A'.decode()
     line_prefix = '   '
+    # remove control chars except \r and \n
+    text_normaliser = TextNormaliser(replace={'\xA0': ' '}, strip=CONTROL_CHARACTERS)
     _message_attrib = {}
 
     def format(self, article, subscriber, codes=None):
@@ -128,21 +133,20 @@ class IRESSNITFFormatter(NITFFormatter):
 
     def get_text_content(self, content):
         content = content.replace('<br>', '<br/>').replace('</br>', '')
-        content = re.sub('[\x00-\x09\x0b\x0c\x0e-\x1f]', '', content)
-        content = content.replace('\xA0', ' ')
+        content = self.text_normaliser(content)
 
-        parsed = parse_html(content, content='html')
+        parsed = get_parsed_body(content)
 
-        for br in parsed.xpath('//br'):
-            br.tail = '\r\n' + br.tail if br.tail else '\r\n'
-        etree.strip_elements(parsed, 'br', with_tail=False)
-
-        for tag in parsed.xpath('/html/div/child::*'):
-            if tag.tag != 'br' and tag.text is not None and tag.text.strip() != '':
-                tag.text = self.line_prefix + re.sub(' +', ' ', re.sub('(?<!\r)\n+', ' ', tag.text))
-                tag.tail = '\r\n' + tag.tail if tag.tail else '\r\n'
+        text = [parsed.text]
+        for paragraph in parsed.paragraphs:
+            if paragraph.tag != 'br' and paragraph.text is not None and paragraph.text.strip() != '':
+                text.append(self.line_prefix + collapse_whitespace(paragraph.text))
+                text.append(paragraph.content[len(paragraph.text):])
+                text.append('\r\n' + paragraph.tail)
+            else:
+                text.append(paragraph.content + paragraph.tail)
 
-        para_text = "".join(x for x in parsed.itertext())
+        para_text = ''.join(text)
         # multiple line breaks to one line break
         para_text = re.sub('[{}]+'.format(self.line_feed), self.line_feed, para_text)
         return to_ascii(para_text)
@@ -164,8 +168,7 @@ class IRESSNITFFormatter(NITFFormatter):
         SubElement(docdata, 'urgency', {'ed-urg': str(article.get('urgency', ''))})
         self._format_docdata_date(article, docdata, 'date.issue', 'versioncreated')
         self._format_docdata_date(article, docdata, 'date.release', 'versioncreated')
-        copyrights = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='rightsinfo')
-        rights = get_copyrights_info(article, copyrights.get('items') or []) or {}
+        rights = get_copyrights_info(article, vocabulary_snapshot.get_items('rightsinfo')) or {}
 
         SubElement(docdata, 'doc.copyright', {
             'year': str((self._get_date(article, 'versioncreated')).year),
@@ -10,12 +10,15 @@
 
 import json
 import superdesk
+from datetime import timedelta
+from flask import current_app as app
 from superdesk.publish.formatters.ninjs_newsroom_formatter import NewsroomNinjsFormatter
 from superdesk.utils import json_serialize_datetime_objectId
 from superdesk.errors import FormatterError
+from superdesk.utc import utcnow
 from superdesk.metadata.item import GUID_FIELD, FAMILY_ID
-from copy import deepcopy
 from .unicodetoascii import clean_string
+from .article_view import ArticleView
 
 
 class MarketplaceNINJSFormatter(NewsroomNinjsFormatter):
@@ -57,14 +60,14 @@ class MarketplaceNINJSFormatter(NewsroomNinjsFormatter):
         :return:
         """
         if article.get('source') == 'Reuters' or article.get('source') == 'REUTERS':
-            new_article = deepcopy(article)
+            new_article = ArticleView(article)
             ingested = self._get_ingested(article)
             if ingested:
                 # Remove the version from the guid
                 new_article['guid'] = ':'.join(ingested.get('guid', '').split(':')[:-1])
                 return new_article
         elif article.get('source') == 'PAA' or article.get('source') == 'PA':
-            new_article = deepcopy(article)
+            new_article = ArticleView(article)
             ingested = self._get_ingested(article)
             if ingested:
                 # Remove the version (send last component from the guid)
@@ -73,27 +76,49 @@ class MarketplaceNINJSFormatter(NewsroomNinjsFormatter):
                 return new_article
             return new_article
         elif article.get('source') == 'AP':
+            lineage_service = superdesk.get_resource_service('story_lineage')
+            lineage_key = (article.get('source'), article.get('slugline', ''), article.get('headline', ''))
             # if the string Writethru is not in the take key we assume the story is unique
             if 'Ld-Writethru' not in article.get('anpa_take_key', ''):
                 ingested = self._get_ingested(article)
                 if ingested:
-                    new_article = deepcopy(article)
+                    lineage_service.add_original(*lineage_key, guid=ingested.get('guid'),
+                                                 expiry=self._get_ingest_expiry(ingested))
+                    new_article = ArticleView(article)
                     new_article['guid'] = ingested.get('guid')
                     return new_article
                 return article
             # Try to find a the version of the article that is not a Writethru assuming it is the original
-            prev = superdesk.get_resource_service('ingest').find(where={'slugline': article.get('slugline', ''),
-                                                                        'headline': article.get('headline', ''),
-                                                                        'anpa_take_key': {
-                                                                            '$regex': '^((?!Ld-Writethru).)*$',
-                                                                            '$options': 'i'}})
-            if prev.count() == 1:
-                original = prev.next()
-                new_article = deepcopy(article)
-                new_article['guid'] = original.get('guid')
+            guids = lineage_service.get_original_guids(*lineage_key)
+            if guids is None:
+                originals = self._find_originals(article)
+                guids = [original['guid'] for original in originals]
+                # only a resolved original is recorded, the originals of an ambiguous story are searched again
+                if len(originals) == 1:
+                    lineage_service.set_originals(*lineage_key, originals=originals)
+            if len(guids) == 1:
+                new_article = ArticleView(article)
+                new_article['guid'] = guids[0]
                 return new_article
         return article
 
+    def _get_ingest_expiry(self, ingested):
+        return ingested.get('expiry') or utcnow() + timedelta(minutes=app.config['INGEST_EXPIRY_MINUTES'])
+
+    def _find_originals(self, article):
+        """
+        Search ingest for the versions of the article that are not a Writethru, for the stories whose lineage is not
+        recorded
+        :param article:
+        :return: guids of the versions with their expiry
+        """
+        prev = superdesk.get_resource_service('ingest').find(where={'slugline': article.get('slugline', ''),
+                                                                    'headline': article.get('headline', ''),
+                                                                    'anpa_take_key': {
+                                                                        '$regex': '^((?!Ld-Writethru).)*$',
+                                                                        '$options': 'i'}})
+        return [{'guid': original.get('guid'), 'expiry': self._get_ingest_expiry(original)} for original in prev]
+
     def format(self, article, subscriber, codes=None):
         try:
             pub_seq_num = superdesk.get_resource_service('subscribers').generate_sequence_number(subscriber)
@@ -8,12 +8,15 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 from copy import deepcopy
 
+from superdesk import get_resource_service
 from superdesk.tests import TestCase
+from superdesk.utc import utcnow
 from apps.publish import init_app
+from aap.story_lineage import init_app as init_story_lineage
 from .marketplace_ninjs_formatter import MarketplaceNINJSFormatter
 
 
@@ -468,6 +471,7 @@ class TestMarketplaceNINJS(TestCase):
     def setUp(self):
         self.formatter = MarketplaceNINJSFormatter()
         init_app(self.app)
+        init_story_lineage(self.app)
         self.app.data.insert('ingest', self.ingest)
 
     def test_update_reuters_id(self):
@@ -485,6 +489,39 @@ class TestMarketplaceNINJS(TestCase):
         ninjs = json.loads(doc)
         self.assertEqual(ninjs['guid'], 'tag:localhost:2018:861146a6-9a01-48bc-8fb4-7757c7f236af')
 
+    def test_ap_lineage(self):
+        lineage_service = get_resource_service('story_lineage')
+        self.formatter.format(self.articles[2], {'_id': 1, 'name': 'Test Subscriber'})
+        self.assertEqual(lineage_service.get_original_guids('AP', '  us-med--fishoil-vitam ',
+                                                            'Big studies give mixed news on fish oil, vitamin D'),
+                         ['tag:localhost:2018:861146a6-9a01-48bc-8fb4-7757c7f236af'])
+
+        # the recorded lineage is used once the story is no longer in ingest
+        self.app.data.remove('ingest', {})
+        seq, doc = self.formatter.format(self.articles[2], {'_id': 1, 'name': 'Test Subscriber'})[0]
+        self.assertEqual(json.loads(doc)['guid'], 'tag:localhost:2018:861146a6-9a01-48bc-8fb4-7757c7f236af')
+
+    def test_ap_lineage_ambiguous(self):
+        # two originals in ingest, the write-thru is not resolved and the lineage is not recorded
+        self.app.data.insert('ingest', [dict(self.ingest[2], _id='urn:original2', guid='tag:localhost:2018:original2')])
+        seq, doc = self.formatter.format(self.articles[2], {'_id': 1, 'name': 'Test Subscriber'})[0]
+        self.assertEqual(json.loads(doc)['guid'], self.articles[2]['guid'])
+        self.assertIsNone(get_resource_service('story_lineage').get_original_guids(
+            'AP', 'US-MED--FishOil-Vitam', 'Big studies give mixed news on fish oil, vitamin D'))
+
+    def test_ap_lineage_expired(self):
+        lineage_service = get_resource_service('story_lineage')
+        lineage_key = ('AP', 'US-MED--FishOil-Vitam', 'Big studies give mixed news on fish oil, vitamin D')
+        lineage_service.set_originals(*lineage_key, originals=[{'guid': 'tag:localhost:2018:expired',
+                                                                'expiry': utcnow() - timedelta(minutes=1)}])
+        self.assertIsNone(lineage_service.get_original_guids(*lineage_key))
+
+        # the expired original is replaced by the one found in ingest
+        seq, doc = self.formatter.format(self.articles[2], {'_id': 1, 'name': 'Test Subscriber'})[0]
+        self.assertEqual(json.loads(doc)['guid'], 'tag:localhost:2018:861146a6-9a01-48bc-8fb4-7757c7f236af')
+        self.assertEqual(lineage_service.get_original_guids(*lineage_key),
+                         ['tag:localhost:2018:861146a6-9a01-48bc-8fb4-7757c7f236af'])
+
     def test_missing_takekey(self):
         bad_article = {
             "_id": "tag:localhost:2018:5514f993-b342-4231-a74c-b686a8205baf",
@@ -11,8 +11,8 @@
 
 from .aap_ipnews_formatter import AAPIpNewsFormatter
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE
-from copy import deepcopy
 from .category_list_map import get_nzn_category_list
+from .article_view import ArticleView
 
 
 class NznIpNewsFormatter(AAPIpNewsFormatter):
@@ -25,7 +25,7 @@ class NznIpNewsFormatter(AAPIpNewsFormatter):
         Constructs a dictionary that represents the parameters passed to the IPNews InsertNews stored procedure
         :return: returns the sequence number of the subscriber and the constructed parameter dictionary
         """
-        formatted_article = deepcopy(article)
+        formatted_article = ArticleView(article)
         mapped_source = formatted_article.get('source', '') if formatted_article.get('source', '') != 'AAP' else 'NZN'
 
         return self.format_for_source(formatted_article, subscriber, mapped_source, codes)
@@ -9,7 +9,7 @@
 # at https://www.sourcefabric.org/superdesk/license
 from .aap_newscentre_formatter import AAPNewscentreFormatter
 from .category_list_map import get_nzn_category_list
-from copy import deepcopy
+from .article_view import ArticleView
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE
 
 
@@ -19,7 +19,7 @@ class NznNewscentreFormatter(AAPNewscentreFormatter):
         Constructs a dictionary that represents the parameters passed to the IPNews InsertNews stored procedure
         :return: returns the sequence number of the subscriber and the constructed parameter dictionary
         """
-        formatted_article = deepcopy(article)
+        formatted_article = ArticleView(article)
         mapped_source = formatted_article.get('source', '') if formatted_article.get('source', '') != 'AAP' else 'NZN'
 
         return self.format_for_source(formatted_article, subscriber, mapped_source, codes)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from collections import namedtuple
+from functools import lru_cache
+
+from superdesk.etree import parse_html, etree
+
+
+#: A top level element of the body.
+#: ``text`` is the text before the first child element, ``content`` is the text of the element and all of its
+#: children and ``tail`` is the text that follows the element up to the next top level element, an empty string if
+#: there is none.
+Paragraph = namedtuple('Paragraph', ['tag', 'text', 'content', 'tail'])
+
+#: The parsed body, ``text`` is the text before the first top level element.
+ParsedBody = namedtuple('ParsedBody', ['text', 'paragraphs'])
+
+
+def get_parsed_body(content, line_break='\r\n', space_on_elements=False):
+    """Get the immutable parsed representation of the html content
+
+    The representation is cached, so the same body rendered for many subscribers or categories is only parsed once.
+    The text formatters apply their own clean up of the html before calling this, the cache is keyed on the
+    resulting html so formatters that produce the same html share the parsed body.
+
+    :param str content: html to parse
+    :param str line_break: text that replaces the <br> elements
+    :param bool space_on_elements: if True, add a space on each element's tail
+    :return ParsedBody: parsed body
+    """
+    return _parse_body(content, line_break, space_on_elements)
+
+
+@lru_cache(maxsize=128)
+def _parse_body(content, line_break, space_on_elements):
+    parsed = parse_html(content, content='html', space_on_elements=space_on_elements)
+
+    for br in parsed.xpath('//br'):
+        br.tail = line_break + br.tail if br.tail else line_break
+    etree.strip_elements(parsed, 'br', with_tail=False)
+
+    text = parsed.text or ''
+    paragraphs = []
+    for node in parsed:
+        if isinstance(node.tag, str):
+            paragraphs.append(Paragraph(node.tag, node.text, ''.join(node.itertext()), node.tail or ''))
+        elif paragraphs:
+            # comments and processing instructions only contribute their tail
+            paragraphs[-1] = paragraphs[-1]._replace(tail=paragraphs[-1].tail + (node.tail or ''))
+        else:
+            text += node.tail or ''
+
+    return ParsedBody(text, tuple(paragraphs))
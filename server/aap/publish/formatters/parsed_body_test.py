@@ -0,0 +1,32 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import TestCase
+
+from .parsed_body import get_parsed_body, Paragraph
+
+
+class ParsedBodyTest(TestCase):
+    def test_paragraphs(self):
+        parsed = get_parsed_body('lead<p>a<b>x</b>y<br/>z</p>t<!-- comment -->u<p>b</p>')
+        self.assertEqual(parsed.text, 'lead')
+        self.assertEqual(parsed.paragraphs, (Paragraph('p', 'a', 'axy\r\nz', 'tu'), Paragraph('p', 'b', 'b', '')))
+
+    def test_line_break(self):
+        parsed = get_parsed_body('<p>a<br/>b</p>', line_break=' ')
+        self.assertEqual(parsed.paragraphs[0].content, 'a b')
+
+    def test_parsed_once(self):
+        self.assertIs(get_parsed_body('<p>same body</p>'), get_parsed_body('<p>same body</p>'))
+
+    def test_empty(self):
+        parsed = get_parsed_body('')
+        self.assertEqual(parsed.text, '')
+        self.assertEqual(parsed.paragraphs, ())
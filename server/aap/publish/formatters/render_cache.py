@@ -0,0 +1,84 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import threading
+from collections import OrderedDict
+
+from eve.utils import config
+from flask import current_app as app
+
+
+class RenderCache():
+    """Process wide cache of the subscriber independent output of the wire formatters.
+
+    When a published version goes to many subscribers with the same format only the sequence number and the selector
+    codes differ, the formatters store everything else here and splice those in for each subscriber.
+
+    Only items being published are cached, they are identified by ``item_id`` and version, which do not change for
+    the same content. The cache is used if ``FORMATTER_RENDER_CACHE`` is enabled.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def get_key(self, formatter, article):
+        """Get the cache key for the output of the formatter
+
+        :param Formatter formatter:
+        :param dict article: article being formatted
+        :return: key or None if the output can not be cached
+        """
+        if not app.config.get('FORMATTER_RENDER_CACHE', False):
+            return None
+
+        item_id = article.get('item_id')
+        version = article.get(config.VERSION)
+        if not item_id or version is None:
+            return None
+
+        return type(formatter).__name__, str(item_id), version
+
+    def get(self, key):
+        """Get the cached output, None if there is none
+
+        :param key: key as returned by get_key
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store the output
+
+        :param key: key as returned by get_key
+        :param value: output, it is shared with later calls so it must not be modified
+        """
+        if key is None:
+            return
+
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+render_cache = RenderCache()
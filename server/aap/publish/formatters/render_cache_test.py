@@ -0,0 +1,38 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk.tests import TestCase
+
+from .render_cache import RenderCache
+
+
+class RenderCacheTest(TestCase):
+    def setUp(self):
+        self.app.config['FORMATTER_RENDER_CACHE'] = True
+        self.cache = RenderCache(max_size=2)
+
+    def tearDown(self):
+        self.app.config['FORMATTER_RENDER_CACHE'] = False
+
+    def test_key(self):
+        self.assertEqual(self.cache.get_key(self, {'item_id': 'a', '_current_version': 2}),
+                         ('RenderCacheTest', 'a', 2))
+        self.assertIsNone(self.cache.get_key(self, {'_id': 'a', '_current_version': 2}))
+        self.app.config['FORMATTER_RENDER_CACHE'] = False
+        self.assertIsNone(self.cache.get_key(self, {'item_id': 'a', '_current_version': 2}))
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set(('f', 'a', 1), 'a')
+        self.cache.set(('f', 'b', 1), 'b')
+        self.assertEqual(self.cache.get(('f', 'a', 1)), 'a')
+        self.cache.set(('f', 'c', 1), 'c')
+        self.assertIsNone(self.cache.get(('f', 'b', 1)))
+        self.assertEqual(self.cache.get(('f', 'a', 1)), 'a')
+        self.assertIsNone(self.cache.get(None))
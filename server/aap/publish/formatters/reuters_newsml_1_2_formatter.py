@@ -24,6 +24,7 @@ from copy import deepcopy
 from superdesk.utc import utcnow
 from datetime import date
 from html import escape
+from .vocabulary_snapshot import vocabulary_snapshot
 
 
 class ReutersNewsML12Formatter(NewsML12Formatter):
@@ -158,14 +159,13 @@ class ReutersNewsML12Formatter(NewsML12Formatter):
         :return:
         """
         # Some AAP IPTC codes are spcificaly mapped to N2000 codes
-        aap_map = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='reuters_iptc_n2000_map')
         path = get_filepath('topicset-reuters-3rdParty_news2000.xml')
         tree = etree.parse(str(path))
         for subject in formatted_article.get('subject', []):
-            if aap_map:
-                aap_mapped = [x for x in aap_map.get('items', []) if x.get('qcode', '') == subject.get('qcode', '')]
-                if len(aap_mapped) == 1:
-                    n2000_code = aap_mapped[0].get('name')
+            if subject.get('qcode'):
+                aap_mapped = vocabulary_snapshot.get_item('reuters_iptc_n2000_map', subject.get('qcode'))
+                if aap_mapped:
+                    n2000_code = aap_mapped.get('name')
                     topic = tree.xpath(
                         './NewsItem/TopicSet/Topic/FormalName[text()="' + n2000_code + '"]')
                     if topic and len(topic) == 1:
@@ -0,0 +1,113 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import logging
+from hashlib import sha256
+
+import superdesk
+from pymongo.errors import DuplicateKeyError
+from superdesk.resource import Resource
+from superdesk.services import BaseService
+from superdesk.utc import utcnow
+
+
+logger = logging.getLogger(__name__)
+
+#: An SMS message is not sent again by another story for a week
+SMS_MESSAGE_EXPIRY_SECONDS = 7 * 24 * 60 * 60
+
+
+def get_message_hash(message):
+    """Get the hash of the SMS message text
+
+    :param str message:
+    :return str: hex digest
+    """
+    return sha256((message or '').encode('utf-8')).hexdigest()
+
+
+class SMSMessagesResource(Resource):
+    schema = {
+        'hash': {
+            'type': 'string'
+        },
+        # the item version that sent the message
+        'item_id': {
+            'type': 'string',
+            'nullable': True
+        },
+        'item_version': {
+            'type': 'integer',
+            'nullable': True
+        },
+        'created': {
+            'type': 'datetime'
+        }
+    }
+    internal_resource = True
+    mongo_indexes = {
+        'hash_1': ([('hash', 1)], {'unique': True}),
+        'created_1': ([('created', 1)], {'expireAfterSeconds': SMS_MESSAGE_EXPIRY_SECONDS})
+    }
+    item_methods = []
+    resource_methods = []
+
+
+class SMSMessagesService(BaseService):
+    """Hashes of the SMS messages that have been queued, with the item version that sent each of them"""
+
+    def can_send(self, message, item_id, item_version):
+        """Check that no other item or version has sent the message, without recording it
+
+        :param str message: SMS message text
+        :param item_id: id of the item
+        :param int item_version: version of the item
+        :return bool: True if the message can be sent by the item version
+        """
+        sent = self.find_one(req=None, hash=get_message_hash(message))
+        return self._is_sender(sent, item_id, item_version)
+
+    def _is_sender(self, sent, item_id, item_version):
+        if not sent:
+            return True
+        return sent.get('item_id') == (str(item_id) if item_id is not None else None) and \
+            sent.get('item_version') == item_version
+
+    def reserve(self, message, item_id, item_version):
+        """Record that the item version sends the message, if no other item or version has sent it
+
+        The message is recorded with an atomic upsert, so of two stories with the same message published at the
+        same time only one gets to send it.
+
+        :param str message: SMS message text
+        :param item_id: id of the item
+        :param int item_version: version of the item
+        :return bool: True if the message can be sent by the item version
+        """
+        message_hash = get_message_hash(message)
+        item_id = str(item_id) if item_id is not None else None
+        try:
+            sent = self.find_and_modify(
+                query={'hash': message_hash},
+                update={'$setOnInsert': {'hash': message_hash, 'item_id': item_id, 'item_version': item_version,
+                                         'created': utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # a concurrent upsert inserted the message first
+            sent = self.find_one(req=None, hash=message_hash)
+
+        return self._is_sender(sent, item_id, item_version)
+
+
+def init_app(app):
+    endpoint_name = 'sms_messages'
+    service = SMSMessagesService(endpoint_name, backend=superdesk.get_backend())
+    SMSMessagesResource(endpoint_name, app=app, service=service)
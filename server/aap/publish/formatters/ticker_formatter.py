@@ -9,10 +9,8 @@
 # at https://www.sourcefabric.org/superdesk/license
 from superdesk.publish.formatters import Formatter
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE
-from .unicodetoascii import to_ascii
-import re
-from superdesk.etree import parse_html
-from lxml import etree
+from .unicodetoascii import to_ascii, TextNormaliser, CONTROL_CHARACTERS
+from .parsed_body import get_parsed_body
 import superdesk
 
 
@@ -25,6 +23,10 @@ class TickerFormatter(Formatter):
     SPEED = b'\xB0'  # Scroll speed set to slowest
     ETX = b'\x03'  # End of text end of message
 
+    # It's only a one line ticker so new line and carriage return become spaces, remove control chars as these will
+    # upset the ticker
+    text_normaliser = TextNormaliser(replace={'\n': ' ', '\r': ' '}, strip=CONTROL_CHARACTERS)
+
     def __init__(self):
         self.format_type = 'aap ticker'
         self.can_preview = False
@@ -46,17 +48,12 @@ class TickerFormatter(Formatter):
         return [{'published_seq_num': pub_seq_num, 'encoded_item': b''.join(ticker_msg), 'formatted_item': body}]
 
     def get_text_content(self, content):
-        # It's only a one line ticker so new line and carriage return become spaces
-        content = re.sub('[\n]', ' ', content)
-        content = re.sub('[\r]', ' ', content)
-        # remove control chars as these will upset the ticker
-        content = re.sub(r'[\x00-\x1f]', '', content)
+        content = self.text_normaliser(content)
         if content == '':
             return ''
 
-        parsed = parse_html(content, content='html')
-        text = etree.tostring(parsed, encoding="unicode", method="text")
-        return text
+        parsed = get_parsed_body(content, line_break='')
+        return parsed.text + ''.join(paragraph.content + paragraph.tail for paragraph in parsed.paragraphs)
 
     def can_format(self, format_type, article):
         return format_type == self.format_type and article[ITEM_TYPE] == CONTENT_TYPE.TEXT
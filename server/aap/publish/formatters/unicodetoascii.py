@@ -8,12 +8,117 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import re
 import unidecode
 import logging
+from functools import lru_cache
 
 
 logger = logging.getLogger(__name__)
 
+#: Unicode quotes and primes folded to the ascii quotes
+QUOTES = {'‘': '\'',  # 8216
+          '’': '\'',  # 8217
+          '‚': '\'',  # 8218
+          '‛': '\'',  # 8219
+          '“': '"',   # 8220
+          '”': '"',   # 8221
+          '‟': '"',   # 8223
+          '′': '\'',  # 8242
+          '″': '"',   # 8243
+          '‶': '"',   # 8246
+          '‵': '\'',  # 8245
+          'ˮ': '"',   # 750
+          '´': '\'',  # 180
+          'ʹ': '\'',  # 697
+          'ʻ': '\'',  # 699
+          'ʼ': '\'',  # 700
+          'ʺ': '"',   # 698
+          '̀': '\'',   # 768
+          '́': '\''    # 769
+          }
+
+QUOTES_TABLE = ''.maketrans(QUOTES)
+
+#: Control characters stripped from the wire formats, line feed and carriage return are kept
+CONTROL_CHARACTERS = ''.join(chr(c) for c in range(0x20) if c not in (0x0a, 0x0d))
+
+#: Strings up to this length, headlines, bylines, sluglines etc., are memoised
+MEMOISE_LENGTH = 256
+
+# a run of spaces and new lines that are not part of a \r\n
+WHITESPACE_REGEX = re.compile('(?:(?<!\r)\n| )+')
+
+
+class _CodePointTable(dict):
+    """Translation table from code point to the normalised text, filled in on the first use of each code point"""
+
+    def __init__(self, normalise_character):
+        super().__init__()
+        self._normalise_character = normalise_character
+
+    def __missing__(self, code_point):
+        value = self._normalise_character(chr(code_point))
+        self[code_point] = value
+        return value
+
+
+class TextNormaliser():
+    """Normalise text for the wire formats in a single pass.
+
+    The steps applied to each character, in order, are: folding of the smart quotes, transliteration to ascii,
+    replacement of characters and stripping of characters. Each character is normalised once, the result is kept in a
+    code point table so a whole text is normalised by a single ``str.translate``. Short strings are memoised.
+
+    If ``collapse_whitespace`` is set, runs of spaces and new lines, other than the new line of a ``\\r\\n``, are
+    replaced by a single space after the translation.
+
+    The output is the same as applying the steps one after the other with ``clean_string``, ``unidecode``,
+    ``str.replace`` and ``re.sub``.
+    """
+
+    def __init__(self, fold_quotes=False, transliterate=False, replace=None, strip='', collapse_whitespace=False):
+        self.fold_quotes = fold_quotes
+        self.transliterate = transliterate
+        self.replace = dict(replace or {})
+        self.strip = frozenset(strip)
+        self.collapse_whitespace = collapse_whitespace
+        self._table = _CodePointTable(self._normalise_character)
+        self._memoised = lru_cache(maxsize=4096)(self._normalise)
+
+    def __call__(self, text):
+        if not text:
+            return text
+        if len(text) <= MEMOISE_LENGTH:
+            return self._memoised(text)
+        return self._normalise(text)
+
+    def _normalise(self, text):
+        text = text.translate(self._table)
+        if self.collapse_whitespace:
+            text = collapse_whitespace(text)
+        return text
+
+    def _normalise_character(self, character):
+        if self.fold_quotes:
+            character = QUOTES.get(character, character)
+        if self.transliterate:
+            character = unidecode.unidecode(character)
+        character = ''.join(self.replace.get(c, c) for c in character)
+        return ''.join(c for c in character if c not in self.strip)
+
+
+_transliterate = TextNormaliser(transliterate=True)
+
+
+def collapse_whitespace(text):
+    """
+    Replaces runs of spaces and new lines, other than the new line of a \\r\\n, by a single space
+    :param text:
+    :return: text
+    """
+    return WHITESPACE_REGEX.sub(' ', text)
+
 
 def clean_string(str):
     """
@@ -21,35 +126,12 @@ def clean_string(str):
     :param str:
     :return: cleaned string
     """
-
-    def get_translation_table():
-        return ''.maketrans({'‘': '\'',  # 8216
-                             '’': '\'',  # 8217
-                             '‚': '\'',  # 8218
-                             '‛': '\'',  # 8219
-                             '“': '"',   # 8220
-                             '”': '"',   # 8221
-                             '‟': '"',   # 8223
-                             '′': '\'',  # 8242
-                             '″': '"',   # 8243
-                             '‶': '"',   # 8246
-                             '‵': '\'',  # 8245
-                             'ˮ': '"',   # 750
-                             '´': '\'',  # 180
-                             'ʹ': '\'',  # 697
-                             'ʻ': '\'',  # 699
-                             'ʼ': '\'',  # 700
-                             'ʺ': '"',   # 698
-                             '̀': '\'',   # 768
-                             '́': '\''    # 769
-                             })
-
-    return str.translate(get_translation_table()) if str else None
+    return str.translate(QUOTES_TABLE) if str else None
 
 
 def to_ascii(input_str):
     try:
-        return unidecode.unidecode(input_str) if input_str else ''
+        return _transliterate(input_str) if input_str else ''
     except:
         logger.exception('Cannot convert input {} to ascii'.format(input_str))
         return input_str
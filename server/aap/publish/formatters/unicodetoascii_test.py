@@ -10,7 +10,7 @@
 
 from unittest import TestCase
 
-from .unicodetoascii import to_ascii, clean_string
+from .unicodetoascii import to_ascii, clean_string, collapse_whitespace, TextNormaliser, CONTROL_CHARACTERS
 
 
 class ToAsciiConverterTest(TestCase):
@@ -50,3 +50,17 @@ class CleanStringTest(TestCase):
         self.assertEqual(clean_string('ʺ'), '"')
         self.assertEqual(clean_string('̀'), '\'')
         self.assertEqual(clean_string('ˮ'), '"')
+
+
+class TextNormaliserTest(TestCase):
+    def test_single_pass_matches_chain(self):
+        text = '“Café”\xA0\x01news\x0e\r\nend'
+        normaliser = TextNormaliser(fold_quotes=True, transliterate=True, replace={'\x0e': '\r\n'},
+                                    strip=CONTROL_CHARACTERS)
+        self.assertEqual(normaliser(text), '"Cafe" news\r\n\r\nend')
+        self.assertEqual(normaliser(text * 100), '"Cafe" news\r\n\r\nend' * 100)
+        self.assertEqual(normaliser(''), '')
+
+    def test_collapse_whitespace(self):
+        self.assertEqual(collapse_whitespace('a  \n\n b\r\n\nc'), 'a b\r\n c')
+        self.assertEqual(TextNormaliser(collapse_whitespace=True)('a \n b'), 'a b')
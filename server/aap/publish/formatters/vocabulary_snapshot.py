@@ -0,0 +1,150 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import json
+import logging
+import time
+
+import superdesk
+from eve.utils import ParsedRequest
+from flask import current_app as app
+
+
+logger = logging.getLogger(__name__)
+
+#: The vocabularies that are held in the snapshot, any other vocabulary is read from the database on each call
+SNAPSHOT_VOCABULARIES = ('categories', 'genre', 'rightsinfo', 'geographical_restrictions', 'locators',
+                         'reuters_iptc_n2000_map')
+
+
+class VocabularySnapshot():
+    """Process wide snapshot of the reference vocabularies used by the AAP formatters.
+
+    Each vocabulary is read once and its items are indexed by upper cased qcode and by name. An entry is dropped
+    when the vocabulary is inserted, updated, replaced or deleted through this process. The changes made by other
+    processes, e.g. the API when the formatters run in the Celery workers, are not signalled so once an entry is
+    older than ``FORMATTER_VOCABULARY_SNAPSHOT_TTL`` seconds the ``_etag`` and ``_updated`` of the vocabulary are
+    read and the vocabulary is reloaded if they changed.
+
+    The snapshot is only used if ``FORMATTER_VOCABULARY_SNAPSHOT`` is enabled, otherwise every call reads the
+    vocabulary from the database.
+    """
+
+    def __init__(self):
+        self._vocabularies = {}
+
+    def get_vocabulary(self, _id):
+        """Get the vocabulary document
+
+        :param str _id: vocabulary id
+        :return dict: vocabulary or None if it does not exist
+        """
+        return self._get(_id)['vocabulary']
+
+    def get_items(self, _id):
+        """Get the items of the vocabulary
+
+        :param str _id: vocabulary id
+        :return list: vocabulary items
+        """
+        return self._get(_id)['items']
+
+    def get_item(self, _id, qcode):
+        """Get the vocabulary item for the qcode, the match is case insensitive
+
+        :param str _id: vocabulary id
+        :param str qcode: qcode of the item
+        :return dict: vocabulary item or None if not found
+        """
+        if qcode is None:
+            return None
+        return self._get(_id)['qcodes'].get(str(qcode).upper())
+
+    def get_item_by_name(self, _id, name):
+        """Get the vocabulary item for the name
+
+        :param str _id: vocabulary id
+        :param str name: name of the item
+        :return dict: vocabulary item or None if not found
+        """
+        return self._get(_id)['names'].get(name)
+
+    def invalidate(self, _id=None):
+        """Drop the vocabulary from the snapshot, if no id is passed the whole snapshot is dropped
+
+        :param str _id: vocabulary id
+        """
+        if _id is None:
+            self._vocabularies.clear()
+        else:
+            self._vocabularies.pop(_id, None)
+
+    def _get(self, _id):
+        if not app.config.get('FORMATTER_VOCABULARY_SNAPSHOT', False) or _id not in SNAPSHOT_VOCABULARIES:
+            return self._load(_id)
+
+        entry = self._vocabularies.get(_id)
+        ttl = app.config.get('FORMATTER_VOCABULARY_SNAPSHOT_TTL', 0)
+        if entry is not None and ttl and time.time() - entry['checked'] > ttl:
+            if self._get_version(_id) == entry['version']:
+                entry['checked'] = time.time()
+            else:
+                entry = None
+
+        if entry is None:
+            entry = self._load(_id)
+            self._vocabularies[_id] = entry
+        return entry
+
+    def _get_version(self, _id):
+        req = ParsedRequest()
+        req.projection = json.dumps({'_etag': 1, '_updated': 1})
+        for vocabulary in superdesk.get_resource_service('vocabularies').get_from_mongo(req=req, lookup={'_id': _id}):
+            return vocabulary.get('_etag'), vocabulary.get('_updated')
+        return None
+
+    def _load(self, _id):
+        vocabulary = superdesk.get_resource_service('vocabularies').find_one(req=None, _id=_id)
+        items = (vocabulary or {}).get('items') or []
+        qcodes = {}
+        names = {}
+        for item in items:
+            if item.get('qcode') is not None:
+                qcodes.setdefault(str(item['qcode']).upper(), item)
+            if item.get('name') is not None:
+                names.setdefault(item['name'], item)
+
+        version = (vocabulary.get('_etag'), vocabulary.get('_updated')) if vocabulary else None
+        return {'vocabulary': vocabulary, 'items': items, 'qcodes': qcodes, 'names': names, 'version': version,
+                'checked': time.time()}
+
+
+vocabulary_snapshot = VocabularySnapshot()
+
+
+def on_vocabularies_inserted(docs):
+    for doc in docs:
+        vocabulary_snapshot.invalidate(doc.get('_id'))
+
+
+def on_vocabulary_updated(updates, original):
+    vocabulary_snapshot.invalidate(original.get('_id'))
+
+
+def on_vocabulary_deleted(doc):
+    vocabulary_snapshot.invalidate(doc.get('_id'))
+
+
+def init_app(app):
+    app.on_inserted_vocabularies += on_vocabularies_inserted
+    app.on_updated_vocabularies += on_vocabulary_updated
+    app.on_replaced_vocabularies += on_vocabulary_updated
+    app.on_deleted_item_vocabularies += on_vocabulary_deleted
+    vocabulary_snapshot.invalidate()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import time
+from unittest import mock
+
+from superdesk.tests import TestCase
+
+from .vocabulary_snapshot import vocabulary_snapshot, on_vocabulary_updated
+
+
+class VocabularySnapshotTest(TestCase):
+    vocab = [{'_id': 'categories', 'items': [
+        {'is_active': True, 'name': 'Overseas Sport', 'qcode': 'S', 'subject': '15000000'},
+        {'is_active': True, 'name': 'General News', 'qcode': 'a'}]},
+        {'_id': 'geographical_restrictions', 'items': [
+            {'is_active': True, 'name': 'New South Wales', 'qcode': 'NSW'}]}]
+
+    def setUp(self):
+        self.app.data.insert('vocabularies', self.vocab)
+        self.app.config['FORMATTER_VOCABULARY_SNAPSHOT'] = True
+        vocabulary_snapshot.invalidate()
+
+    def tearDown(self):
+        self.app.config['FORMATTER_VOCABULARY_SNAPSHOT'] = False
+        self.app.config.pop('FORMATTER_VOCABULARY_SNAPSHOT_TTL', None)
+        vocabulary_snapshot.invalidate()
+
+    def test_lookup_by_qcode_and_name(self):
+        self.assertEqual(vocabulary_snapshot.get_item('categories', 'A').get('name'), 'General News')
+        self.assertEqual(vocabulary_snapshot.get_item('categories', 's').get('subject'), '15000000')
+        self.assertIsNone(vocabulary_snapshot.get_item('categories', 'X'))
+        self.assertEqual(vocabulary_snapshot.get_item_by_name('geographical_restrictions',
+                                                              'New South Wales').get('qcode'), 'NSW')
+        self.assertEqual(len(vocabulary_snapshot.get_items('categories')), 2)
+
+    def test_vocabulary_is_read_once(self):
+        vocabulary_snapshot.get_item('categories', 'A')
+        with mock.patch('superdesk.get_resource_service') as get_service:
+            vocabulary_snapshot.get_item('categories', 'S')
+            vocabulary_snapshot.get_items('categories')
+            get_service.assert_not_called()
+
+    def test_update_invalidates_vocabulary(self):
+        vocabulary_snapshot.get_item('categories', 'A')
+        original = self.app.data.find_one('vocabularies', req=None, _id='categories')
+        self.app.data.update('vocabularies', 'categories',
+                             {'items': [{'is_active': True, 'name': 'Finance', 'qcode': 'F'}]}, original)
+        self.assertIsNotNone(vocabulary_snapshot.get_item('categories', 'A'))
+
+        on_vocabulary_updated({}, original)
+        self.assertIsNone(vocabulary_snapshot.get_item('categories', 'A'))
+        self.assertEqual(vocabulary_snapshot.get_item('categories', 'F').get('name'), 'Finance')
+
+    def test_change_by_other_process_is_reloaded(self):
+        self.app.config['FORMATTER_VOCABULARY_SNAPSHOT_TTL'] = 30
+        now = time.time()
+        with mock.patch('aap.publish.formatters.vocabulary_snapshot.time.time', return_value=now):
+            vocabulary_snapshot.get_item('categories', 'A')
+
+        # the vocabulary has not changed, it is not read again
+        with mock.patch('aap.publish.formatters.vocabulary_snapshot.time.time', return_value=now + 60):
+            with mock.patch.object(vocabulary_snapshot, '_load') as load:
+                self.assertIsNotNone(vocabulary_snapshot.get_item('categories', 'A'))
+                load.assert_not_called()
+
+        # updated without the invalidation, as by another process
+        original = self.app.data.find_one('vocabularies', req=None, _id='categories')
+        self.app.data.update('vocabularies', 'categories',
+                             {'items': [{'is_active': True, 'name': 'Finance', 'qcode': 'F'}],
+                              '_etag': 'changed'}, original)
+        with mock.patch('aap.publish.formatters.vocabulary_snapshot.time.time', return_value=now + 90):
+            self.assertIsNotNone(vocabulary_snapshot.get_item('categories', 'A'))
+        with mock.patch('aap.publish.formatters.vocabulary_snapshot.time.time', return_value=now + 150):
+            self.assertIsNone(vocabulary_snapshot.get_item('categories', 'A'))
+            self.assertEqual(vocabulary_snapshot.get_item('categories', 'F').get('name'), 'Finance')
@@ -10,3 +10,15 @@
 
 import aap.publish.transmitters.http_push_agenda  # NOQA
 import aap.publish.transmitters.http_push_apple_news  # NOQA
+import aap.publish.transmitters.runner  # NOQA
+from superdesk.default_settings import celery_queue
+
+
+def init_app(app):
+    if app.config.get('TRANSMIT_RUNNER_ENABLED', False):
+        app.config['CELERY_TASK_ROUTES']['aap.publish.transmitters.runner.transmit'] = {
+            'queue': celery_queue('publish'),
+            'routing_key': 'publish.transmit'
+        }
+        if app.config.get('CELERY_BEAT_SCHEDULE').get('publish:transmit'):
+            app.config['CELERY_BEAT_SCHEDULE']['publish:transmit']['task'] = 'aap.publish.transmitters.runner.transmit'
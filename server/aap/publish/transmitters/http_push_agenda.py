@@ -10,11 +10,14 @@
 
 import logging
 import json
+from datetime import timedelta
+from functools import partial
 from superdesk.publish.transmitters import HTTPPushService
 from superdesk.publish import register_transmitter
 from superdesk.errors import PublishHTTPPushError
 import requests
 from superdesk import get_resource_service
+from superdesk.utc import utcnow
 
 errors = [PublishHTTPPushError.httpPushError().get_error_description()]
 logger = logging.getLogger(__name__)
@@ -23,24 +26,95 @@ logger = logging.getLogger(__name__)
 class HTTPAgendaPush(HTTPPushService):
     hash_header = 'x-agenda-api-key'
     headers = {"Content-type": "application/json", "Accept": "application/json"}
-    user_api_key = None
+    # how long a Superdesk user matched, or not matched, with an Agenda user is cached
+    user_cache_ttl = timedelta(hours=12)
+    user_cache_negative_ttl = timedelta(hours=1)
 
-    def _get_headers(self, destination, current_headers):
-        secret_token = self._get_secret_token(destination) if self.user_api_key is None else self.user_api_key
+    def __init__(self):
+        super().__init__()
+        self._user_cache = {}
+
+    def _get_headers(self, destination, current_headers, api_key=None):
+        """Get a copy of the headers with the Agenda Api Key set
+
+        The transmitter is shared by the transmit threads so the key of the user is passed in rather than kept on it.
+
+        :param destination:
+        :param dict current_headers:
+        :param api_key: Api Key of the user, the token set in the config if None
+        :return dict: headers
+        """
+        secret_token = self._get_secret_token(destination) if api_key is None else api_key
         if not secret_token:
             return current_headers
-        headers = current_headers
+        headers = current_headers.copy()
         headers[self.hash_header] = secret_token
         return headers
 
+    def _get_cached_user_value(self, user_id, destination, kind, lookup, persist=True):
+        """Get the Agenda value for the Superdesk user from the user cache
+
+        The cache is kept in memory, and if persist is set in the agenda_user_cache resource so it survives a restart
+        of the worker. On a miss the lookup is called, it returns the value and how long the value is kept for, or None
+        if the value is not to be cached.
+
+        :param user_id:
+        :param destination:
+        :param str kind: api_key or resource
+        :param lookup: function of the user id and destination
+        :param bool persist: keep the value in the agenda_user_cache resource
+        :return: value, None if the user can not be matched
+        """
+        assets_url = self._get_assets_url(destination)
+        key = (assets_url, str(user_id), kind)
+        now = utcnow()
+        cached = self._user_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        service = get_resource_service('agenda_user_cache')
+        if persist:
+            entry = service.get_entry(assets_url, user_id, kind)
+            if entry:
+                self._user_cache[key] = (entry.get('value'), entry.get('expiry'))
+                return entry.get('value')
+
+        value, ttl = lookup(user_id, destination)
+        if ttl is not None:
+            self._user_cache[key] = (value, now + ttl)
+            if persist:
+                service.set_entry(assets_url, user_id, kind, value, now + ttl)
+        return value
+
+    def _evict_user_value(self, user_id, destination, kind):
+        """Remove the Agenda value for the Superdesk user from the user cache
+
+        :param user_id:
+        :param destination:
+        :param str kind: api_key or resource
+        """
+        assets_url = self._get_assets_url(destination)
+        self._user_cache.pop((assets_url, str(user_id), kind), None)
+        get_resource_service('agenda_user_cache').delete_entry(assets_url, user_id, kind)
+
     def _get_user_api_key(self, user_id, destination):
+        """
+        Get the Agenda Api Key of the Superdesk user, if none could be found use the token set in the config
+        The keys are only cached in memory so they are not stored in the database.
+        :param user_id:
+        :param destination:
+        :return:
+        """
+        api_key = self._get_cached_user_value(user_id, destination, 'api_key', self._find_user_api_key, persist=False)
+        return api_key or self._get_secret_token(destination)
+
+    def _find_user_api_key(self, user_id, destination):
         """
         Match the Superdesk user with the Agenda user, if an Agenda Api Key is set for the user return that
         If none then try to create one and update the Agenda user.
-        If anything goes wrong use the token set in the config
         :param user_id:
         :param destination:
-        :return:
+        :return: Api Key, None if anything goes wrong, and how long the result can be cached for
         """
         user = get_resource_service('users').find_one(req=None, _id=user_id)
         if user:
@@ -52,7 +126,7 @@ class HTTPAgendaPush(HTTPPushService):
                 response.raise_for_status()
             except requests.exceptions.HTTPError as ex:
                 logger.warn('Exception on search for agenda user email {}, Exception {}'.format(user.get('email'), ex))
-                return self._get_secret_token(destination)
+                return None, None
 
             agenda_users = json.loads(response.text)
             if len(agenda_users):
@@ -66,7 +140,7 @@ class HTTPAgendaPush(HTTPPushService):
                         ApiKey = json.loads(response.text).get('key')
                     except Exception as ex:
                         logger.warn('Failed to get a new API key from Agenda, Exception {}'.format(ex))
-                        return self._get_secret_token(destination)
+                        return None, None
                     if ApiKey:
                         try:
                             # Retrieve the UserEditModel
@@ -84,61 +158,78 @@ class HTTPAgendaPush(HTTPPushService):
                                                      data=json.dumps(edit_user),
                                                      headers=self._get_headers(destination, self.headers))
                             response.raise_for_status()
-                            return ApiKey
+                            return ApiKey, self.user_cache_ttl
                         except requests.exceptions.HTTPError as ex:
                             logger.warn(
                                 'Failed to set API key in the Agenda user {} Exception {}'.format(
                                     agenda_user.get('Email'), ex))
-                            return self._get_secret_token(destination)
+                            return None, None
                 else:
-                    return ApiKey
+                    return ApiKey, self.user_cache_ttl
             else:
                 logger.warn(
                     'Failed to match superdesk user with agenda user using email address {}'.format(user.get('email')))
+                return None, self.user_cache_negative_ttl
         logger.warn('Failed to get the superdesk user')
-        return self._get_secret_token(destination)
+        return None, None
 
-    def _get_entry_from_agenda(self, destination, id):
+    def _get_entry_from_agenda(self, destination, id, api_key=None):
         try:
             response = requests.get(self._get_assets_url(destination) + '/entry/' + str(id) + '?duplicateEntry=1',
-                                    headers=self._get_headers(destination, self.headers))
+                                    headers=self._get_headers(destination, self.headers, api_key))
             response.raise_for_status()
         except Exception as ex:
             logger.warn('Failed to get existing entry from, Exception {}'.format(ex))
             return None
         return json.loads(response.text)
 
-    def _swap_user_ids(self, item, destination):
+    def _swap_user_ids(self, item, destination, api_key=None):
         """Swap the Superdesk user for the Agenda Resource ID
 
         :param item:
+        :param destination:
+        :param api_key: Api Key of the publishing user
         :return:
         """
+        lookup = partial(self._find_resource_id, api_key=api_key)
         for coverage in item.get('Coverages', []):
             user_id = coverage.get('Resources', [{}])[0].get('ID')
             if user_id:
-                user = get_resource_service('users').find_one(req=None, _id=user_id)
-                if user:
-                    try:
-                        # Attempt to match the resource on first and last names and belonging to AAP
-                        response = requests.get(self._get_assets_url(destination) +
-                                                '/resource?q={} {}, AAP'.format(user.get('first_name'),
-                                                                                user.get('last_name')),
-                                                headers=self._get_headers(destination, self.headers))
-                        response.raise_for_status()
-                    except requests.exceptions.HTTPError as ex:
-                        logger.warn(
-                            'Exception on search for coverage resource {}, Exception {}'.format(user.get('email'), ex))
-                        coverage['Resources'] = None
-                        continue
-                    agenda_users = json.loads(response.text)
-                    # Make sure we find only one, if more than one we might choose the wrong one
-                    if len(agenda_users) == 1:
-                        coverage.get('Resources')[0]['ID'] = agenda_users[0].get('ID')
-                        continue
+                resource_id = self._get_cached_user_value(user_id, destination, 'resource', lookup)
+                if resource_id is not None:
+                    coverage.get('Resources')[0]['ID'] = resource_id
+                    continue
             # Remove the resources if we could not identify them.
             coverage['Resources'] = None
 
+    def _find_resource_id(self, user_id, destination, api_key=None):
+        """Match the Superdesk user with the Agenda Resource
+
+        :param user_id:
+        :param destination:
+        :param api_key: Api Key of the publishing user
+        :return: Resource ID, None if the user could not be matched, and how long the result can be cached for
+        """
+        user = get_resource_service('users').find_one(req=None, _id=user_id)
+        if not user:
+            return None, None
+        try:
+            # Attempt to match the resource on first and last names and belonging to AAP
+            response = requests.get(self._get_assets_url(destination) +
+                                    '/resource?q={} {}, AAP'.format(user.get('first_name'),
+                                                                    user.get('last_name')),
+                                    headers=self._get_headers(destination, self.headers, api_key))
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as ex:
+            logger.warn(
+                'Exception on search for coverage resource {}, Exception {}'.format(user.get('email'), ex))
+            return None, None
+        agenda_users = json.loads(response.text)
+        # Make sure we find only one, if more than one we might choose the wrong one
+        if len(agenda_users) == 1:
+            return agenda_users[0].get('ID'), self.user_cache_ttl
+        return None, self.user_cache_negative_ttl
+
     def _push_item(self, destination, data):
         # pop the ExternalIdentifier as the Superdesk planning id is to long for the Agenda database
         formatted_item = json.loads(data)
@@ -146,7 +237,7 @@ class HTTPAgendaPush(HTTPPushService):
         type = formatted_item.pop('Type')
         user_id = formatted_item.pop('PublishingUser')
 
-        self.user_api_key = self._get_user_api_key(user_id, destination)
+        api_key = self._get_user_api_key(user_id, destination)
         # Find the original item, test if it has an agenda id to determine if it's been published to agenda before
         service = get_resource_service('events') if type == 'event' else get_resource_service('planning')
         original = service.find_one(req=None, _id=id)
@@ -155,21 +246,27 @@ class HTTPAgendaPush(HTTPPushService):
                 formatted_item['ID'] = original.get('unique_id')
                 formatted_item['IsNew'] = False
                 # Get the item from agenda and copy the tags over
-                agenda_item = self._get_entry_from_agenda(destination, original.get('unique_id'))
+                agenda_item = self._get_entry_from_agenda(destination, original.get('unique_id'), api_key)
                 if agenda_item:
                     formatted_item['Tags'] = agenda_item.get('Tags')
             else:
                 formatted_item['IsNew'] = True
 
         # Attempt to swap he Superdesk user Id's for the Agenda Resource Id's
-        self._swap_user_ids(formatted_item, destination)
+        self._swap_user_ids(formatted_item, destination, api_key)
 
         agenda_entry = json.dumps(formatted_item)
 
         resource_url = self._get_assets_url(destination) + '/entry/saveentry?pScheduledEntryChangePolicy=1'
-        headers = self._get_headers(destination, self.headers)
+        headers = self._get_headers(destination, self.headers, api_key)
         try:
             response = requests.post(resource_url, data=agenda_entry, headers=headers)
+            if response.status_code in (401, 403) and api_key != self._get_secret_token(destination):
+                # the cached key of the user may have been changed in Agenda, look it up again and retry once
+                logger.warn('Agenda rejected the api key of user {}, status {}'.format(user_id, response.status_code))
+                self._evict_user_value(user_id, destination, 'api_key')
+                headers = self._get_headers(destination, self.headers, self._get_user_api_key(user_id, destination))
+                response = requests.post(resource_url, data=agenda_entry, headers=headers)
             response.raise_for_status()
         except Exception as ex:
             logger.exception(ex)
@@ -187,7 +284,6 @@ class HTTPAgendaPush(HTTPPushService):
             logger.exception(ex)
             message = 'Error pushing item %s: %s' % (response.status_code, response.text)
             self._raise_publish_error(response.status_code, Exception(message), destination)
-        self.user_api_key = None
 
     def _save_agenda_id(self, id, location, type):
         agendaId = location.split('/')[-1]
@@ -15,14 +15,16 @@ from httmock import urlmatch, HTTMock
 import json
 from .http_push_agenda import HTTPAgendaPush
 from planning import init_app as planning_init_app
+from aap.agenda import init_app as init_agenda
 from superdesk import get_resource_service
-from superdesk.errors import PublishHTTPPushServerError
+from superdesk.errors import PublishHTTPPushServerError, PublishHTTPPushClientError
 import requests
 
 
 class AgendaTransmit(TestCase):
     def setUp(self):
         planning_init_app(self.app)
+        init_agenda(self.app)
         self.setupRemoteSyncMock(self)
 
     def setupRemoteSyncMock(self, context):
@@ -94,6 +96,7 @@ class AgendaTransmit(TestCase):
 class AgendaFailUserSearchTransmit(TestCase):
     def setUp(self):
         planning_init_app(self.app)
+        init_agenda(self.app)
         self.setupRemoteSyncMock(self)
 
     def setupRemoteSyncMock(self, context):
@@ -142,6 +145,7 @@ class AgendaFailUserSearchTransmit(TestCase):
 class AgendaFaileToGetKeyTransmit(TestCase):
     def setUp(self):
         planning_init_app(self.app)
+        init_agenda(self.app)
         self.setupRemoteSyncMock(self)
 
     def setupRemoteSyncMock(self, context):
@@ -210,6 +214,7 @@ class AgendaFaileToGetKeyTransmit(TestCase):
 class AgendaFailToSaveEntryTransmit(TestCase):
     def setUp(self):
         planning_init_app(self.app)
+        init_agenda(self.app)
         self.setupRemoteSyncMock(self)
 
     def setupRemoteSyncMock(self, context):
@@ -276,3 +281,93 @@ class AgendaFailToSaveEntryTransmit(TestCase):
                 transmitter._push_item(destination, item)
         except Exception:
             self.fail('Expected exception type was not raised.')
+
+
+class AgendaUserCacheTransmit(TestCase):
+    def setUp(self):
+        planning_init_app(self.app)
+        init_agenda(self.app)
+        self.requests = []
+        self.mock = HTTMock(*[self.user_search, self.get_resource])
+        self.mock.__enter__()
+        self.addCleanup(self.mock.__exit__, None, None, None)
+        self.app.data.insert('users', [{'_id': 1, 'email': 'mock@mail.com.au', 'first_name': 'Billy',
+                                        'last_name': 'Fish'},
+                                       {'_id': 2, 'email': 'unknown@mail.com.au', 'first_name': 'Jane',
+                                        'last_name': 'Doe'}])
+        self.destination = {'config': {'secret_token': '123456', 'assets_url': 'http://bogus.aap.com.au/api'}}
+
+    @urlmatch(scheme='http', netloc='bogus.aap.com.au', path='/api/user/search')
+    def user_search(self, url, request):
+        self.requests.append(url.path)
+        resp = [{'IDUser': 1, 'ApiKey': 'UserKey'}] if 'mock@' in request.body else []
+        return {'status_code': 200, 'content': json.dumps(resp).encode('UTF-8')}
+
+    @urlmatch(scheme='http', netloc='bogus.aap.com.au', path='/api/resource')
+    def get_resource(self, url, request):
+        self.requests.append(url.path)
+        resp = [{'ID': 999}] if 'Billy' in url.query else []
+        return {'status_code': 200, 'content': json.dumps(resp).encode('UTF-8')}
+
+    def test_user_api_key_is_cached(self):
+        transmitter = HTTPAgendaPush()
+        self.assertEqual(transmitter._get_user_api_key(1, self.destination), 'UserKey')
+        self.assertEqual(transmitter._get_user_api_key(1, self.destination), 'UserKey')
+        self.assertEqual(transmitter._get_user_api_key(2, self.destination), '123456')
+        self.assertEqual(transmitter._get_user_api_key(2, self.destination), '123456')
+        self.assertEqual(len(self.requests), 2)
+
+        # the api keys are not stored in the database
+        self.assertEqual(HTTPAgendaPush()._get_user_api_key(1, self.destination), 'UserKey')
+        self.assertEqual(len(self.requests), 3)
+        self.assertIsNone(get_resource_service('agenda_user_cache').find_one(req=None, kind='api_key'))
+
+    def test_swap_user_ids_is_cached(self):
+        item = {'Coverages': [{'Resources': [{'ID': 1}]} for _ in range(10)] + [{'Resources': [{'ID': 2}]}]}
+        HTTPAgendaPush()._swap_user_ids(item, self.destination)
+        self.assertEqual([coverage['Resources'] for coverage in item['Coverages']],
+                         [[{'ID': 999}]] * 10 + [None])
+        self.assertEqual(len(self.requests), 2)
+
+
+class AgendaRejectedKeyTransmit(TestCase):
+    def setUp(self):
+        planning_init_app(self.app)
+        init_agenda(self.app)
+        self.keys = ['OldKey', 'NewKey']
+        self.saved_keys = []
+        self.mock = HTTMock(*[self.user_search, self.save_entry])
+        self.mock.__enter__()
+        self.addCleanup(self.mock.__exit__, None, None, None)
+        self.app.data.insert('users', [{'_id': 1, 'email': 'mock@mail.com.au'}])
+        self.app.data.insert('planning', [{'_id': '1234', 'type': 'planning'}])
+        self.destination = {'config': {'secret_token': '123456', 'assets_url': 'http://bogus.aap.com.au/api'}}
+
+    @urlmatch(scheme='http', netloc='bogus.aap.com.au', path='/api/user/search')
+    def user_search(self, url, request):
+        resp = [{'IDUser': 1, 'ApiKey': self.keys.pop(0)}]
+        return {'status_code': 200, 'content': json.dumps(resp).encode('UTF-8')}
+
+    @urlmatch(scheme='http', netloc='bogus.aap.com.au', path='/api/entry/saveentry')
+    def save_entry(self, url, request):
+        self.saved_keys.append(request.headers.get('x-agenda-api-key'))
+        if request.headers.get('x-agenda-api-key') == 'OldKey':
+            return {'status_code': 401}
+        return {'status_code': 200, 'headers': {'Location': 'x/9999'}}
+
+    def test_rejected_key_is_looked_up_again(self):
+        item = json.dumps({'ExternalIdentifier': '1234', 'Type': 'planning', 'PublishingUser': 1})
+        transmitter = HTTPAgendaPush()
+        transmitter._push_item(self.destination, item)
+        self.assertEqual(self.saved_keys, ['OldKey', 'NewKey'])
+        self.assertEqual(get_resource_service('planning').find_one(req=None, _id='1234').get('unique_id'), '9999')
+
+        # the new key is cached
+        self.assertEqual(transmitter._get_user_api_key(1, self.destination), 'NewKey')
+
+    def test_rejected_key_is_retried_once(self):
+        self.keys = ['OldKey', 'OldKey']
+        item = json.dumps({'ExternalIdentifier': '1234', 'Type': 'planning', 'PublishingUser': 1})
+        with self.assertRaises(PublishHTTPPushClientError):
+            HTTPAgendaPush()._push_item(self.destination, item)
+        self.assertEqual(self.saved_keys, ['OldKey', 'OldKey'])
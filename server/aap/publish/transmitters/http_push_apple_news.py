@@ -13,10 +13,12 @@ import json
 import base64
 import hmac
 import requests
+import threading
 from datetime import datetime
 from hashlib import sha256
+from urllib.parse import urlsplit
 from urllib3.fields import RequestField
-from urllib3.filepost import encode_multipart_formdata
+from urllib3.filepost import choose_boundary
 from superdesk import app
 from superdesk.publish.publish_service import PublishService
 from superdesk.publish import register_transmitter
@@ -28,6 +30,78 @@ from superdesk.metadata.item import ITEM_STATE, CONTENT_STATE
 errors = [PublishHTTPPushError.httpPushError().get_error_description()]
 logger = logging.getLogger(__name__)
 
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """Get the session for the host of the url
+
+    The session is shared by the items pushed to the host, so the connections are kept alive and the TLS sessions
+    are reused rather than opened for each item.
+
+    :param str url:
+    :return requests.Session: session
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = requests.Session()
+        return session
+
+
+class MultipartBody():
+    """Multipart form data body read part by part.
+
+    The parts are bytes, text or file like objects; the file like objects, the media of the header image, are read in
+    chunks each time the body is iterated, so the body can be signed and sent without reading the whole image into
+    memory. The body is the same as ``urllib3.filepost.encode_multipart_formdata`` of the parts.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, boundary=None):
+        self.boundary = boundary or choose_boundary()
+        self._parts = []
+        self._length = len(self._closing_boundary())
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    def add_part(self, part, length=None):
+        """Add the part to the body
+
+        :param RequestField part: part with the text, bytes or file like object as data
+        :param int length: length of the file like object
+        """
+        data = part.data.encode('utf-8') if isinstance(part.data, str) else part.data
+        head = ('--%s\r\n' % self.boundary).encode() + part.render_headers().encode('utf-8')
+        self._parts.append((head, data))
+        self._length += len(head) + (len(data) if isinstance(data, bytes) else length) + 2
+
+    def _closing_boundary(self):
+        return ('--%s--\r\n' % self.boundary).encode()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for head, data in self._parts:
+            yield head
+            if isinstance(data, bytes):
+                yield data
+            else:
+                data.seek(0)
+                chunk = data.read(self.chunk_size)
+                while chunk:
+                    yield chunk
+                    chunk = data.read(self.chunk_size)
+            yield b'\r\n'
+        yield self._closing_boundary()
+
 
 class HTTPAppleNewsPush(PublishService):
     headers = {"Accept": "application/json"}
@@ -44,7 +118,10 @@ class HTTPAppleNewsPush(PublishService):
         api_secret = self._get_api_secret(destination)
         api_key = self._get_api_key(destination)
         key = base64.b64decode(api_secret)
-        hashed_value = hmac.new(key, data.get('request'), sha256)
+        request = data.get('request')
+        hashed_value = hmac.new(key, digestmod=sha256)
+        for chunk in [request] if isinstance(request, bytes) else request:
+            hashed_value.update(chunk)
         signature = base64.b64encode(hashed_value.digest()).decode()
         headers = {
             'authorization': 'HHMAC; key=%s; signature=%s; date=%s' % (api_key, signature, data.get('current_date'))
@@ -84,25 +161,25 @@ class HTTPAppleNewsPush(PublishService):
 
         # generate body and content type for request
         content_type = 'application/json'
-        body = b''
+        body = MultipartBody()
         if item.get(ITEM_STATE) not in {CONTENT_STATE.RECALLED, CONTENT_STATE.KILLED}:
-            parts = []
             if subscriber_reference:
                 # if the item is already published then we need revision
                 metadata['data'] = {
                     'revision': subscriber_reference.get('extra').get('data').get('revision'),
                 }
                 metadata_payload = json.dumps(metadata)
-                parts = [self._part('metadata', metadata_payload, len(metadata_payload), 'application/json')]
+                body.add_part(self._part('metadata', metadata_payload, len(metadata_payload), 'application/json'))
 
             payload = json.dumps(data)
-            parts.append(self._part('article.json', payload, len(payload), 'application/json'))
+            body.add_part(self._part('article.json', payload, len(payload), 'application/json'))
 
             binary = self._get_media(self._get_header_image_rendition(destination), item)
             if binary:
-                parts.append(self._part('header.jpg', binary.read(), binary.length, 'image/jpeg'))
-            body, content_type = encode_multipart_formdata(parts)
-            canonical_request = self._get_canonical_request(method, url, current_date, content_type, body)
+                # the image is streamed from the media storage when the body is signed and sent
+                body.add_part(self._part('header.jpg', binary, binary.length, 'image/jpeg'), binary.length)
+            content_type = body.content_type
+            canonical_request = self._iter_canonical_request(method, url, current_date, content_type, body)
         else:
             canonical_request = self._get_canonical_request(method, url, current_date)
 
@@ -114,9 +191,9 @@ class HTTPAppleNewsPush(PublishService):
 
         try:
             response = None
+            session = get_session(url)
             if item.get(ITEM_STATE) not in {CONTENT_STATE.RECALLED, CONTENT_STATE.KILLED}:
                 headers['Content-Type'] = content_type
-                session = requests.Session()
                 req = requests.Request(method, url=url, headers=headers, data=body)
                 prepared_request = req.prepare()
                 response = session.send(prepared_request)
@@ -131,7 +208,7 @@ class HTTPAppleNewsPush(PublishService):
                     apple_article.get('data').get('id')
                 )
             else:
-                response = requests.delete(url, headers=headers)
+                response = session.delete(url, headers=headers)
                 response.raise_for_status()
 
             logging.info('Apple News: Successfully transmitted {}.'.format(item.get('item_id')))
@@ -170,6 +247,11 @@ class HTTPAppleNewsPush(PublishService):
         """Get the canonical request"""
         return method.encode() + url.encode() + date.encode() + content_type.encode() + body
 
+    def _iter_canonical_request(self, method, url, date, content_type, body):
+        """Get the canonical request in chunks, the body is read part by part"""
+        yield self._get_canonical_request(method, url, date, content_type)
+        yield from body
+
     def _get_channel(self, destination):
         """Get the channel"""
         return destination.get('config', {}).get('channel')
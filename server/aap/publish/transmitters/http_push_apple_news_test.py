@@ -8,6 +8,7 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import io
 import json
 import hmac
 import base64
@@ -15,7 +16,8 @@ from httmock import all_requests, HTTMock
 from mock import patch, Mock, MagicMock
 from superdesk.tests import TestCase
 from datetime import datetime
-from .http_push_apple_news import HTTPAppleNewsPush
+from urllib3.filepost import encode_multipart_formdata
+from .http_push_apple_news import HTTPAppleNewsPush, MultipartBody, get_session
 from superdesk.errors import PublishHTTPPushClientError
 from hashlib import sha256
 
@@ -224,3 +226,31 @@ class HttpAppleNewsPushTestCase(TestCase):
                 self.assertTrue('HTTP push publish client error' in str(context.exception))
                 self.assertTrue('Failed to process request' in str(context.exception.system_exception))
                 self.assertEqual(context.exception.status_code, 400)
+
+    def test_multipart_body_streams_media(self):
+        image = b'\xff\xd8' + b'0123456789' * 20000
+        media = io.BytesIO(image)
+        payload = json.dumps({'test': '1'})
+        body = MultipartBody(boundary='foo')
+        body.add_part(self.http_push._part('article.json', payload, len(payload), 'application/json'))
+        body.add_part(self.http_push._part('header.jpg', media, len(image), 'image/jpeg'), len(image))
+
+        expected, content_type = encode_multipart_formdata([
+            self.http_push._part('article.json', payload, len(payload), 'application/json'),
+            self.http_push._part('header.jpg', image, len(image), 'image/jpeg')
+        ], boundary='foo')
+        self.assertEqual(b''.join(body), expected)
+        self.assertEqual(b''.join(body), expected)
+        self.assertEqual(len(body), len(expected))
+        self.assertEqual(body.content_type, content_type)
+
+        canonical_request = self.http_push._get_canonical_request('POST', 'url', 'date', content_type, expected)
+        self.assertEqual(
+            b''.join(self.http_push._iter_canonical_request('POST', 'url', 'date', content_type, body)),
+            canonical_request
+        )
+
+    def test_session_per_host(self):
+        session = get_session('https://news-api.apple.com/channels/channel1234/articles')
+        self.assertIs(session, get_session('https://news-api.apple.com/articles/foo'))
+        self.assertIsNot(session, get_session('https://example.com/articles/foo'))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from eve.utils import config
+from flask import current_app as app
+from superdesk.celery_app import celery
+from superdesk.celery_task_utils import get_lock_id
+from superdesk.lock import lock, unlock
+from superdesk.profiling import ProfileManager
+from superdesk.publish.publish_content import get_queue_subscribers, get_queue_items, transmit_item
+
+logger = logging.getLogger(__name__)
+
+#: Items transmitted at the same time by each destination of these delivery types, the other types send one at a time
+DESTINATION_CONCURRENCY = {
+    'socket': 1,
+    'http_agenda_push': 4,
+    'http_push_apple_news': 4
+}
+
+
+class TransmitRunner():
+    """Transmit the pending queue items of many destinations concurrently.
+
+    The items of each destination are sent by their own coroutine, so a slow subscriber only holds up its own items.
+    The versions of a story are sent in order, different stories of a destination are sent at the same time up to the
+    concurrency of its delivery type. The transmitters block, so the items are sent by a pool of ``concurrency``
+    threads, and no more items are handed to the pool than it has threads.
+
+    Each item is sent by the core ``transmit_item``, which sets the state of the queue item and schedules the retries.
+
+    :param flask.Flask app: app pushed in the threads
+    :param int concurrency: number of threads
+    :param dict destination_concurrency: items sent at the same time by a destination, by delivery type
+    """
+
+    def __init__(self, app, concurrency=16, destination_concurrency=None):
+        self.app = app
+        self.concurrency = concurrency
+        self.destination_concurrency = destination_concurrency or DESTINATION_CONCURRENCY
+
+    def run(self, queue_items, on_subscriber_done=None):
+        """Transmit the queue items
+
+        :param list queue_items: queue items, in the order they are sent to each destination
+        :param on_subscriber_done: called with the subscriber id once all the items of the subscriber are sent
+        """
+        subscribers = OrderedDict()
+        for queue_item in queue_items:
+            destinations = subscribers.setdefault(str(queue_item.get('subscriber_id')), OrderedDict())
+            destinations.setdefault(self._get_destination_key(queue_item), []).append(queue_item)
+
+        if not subscribers:
+            return
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            loop.run_until_complete(self._run(loop, executor, subscribers, on_subscriber_done))
+        finally:
+            executor.shutdown(wait=True)
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    async def _run(self, loop, executor, subscribers, on_subscriber_done):
+        slots = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*[self._run_subscriber(loop, executor, slots, subscriber, destinations,
+                                                    on_subscriber_done)
+                               for subscriber, destinations in subscribers.items()])
+
+    async def _run_subscriber(self, loop, executor, slots, subscriber, destinations, on_subscriber_done):
+        try:
+            await asyncio.gather(*[self._run_destination(loop, executor, slots, items)
+                                   for items in destinations.values()])
+        finally:
+            if on_subscriber_done:
+                on_subscriber_done(subscriber)
+
+    async def _run_destination(self, loop, executor, slots, queue_items):
+        stories = OrderedDict()
+        for queue_item in queue_items:
+            stories.setdefault(queue_item.get('item_id'), []).append(queue_item)
+
+        delivery_type = queue_items[0].get('destination', {}).get('delivery_type')
+        destination_slots = asyncio.Semaphore(self.destination_concurrency.get(delivery_type, 1))
+        await asyncio.gather(*[self._run_story(loop, executor, slots, destination_slots, items)
+                               for items in stories.values()])
+
+    async def _run_story(self, loop, executor, slots, destination_slots, queue_items):
+        for queue_item in queue_items:
+            async with destination_slots:
+                async with slots:
+                    await loop.run_in_executor(executor, self._transmit, queue_item[config.ID_FIELD])
+
+    def _transmit(self, queue_item_id):
+        with self.app.app_context():
+            try:
+                transmit_item(queue_item_id)
+            except Exception:
+                logger.exception('Failed to transmit queue item {}'.format(queue_item_id))
+
+    def _get_destination_key(self, queue_item):
+        destination = queue_item.get('destination', {})
+        return str(queue_item.get('subscriber_id')), destination.get('name'), destination.get('delivery_type')
+
+
+@celery.task(soft_time_limit=1800)
+def transmit():
+    """Transmit the pending queue items of all the subscribers with the TransmitRunner
+
+    It takes the lock of the core ``publish`` task while it collects the queue items, and the lock of each subscriber
+    it transmits until the items of the subscriber are sent, so it does not send the items the core tasks are sending.
+    The lock of the task is released before the items are sent, so the next run sends the items of the other
+    subscribers while a slow subscriber is still sending.
+    """
+    with ProfileManager('publish:transmit'):
+        lock_name = get_lock_id('Transmit', 'Articles')
+        if not lock(lock_name, expire=1810):
+            logger.info('Task: {} is already running.'.format(lock_name))
+            return
+
+        subscriber_locks = OrderedDict()
+        queue_items = []
+        try:
+            try:
+                for priority in [True, False]:  # top priority first
+                    for retries in [False, True]:  # first publish pending, retries after
+                        queue_items.extend(_get_subscribers_items(subscriber_locks, retries, priority))
+            finally:
+                unlock(lock_name)
+
+            # the runner releases the subscribers as their items are sent
+            sending = {str(queue_item.get('subscriber_id')) for queue_item in queue_items}
+            for subscriber in [subscriber for subscriber in subscriber_locks if subscriber not in sending]:
+                _unlock_subscriber(subscriber_locks, subscriber)
+
+            runner = TransmitRunner(app._get_current_object(),
+                                    concurrency=app.config.get('TRANSMIT_RUNNER_CONCURRENCY', 16))
+            runner.run(queue_items, on_subscriber_done=partial(_unlock_subscriber, subscriber_locks))
+        except Exception:
+            logger.exception('Task: {} failed.'.format(lock_name))
+        finally:
+            for subscriber in list(subscriber_locks):
+                _unlock_subscriber(subscriber_locks, subscriber)
+
+
+def _get_subscribers_items(subscriber_locks, retries, priority):
+    """Get the queue items of the subscribers, the subscribers being sent by another task are skipped
+
+    :param dict subscriber_locks: lock names of the subscribers locked by the task, by subscriber id
+    :return list: queue items
+    """
+    queue_items = []
+    for subscriber in get_queue_subscribers(priority=priority, retries=retries):
+        subscriber = str(subscriber)
+        if subscriber not in subscriber_locks:
+            subscriber_lock = get_lock_id('Subscriber', 'Transmit', subscriber)
+            if not lock(subscriber_lock, expire=1810):
+                continue
+            subscriber_locks[subscriber] = subscriber_lock
+        queue_items.extend(get_queue_items(retries, subscriber, priority))
+    return queue_items
+
+
+def _unlock_subscriber(subscriber_locks, subscriber):
+    subscriber_lock = subscriber_locks.pop(subscriber, None)
+    if subscriber_lock:
+        unlock(subscriber_lock)
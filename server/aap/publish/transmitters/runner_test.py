@@ -0,0 +1,151 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import json
+import threading
+from unittest import TestCase, mock
+
+from flask import Flask
+
+from .http_push_agenda import HTTPAgendaPush
+from .runner import TransmitRunner, transmit
+
+
+def queue_item(_id, subscriber_id, item_id, delivery_type='socket'):
+    return {'_id': _id, 'subscriber_id': subscriber_id, 'item_id': item_id,
+            'destination': {'name': subscriber_id, 'delivery_type': delivery_type}}
+
+
+class TransmitRunnerTest(TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.sent = []
+
+    def test_slow_destination(self):
+        fast_sent = threading.Event()
+
+        def transmit_item(queue_item_id):
+            if queue_item_id == 'slow':
+                self.assertTrue(fast_sent.wait(5))
+            else:
+                fast_sent.set()
+            self.sent.append(queue_item_id)
+
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=transmit_item):
+            TransmitRunner(self.app, concurrency=2).run([queue_item('slow', 'a', 1), queue_item('fast', 'b', 2)])
+
+        self.assertEqual(self.sent, ['fast', 'slow'])
+
+    def test_story_versions_in_order(self):
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=self.sent.append):
+            TransmitRunner(self.app).run([queue_item(_id, 'a', 1, 'http_agenda_push') for _id in range(10)])
+
+        self.assertEqual(self.sent, list(range(10)))
+
+    def test_destination_concurrency(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def transmit_item(queue_item_id):
+            with lock:
+                running.append(queue_item_id)
+                peak.append(len(running))
+                if len(running) == 2:
+                    release.set()
+            release.wait(1)
+            with lock:
+                running.remove(queue_item_id)
+
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=transmit_item):
+            TransmitRunner(self.app, destination_concurrency={'http_agenda_push': 2}).run(
+                [queue_item(_id, 'a', _id, 'http_agenda_push') for _id in range(6)])
+
+        self.assertEqual(max(peak), 2)
+
+    def test_agenda_users_pushed_at_once(self):
+        transmitter = HTTPAgendaPush()
+        destination = {'config': {'secret_token': '123456', 'assets_url': 'http://bogus.aap.com.au/api'}}
+        both_posted = threading.Barrier(2, timeout=5)
+        posted = {}
+
+        def post(url, data=None, headers=None):
+            # both items are being posted before the headers are checked
+            both_posted.wait()
+            posted[json.loads(data)['Title']] = headers.get('x-agenda-api-key')
+            return mock.Mock(status_code=200, headers={})
+
+        def transmit_item(queue_item_id):
+            transmitter._push_item(destination, json.dumps({'ExternalIdentifier': queue_item_id, 'Type': 'planning',
+                                                            'PublishingUser': queue_item_id, 'Title': queue_item_id}))
+
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=transmit_item), \
+                mock.patch.object(transmitter, '_get_user_api_key', side_effect=lambda user_id, _: 'key-' + user_id), \
+                mock.patch('aap.publish.transmitters.http_push_agenda.get_resource_service',
+                           return_value=mock.Mock(find_one=mock.Mock(return_value=None))), \
+                mock.patch('aap.publish.transmitters.http_push_agenda.requests.post', side_effect=post):
+            TransmitRunner(self.app).run([queue_item('user1', 'a', 1, 'http_agenda_push'),
+                                          queue_item('user2', 'a', 2, 'http_agenda_push')])
+
+        self.assertEqual(posted, {'user1': 'key-user1', 'user2': 'key-user2'})
+
+    def test_errors_are_logged(self):
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=Exception('failed')):
+            with mock.patch('aap.publish.transmitters.runner.logger') as logger:
+                TransmitRunner(self.app).run([queue_item(1, 'a', 1), queue_item(2, 'b', 2)])
+
+        self.assertEqual(logger.exception.call_count, 2)
+
+    def test_slow_subscriber_does_not_block_next_run(self):
+        locks = set()
+        pending = {'a': [queue_item('slow', 'a', 1)]}
+        slow_started = threading.Event()
+        release = threading.Event()
+
+        def lock(name, expire=None):
+            if name in locks:
+                return False
+            locks.add(name)
+            return True
+
+        def transmit_item(queue_item_id):
+            if queue_item_id == 'slow':
+                slow_started.set()
+                self.assertTrue(release.wait(5))
+            self.sent.append(queue_item_id)
+
+        def run_transmit():
+            with self.app.app_context():
+                transmit.run()
+
+        def get_queue_subscribers(priority=None, retries=False):
+            return list(pending) if priority is False and not retries else []
+
+        with mock.patch('aap.publish.transmitters.runner.transmit_item', side_effect=transmit_item), \
+                mock.patch('aap.publish.transmitters.runner.lock', side_effect=lock), \
+                mock.patch('aap.publish.transmitters.runner.unlock', side_effect=lambda name: locks.discard(name)), \
+                mock.patch('aap.publish.transmitters.runner.get_queue_subscribers', get_queue_subscribers), \
+                mock.patch('aap.publish.transmitters.runner.get_queue_items',
+                           side_effect=lambda retries, subscriber, priority: pending[subscriber]):
+            slow_run = threading.Thread(target=run_transmit)
+            slow_run.start()
+            self.assertTrue(slow_started.wait(5))
+
+            # the next run sends the items of the other subscribers, and skips the subscriber still sending
+            pending['b'] = [queue_item('fast', 'b', 2)]
+            run_transmit()
+            self.assertEqual(self.sent, ['fast'])
+
+            release.set()
+            slow_run.join(5)
+
+        self.assertEqual(self.sent, ['fast', 'slow'])
+        self.assertEqual(locks, set())
@@ -11,32 +11,128 @@
 from superdesk.publish import register_transmitter
 from superdesk.publish.publish_service import PublishService
 from aap.errors import PublishSocketError
+import select
 import socket
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 errors = [PublishSocketError.socketConnectionError().get_error_description(),
           PublishSocketError.socketSendError().get_error_description()]
 
 
+class SocketPool():
+    """Pool of long lived connections, by address and port.
+
+    A connection is returned to the pool after a complete send and reused by the next item for the same address and
+    port. Connections idle for more than ``idle_timeout`` seconds are closed, well before the servers drop idle
+    connections, and a connection is checked before it is reused: if the server closed or reset it, or sent anything,
+    it is dropped and another one is used.
+    """
+
+    idle_timeout = 15
+    max_idle = 4
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, server_address):
+        """Get an idle healthy connection to the address, or a new one
+
+        :param tuple server_address: address and port
+        :return: tuple of the socket and whether it was reused from the pool
+        """
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._idle.get(server_address)
+                if not idle:
+                    break
+                sock, released = idle.pop()
+
+            if now - released < self.idle_timeout and self._is_healthy(sock):
+                return sock, True
+            sock.close()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.connect(server_address)
+        except Exception:
+            sock.close()
+            raise
+        return sock, False
+
+    def release(self, server_address, sock):
+        """Return the connection to the pool, it is closed if the pool of the address is full
+
+        :param tuple server_address: address and port
+        :param sock: socket
+        """
+        with self._lock:
+            idle = self._idle.setdefault(server_address, [])
+            if len(idle) < self.max_idle:
+                idle.append((sock, time.monotonic()))
+                return
+        sock.close()
+
+    def clear(self):
+        """Close all the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for sock, _released in connections:
+                sock.close()
+
+    def _is_healthy(self, sock):
+        try:
+            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                return False
+            readable, _writable, _errored = select.select([sock], [], [], 0)
+            if not readable:
+                return True
+            # the endpoints never write to the stream, peek to tell a close by the server, which reads no data, from
+            # data sent by the server, which leaves the stream in an unknown state
+            sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            # readable but there is nothing to read
+            return True
+        except Exception:
+            return False
+        return False
+
+
+socket_pool = SocketPool()
+
+
 class SocketPublishService(PublishService):
     """Socket publish service
 
     The service will establish a socket connection to the configured address on the configured port. It will write the
     Item to the stream then disconnect.
+
+    If ``keep_alive`` is set in the destination config the connection is kept open in the pool and reused by the
+    following items for the address and port. If the send fails on a reused connection the item is sent again on a
+    new connection.
+
+    A complete send only means the item was written to the local buffer, if the server drops a reused connection
+    without closing it, e.g. when it restarts, the item is lost and is not sent again.
     """
 
     def _transmit(self, queue_item, subscriber):
         destination = queue_item.get('destination', {})
         config = destination.get('config', {})
-        address = config.get('address')
-        port = int(config.get('port'))
+        server_address = (config.get('address'), int(config.get('port')))
+
+        if config.get('keep_alive'):
+            self._send_pooled(server_address, queue_item, destination)
+            return
 
         # Create a TCP/IP socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
         # Connect the socket to the port on the server given by the caller
-        server_address = (address, port)
         try:
             sock.connect(server_address)
         except Exception as ex:
@@ -51,5 +147,25 @@ class SocketPublishService(PublishService):
         finally:
             sock.close()
 
+    def _send_pooled(self, server_address, queue_item, destination):
+        """Send the item on a pooled connection, it is sent again on a new connection if a reused one fails"""
+        try:
+            sock, reused = socket_pool.acquire(server_address)
+        except Exception as ex:
+            raise PublishSocketError.socketConnectionError(exception=ex, destination=destination)
+
+        try:
+            sock.sendall(queue_item['encoded_item'])
+        except Exception as ex:
+            sock.close()
+            if not reused:
+                raise PublishSocketError.socketSendError(exception=ex, destination=destination)
+
+            # the pooled connection went stale, the item is sent again on a new one
+            logger.info('Reconnecting to socket destination {}:{}'.format(*server_address))
+            return self._send_pooled(server_address, queue_item, destination)
+
+        socket_pool.release(server_address, sock)
+
 
 register_transmitter('socket', SocketPublishService(), errors)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+from superdesk import get_resource_service, signals
+from aap.utils import is_fact_check
+from .resource import RevisionHistoryResource
+from .service import RevisionHistoryService
+
+
+def on_item_published(sender, item, **kwargs):
+    """Record the revision of the published, corrected, killed or taken down fact check"""
+    if is_fact_check(item):
+        get_resource_service('revision_history').add_revision(item)
+
+
+def init_app(app):
+    endpoint_name = 'revision_history'
+    service = RevisionHistoryService(endpoint_name, backend=superdesk.get_backend())
+    RevisionHistoryResource(endpoint_name, app=app, service=service)
+    signals.item_published.connect(on_item_published)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk.resource import Resource
+
+
+class RevisionHistoryResource(Resource):
+    schema = {
+        # superdesk id of the item
+        'item_id': {
+            'type': 'string'
+        },
+        # published revisions of the item, see service.get_revision
+        'revisions': {
+            'type': 'list',
+            'schema': {'type': 'dict'}
+        }
+    }
+    internal_resource = True
+    mongo_indexes = {
+        'item_id_1': ([('item_id', 1)], {'unique': True})
+    }
+    item_methods = []
+    resource_methods = []
@@ -0,0 +1,87 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from eve.utils import config
+from superdesk.services import BaseService
+from superdesk.metadata.item import ITEM_STATE, CONTENT_STATE
+
+
+REVISION_STATES = {CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED, CONTENT_STATE.KILLED, CONTENT_STATE.RECALLED}
+
+
+def get_revision(item):
+    """Get the revision entry of a published version of the item
+
+    :param dict item: archive or published item
+    :return dict: revision
+    """
+    return {
+        'version': item.get(config.VERSION),
+        ITEM_STATE: item.get(ITEM_STATE),
+        'firstpublished': item.get('firstpublished'),
+        'versioncreated': item.get('versioncreated'),
+        'ednote': item.get('ednote')
+    }
+
+
+class RevisionHistoryService(BaseService):
+    """Timeline of the published revisions of an item, one document per item.
+
+    A revision is appended each time the item is published, corrected, killed or taken down, so the revision
+    history is read from one small document rather than searching the published and archived items.
+    """
+
+    def get_revisions(self, item_id):
+        """Get the revisions of the item in the order they were published
+
+        :param str item_id:
+        :return list: revisions, None if the history of the item has not been recorded
+        """
+        history = self.find_one(req=None, item_id=item_id)
+        if not history:
+            return None
+        return sorted(history.get('revisions') or [], key=lambda revision: revision.get('version') or 0)
+
+    def add_revision(self, item):
+        """Append the revision of the item, a revision already in the history is not added again
+
+        The history is started by the first publish of the item. The history of an item published before the
+        revisions were recorded is not started by a later revision, it is recorded by ``set_revisions`` from the
+        published and archived items instead.
+
+        :param dict item: archive or published item
+        """
+        if item.get(ITEM_STATE) not in REVISION_STATES:
+            return
+
+        item_id = str(item.get('item_id') or item.get(config.ID_FIELD))
+        revision = get_revision(item)
+        if item.get(ITEM_STATE) == CONTENT_STATE.PUBLISHED:
+            self.find_and_modify(
+                query={'item_id': item_id},
+                update={'$setOnInsert': {'item_id': item_id, 'revisions': []}},
+                upsert=True
+            )
+        self.find_and_modify(
+            query={'item_id': item_id, 'revisions.version': {'$ne': revision['version']}},
+            update={'$push': {'revisions': revision}}
+        )
+
+    def set_revisions(self, item_id, items):
+        """Record the history of an item published before the revisions were recorded
+
+        :param str item_id:
+        :param list items: published versions of the item
+        """
+        self.find_and_modify(
+            query={'item_id': str(item_id)},
+            update={'$set': {'revisions': [get_revision(item) for item in items]}},
+            upsert=True
+        )
@@ -0,0 +1,49 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittests import AAPTestCase
+from superdesk import get_resource_service
+from superdesk.utc import utcnow
+
+
+class RevisionHistoryServiceTest(AAPTestCase):
+    def setUp(self):
+        self.service = get_resource_service('revision_history')
+        self.item = {'_id': 'urn:1', '_current_version': 2, 'state': 'published', 'firstpublished': utcnow(),
+                     'versioncreated': utcnow()}
+
+    def test_history_not_recorded(self):
+        self.assertIsNone(self.service.get_revisions('urn:1'))
+
+    def test_add_revision(self):
+        self.service.add_revision(self.item)
+        self.service.add_revision(self.item)
+        self.service.add_revision(dict(self.item, _current_version=4, state='corrected', ednote='fixed'))
+        self.service.add_revision(dict(self.item, _current_version=5, state='scheduled'))
+
+        revisions = self.service.get_revisions('urn:1')
+        self.assertEqual([rev['version'] for rev in revisions], [2, 4])
+        self.assertEqual([rev['state'] for rev in revisions], ['published', 'corrected'])
+        self.assertEqual(revisions[1]['ednote'], 'fixed')
+
+    def test_set_revisions(self):
+        self.service.set_revisions('urn:1', [self.item])
+        self.service.set_revisions('urn:1', [self.item, dict(self.item, _current_version=3, state='killed')])
+        self.assertEqual([rev['version'] for rev in self.service.get_revisions('urn:1')], [2, 3])
+
+    def test_add_revision_without_history(self):
+        # an item published before the revisions were recorded, and corrected after
+        corrected = dict(self.item, _current_version=4, state='corrected')
+        self.service.add_revision(corrected)
+        self.assertIsNone(self.service.get_revisions('urn:1'))
+
+        self.service.set_revisions('urn:1', [self.item, corrected])
+        self.service.add_revision(dict(self.item, _current_version=5, state='corrected'))
+        self.assertEqual([rev['version'] for rev in self.service.get_revisions('urn:1')], [2, 4, 5])
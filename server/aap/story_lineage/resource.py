@@ -0,0 +1,48 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk.resource import Resource
+
+
+class StoryLineageResource(Resource):
+    schema = {
+        # source, slugline and headline of the story, normalised
+        'source': {
+            'type': 'string'
+        },
+        'slugline': {
+            'type': 'string'
+        },
+        'headline': {
+            'type': 'string'
+        },
+        # ingested guids of the original versions of the story, each expires with its ingested item
+        'originals': {
+            'type': 'list',
+            'schema': {
+                'type': 'dict',
+                'schema': {
+                    'guid': {'type': 'string'},
+                    'expiry': {'type': 'datetime'}
+                }
+            }
+        },
+        # expiry of the last original to expire
+        'expiry': {
+            'type': 'datetime'
+        }
+    }
+    internal_resource = True
+    mongo_indexes = {
+        'source_1_slugline_1_headline_1': ([('source', 1), ('slugline', 1), ('headline', 1)], {'unique': True}),
+        'expiry_1': ([('expiry', 1)], {'expireAfterSeconds': 0})
+    }
+    item_methods = []
+    resource_methods = []
@@ -0,0 +1,82 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from superdesk.services import BaseService
+from superdesk.utc import utcnow
+
+
+def normalise(value):
+    """Normalise the slugline or headline of a story, case and runs of whitespace are ignored
+
+    :param str value:
+    :return str: normalised value
+    """
+    return ' '.join((value or '').split()).lower()
+
+
+class StoryLineageService(BaseService):
+    """Original versions of the stories, by source, slugline and headline.
+
+    Later versions of a story, like the AP write-thrus, resolve the guid of the original with a keyed lookup.
+    """
+
+    def _get_key(self, source, slugline, headline):
+        return {'source': normalise(source), 'slugline': normalise(slugline), 'headline': normalise(headline)}
+
+    def get_original_guids(self, source, slugline, headline):
+        """Get the guids of the original versions of the story that are still in ingest
+
+        :param str source:
+        :param str slugline:
+        :param str headline:
+        :return list: guids, None if the lineage of the story is not recorded or all its originals have expired
+        """
+        lineage = self.find_one(req=None, **self._get_key(source, slugline, headline))
+        now = utcnow()
+        guids = [original.get('guid') for original in (lineage or {}).get('originals') or []
+                 if original.get('expiry') and original['expiry'] > now]
+        return guids or None
+
+    def add_original(self, source, slugline, headline, guid, expiry):
+        """Record an original version of the story whose lineage is recorded
+
+        The lineage of a story is recorded from ingest by ``set_originals``, so an original is not added to a story
+        whose lineage is not recorded.
+
+        :param str source:
+        :param str slugline:
+        :param str headline:
+        :param str guid: ingested guid of the original
+        :param datetime expiry: expiry of the ingested original
+        """
+        key = self._get_key(source, slugline, headline)
+        self.find_and_modify(
+            query=key,
+            update={'$pull': {'originals': {'$or': [{'guid': guid}, {'expiry': {'$lte': utcnow()}}]}}}
+        )
+        self.find_and_modify(
+            query=key,
+            update={'$push': {'originals': {'guid': guid, 'expiry': expiry}}, '$max': {'expiry': expiry}}
+        )
+
+    def set_originals(self, source, slugline, headline, originals):
+        """Record the original versions of a story found in ingest
+
+        :param str source:
+        :param str slugline:
+        :param str headline:
+        :param list originals: ingested guids of the originals with their expiry
+        """
+        self.find_and_modify(
+            query=self._get_key(source, slugline, headline),
+            update={'$set': {'originals': originals,
+                             'expiry': max(original['expiry'] for original in originals)}},
+            upsert=True
+        )
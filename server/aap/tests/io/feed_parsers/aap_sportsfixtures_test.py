@@ -13,6 +13,7 @@ from superdesk.etree import etree
 from aap.io.feed_parsers.aap_sportsfixtures import AAPSportsFixturesParser
 from superdesk.tests import TestCase
 from planning import init_app as planning_init_app
+from aap.geocode import init_app as geocode_init_app
 
 
 class SportsAPITestCase(TestCase):
@@ -81,6 +82,7 @@ class SportsAPITestCase(TestCase):
 
     def setUp(self):
         planning_init_app(self.app)
+        geocode_init_app(self.app)
         self.app.data.insert('vocabularies', self.vocab)
         self.app.data.insert('locations', self.location)
 
@@ -95,6 +97,24 @@ class SportsAPITestCase(TestCase):
             items = AAPSportsFixturesParser().parse(fixture, None)
             self.assertTrue(len(items) == 5)
 
+    def test_fixtures_already_ingested(self):
+        filename = 'aap_soccer.xml'
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        fixture = os.path.normpath(os.path.join(dirname, '../fixtures', filename))
+        with open(fixture, 'rb') as f:
+            self.xml = f.read()
+            fixture = {'fixture_xml': etree.fromstring(self.xml), 'sport_id': '4',
+                       'sport_name': 'Soccer', 'comp_name': 'Qualifiers', 'comp_id': 'int-314'}
+            items = AAPSportsFixturesParser().parse(fixture, None)
+            self.assertTrue(all('firstcreated' in item for item in items))
+            self.app.data.insert('events', [{'guid': items[0]['guid'], 'version_creator': 'user'},
+                                            {'guid': items[1]['guid']}])
+
+            items = AAPSportsFixturesParser().parse(fixture, None)
+            self.assertEqual(len(items), 4)
+            self.assertNotIn('firstcreated', items[0])
+            self.assertIn('firstcreated', items[1])
+
     def test_fixture_list_with_dates(self):
         filename = 'aap_golf.xml'
         dirname = os.path.dirname(os.path.realpath(__file__))
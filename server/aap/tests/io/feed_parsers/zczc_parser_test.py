@@ -86,6 +86,19 @@ class ZCZCTestCase(TestCase):
         self.assertEqual(self.items.get('subject')[0]['qcode'], '15039001')
         self.assertIn('versioncreated', self.items)
 
+    def test_multi_story(self):
+        filename = 'zczc_multi_story.tst'
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        fixture = os.path.normpath(os.path.join(dirname, '../fixtures', filename))
+        self.assertTrue(ZCZCFeedParser().can_parse(fixture))
+        self.items = ZCZCSportsResultsParser().parse(fixture, self.provider)
+        self.assertEqual(len(self.items), 2)
+        self.assertEqual(self.items[0].get('headline'), 'CRICKET: First score')
+        self.assertEqual(self.items[0].get('body_html'), '<p>First story body</p><p>second paragraph<br></p>')
+        self.assertEqual(self.items[1].get('headline'), 'CRICKET: Second score')
+        self.assertEqual(self.items[1].get('body_html'), '<p>Second story body<br></p>')
+        self.assertNotEqual(self.items[0]['guid'], self.items[1]['guid'])
+
     def test_sports_results_format(self):
         filename = 'Standings__2014_14_635535729050675896.tst'
         dirname = os.path.dirname(os.path.realpath(__file__))
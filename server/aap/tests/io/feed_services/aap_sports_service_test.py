@@ -0,0 +1,110 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest import mock
+from urllib.parse import parse_qs
+
+from httmock import urlmatch, HTTMock, response
+from superdesk.tests import TestCase
+from superdesk.utc import utcnow
+from aap.io.feeding_services.aap_sports_service import AAPSportsHTTPFeedingService
+
+
+class AAPSportsHTTPFeedingServiceTestCase(TestCase):
+    provider = {
+        'name': 'sports',
+        'config': {
+            'login_url': 'http://sports.test/login?user={}&password={}',
+            'fixtures_url': 'http://sports.test/fixtures?session={}&sport={}&comp={}&season={}',
+            'username': 'user', 'password': 'password', 'sports': '1,2'
+        }
+    }
+
+    def setUp(self):
+        self.season = str(utcnow().year)
+        self.fixtures = {'1': b'<Fixtures Comp="10"/>', '2': b'<Fixtures Comp="20"/>'}
+        self.requests = []
+        self.mock = HTTMock(self.login, self.get_fixtures)
+        self.mock.__enter__()
+        self.addCleanup(self.mock.__exit__, None, None, None)
+
+    @urlmatch(netloc='sports.test', path='/login')
+    def login(self, url, request):
+        return response(200, content=b'<Login Status_Code="OK" Status_Session="session"/>')
+
+    @urlmatch(netloc='sports.test', path='/fixtures')
+    def get_fixtures(self, url, request):
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if 'season' in query:
+            self.requests.append((query['sport'], request.headers.get('If-None-Match')))
+            if request.headers.get('If-None-Match') == 'etag{}'.format(query['sport']):
+                return response(304)
+            return response(200, content=self.fixtures[query['sport']],
+                            headers={'ETag': 'etag{}'.format(query['sport'])})
+        if 'comp' in query:
+            return response(200, content='<Seasons><Season SeasonID="{}"/><Season SeasonID="1990"/></Seasons>'
+                            .format(self.season))
+        if 'sport' in query:
+            return response(200, content='<Competitions><Competition Comp_ID="{}0" Comp_Name="Comp"/></Competitions>'
+                            .format(query['sport']))
+        return response(200, content=b'<Sports><Sport SportID="1" SportName="Cricket"/>'
+                                     b'<Sport SportID="2" SportName="Rugby"/>'
+                                     b'<Sport SportID="3" SportName="Golf"/></Sports>')
+
+    def _update(self, provider, update, failed_comps=()):
+        service = AAPSportsHTTPFeedingService()
+        parser = mock.Mock()
+        parser.parse.side_effect = lambda data, provider: [{'comp_id': data['comp_id']}]
+        comps = []
+        with mock.patch.object(service, 'get_feed_parser', return_value=parser):
+            generator = service._update(provider, update)
+            failed = None
+            while True:
+                try:
+                    items = generator.send(failed)
+                except StopIteration:
+                    return comps
+                comps.extend(item['comp_id'] for item in items)
+                # the items that failed to ingest, as ingest_items sends them back
+                failed = {item['comp_id'] for item in items if item['comp_id'] in failed_comps}
+
+    def test_update(self):
+        update = {}
+        self.assertEqual(self._update(self.provider, update), ['10', '20'])
+        self.assertEqual(sorted(self.requests), [('1', None), ('2', None)])
+        self.assertEqual(update['private']['fixtures']['1-10-' + self.season]['etag'], 'etag1')
+
+        # unchanged fixtures are not parsed
+        self.requests = []
+        provider = dict(self.provider, private=update['private'])
+        self.assertEqual(self._update(provider, {}), [])
+        self.assertEqual(sorted(self.requests), [('1', 'etag1'), ('2', 'etag2')])
+
+    def test_update_content_hash(self):
+        update = {}
+        self._update(self.provider, update)
+        for state in update['private']['fixtures'].values():
+            state['etag'] = None
+
+        self.fixtures['2'] = b'<Fixtures Comp="20" Updated="1"/>'
+        provider = dict(self.provider, private=update['private'])
+        update = {}
+        self.assertEqual(self._update(provider, update), ['20'])
+        self.assertEqual(len(update['private']['fixtures']), 2)
+
+    def test_update_failed_to_ingest(self):
+        update = {}
+        self.assertEqual(self._update(self.provider, update, failed_comps=['20']), ['10', '20'])
+        self.assertIn('1-10-' + self.season, update['private']['fixtures'])
+        self.assertNotIn('2-20-' + self.season, update['private']['fixtures'])
+
+        # the fixtures that failed are parsed again
+        provider = dict(self.provider, private=update['private'])
+        self.assertEqual(self._update(provider, {}), ['20'])
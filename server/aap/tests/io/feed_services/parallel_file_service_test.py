@@ -0,0 +1,81 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from billiard import process
+from superdesk.tests import TestCase
+from aap.io.feed_parsers.zczc import ZCZCFeedParser  # noqa
+from aap.io.feeding_services import parallel_file_service
+from aap.io.feeding_services.parallel_file_service import ParallelFileFeedingService
+
+
+def _init_test_worker(memory_limit):
+    # the forked process keeps the app context of the test
+    parallel_file_service._worker['service'] = ParallelFileFeedingService()
+
+
+class ParallelFileFeedingServiceTestCase(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for index in range(6):
+            with open(os.path.join(self.path, 'story{}.tst'.format(index)), 'w', encoding='latin-1') as f:
+                f.write('ZCZC\n:Story {}\n^Headline {}\n*X\nBody {}\nNNNN\n'.format(index, index, index))
+        self.provider = {'name': 'test', 'feed_parser': 'zczc', 'config': {'path': self.path}}
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _get_headlines(self):
+        service = ParallelFileFeedingService()
+        headlines = []
+        with mock.patch.object(ParallelFileFeedingService, 'is_latest_content', return_value=True):
+            for items in service._update(self.provider, {}):
+                headlines.extend(item['headline'] for item in items)
+        return headlines
+
+    def test_parse_in_worker(self):
+        self.app.config['INGEST_PARSER_MIN_FILES'] = 10
+        self.assertEqual(self._get_headlines(), ['Headline {}'.format(index) for index in range(6)])
+        self.assertEqual(len(os.listdir(os.path.join(self.path, '_PROCESSED'))), 6)
+
+    def test_parse_in_pool(self):
+        self.app.config['INGEST_PARSER_MIN_FILES'] = 2
+        self.app.config['INGEST_PARSER_PROCESSES'] = 2
+        # celery prefork workers are daemonic processes, which multiprocessing does not allow to have children
+        with mock.patch.object(parallel_file_service, '_init_worker', _init_test_worker), \
+                mock.patch.dict(process.current_process()._config, {'daemon': True}), \
+                mock.patch.dict(multiprocessing.current_process()._config, {'daemon': True}):
+            self.assertEqual(self._get_headlines(), ['Headline {}'.format(index) for index in range(6)])
+        self.assertEqual(len(os.listdir(os.path.join(self.path, '_PROCESSED'))), 6)
+
+    def test_worker_memory_limit(self):
+        worker_app = mock.Mock()
+        with mock.patch.dict(sys.modules, {'app': mock.Mock(get_app=mock.Mock(return_value=worker_app))}), \
+                mock.patch.dict(parallel_file_service._worker), \
+                mock.patch('builtins.open', mock.mock_open(read_data='1000 200 100 1 0 300 0')), \
+                mock.patch('resource.getpagesize', return_value=4096), \
+                mock.patch('resource.setrlimit') as setrlimit:
+            parallel_file_service._init_worker(512)
+            self.assertIsInstance(parallel_file_service._worker['service'], ParallelFileFeedingService)
+            worker_app.app_context.return_value.push.assert_called_once_with()
+
+            limit = 1000 * 4096 + 512 * 1024 * 1024
+            setrlimit.assert_called_once_with(resource.RLIMIT_AS, (limit, limit))
+
+            setrlimit.reset_mock()
+            parallel_file_service._init_worker(0)
+            setrlimit.assert_not_called()
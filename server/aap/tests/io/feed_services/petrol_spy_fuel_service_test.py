@@ -1,5 +1,5 @@
 from superdesk.tests import TestCase
-from aap.io.feeding_services.pertol_spy_fuel_service import PetrolSpyFuelHTTPFeedingService
+from aap.io.feeding_services.petrol_spy_fuel_service import PetrolSpyFuelHTTPFeedingService
 from aap.fuel import init_app
 from httmock import urlmatch, HTTMock, response
 
@@ -331,6 +331,7 @@ class PetrolSpyFuelHTTPFeedingServiceTestCase(TestCase):
     }
 
     def setUp(self):
+        self.requests = 0
         init_app(self.app)
         self.setupRemoteSyncMock(self)
         self.app.data.insert('ingest_providers', [self.provider])
@@ -341,6 +342,7 @@ class PetrolSpyFuelHTTPFeedingServiceTestCase(TestCase):
 
     @urlmatch(scheme='http', netloc='a.b.c', path='/box')
     def get_prices(self, url, request):
+        self.requests += 1
         headers = {'total': '900'}
         resp_bytes = self.prices
         return response(status_code=200, headers=headers, content=resp_bytes)
@@ -360,6 +362,17 @@ class PetrolSpyFuelHTTPFeedingServiceTestCase(TestCase):
                                  'swLng': 150.6226, 'deltaLat': 0.1736})
         self.assertEqual(len(prices), 4)
 
+    def test_get_prices_split(self):
+        it = PetrolSpyFuelHTTPFeedingService()
+        it.requests_per_second = 1000
+        it.max_results = 4
+        it.max_split_depth = 2
+        prices = it._get_prices(self.provider,
+                                {'market': 'Sydney', 'neLat': -33.4119, 'neLng': 151.4273, 'swLat': -33.7,
+                                 'swLng': 150.6226, 'deltaLat': 0.1736})
+        self.assertEqual(len(prices), 4)
+        self.assertEqual(self.requests, 2 + 4 + 8)
+
     def test_update(self):
         it = PetrolSpyFuelHTTPFeedingService()
         it._update(self.provider, {})
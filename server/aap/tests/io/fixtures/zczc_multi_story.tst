@@ -0,0 +1,16 @@
+ZCZC
+$T
+:Cricket Scores
+^CRICKET: First score
+*X
+First story body
+
+second paragraph
+NNNN
+ZCZC
+$T
+:Cricket Scores
+^CRICKET: Second score
+*X
+Second story body
+NNNN
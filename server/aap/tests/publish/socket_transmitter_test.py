@@ -8,9 +8,11 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import socket
+import time
 from unittests import AAPTestCase
 from unittest.mock import patch
-from aap.publish.transmitters.socket import SocketPublishService
+from aap.publish.transmitters.socket import SocketPublishService, socket_pool
 from aap.errors import PublishSocketError
 
 
@@ -94,3 +96,64 @@ class SocketPushPublishTestCase(AAPTestCase):
         with self.assertRaises(PublishSocketError):
             with self.app.app_context():
                 service._transmit(item, None)
+
+
+class SocketPoolTestCase(AAPTestCase):
+    def setUp(self):
+        self.app.config['ERROR_NOTIFICATIONS'] = False
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(5)
+        self.item = {"destination": {
+            "name": "L6 Ticker",
+            "format": "aap ticker",
+            "delivery_type": "socket",
+            "config": {
+                "port": str(self.server.getsockname()[1]),
+                "address": "127.0.0.1",
+                "keep_alive": True
+            }
+        }, 'encoded_item': b'I was here'}
+
+    def tearDown(self):
+        socket_pool.clear()
+        self.server.close()
+
+    def test_transmit_reuses_connection(self):
+        service = SocketPublishService()
+        with self.app.app_context():
+            service._transmit(self.item, None)
+            service._transmit(self.item, None)
+
+        connection, _address = self.server.accept()
+        connection.settimeout(1)
+        self.assertEqual(connection.recv(100), b'I was hereI was here')
+        connection.close()
+
+    def test_transmit_reconnects_closed_connection(self):
+        service = SocketPublishService()
+        with self.app.app_context():
+            service._transmit(self.item, None)
+            connection, _address = self.server.accept()
+            connection.close()
+            service._transmit(self.item, None)
+
+        connection, _address = self.server.accept()
+        connection.settimeout(1)
+        self.assertEqual(connection.recv(100), b'I was here')
+        connection.close()
+
+    def test_transmit_drops_connection_with_data(self):
+        service = SocketPublishService()
+        with self.app.app_context():
+            service._transmit(self.item, None)
+            stale, _address = self.server.accept()
+            stale.sendall(b'unexpected')
+            time.sleep(0.1)
+            service._transmit(self.item, None)
+
+        connection, _address = self.server.accept()
+        connection.settimeout(1)
+        self.assertEqual(connection.recv(100), b'I was here')
+        connection.close()
+        stale.close()
@@ -156,6 +156,9 @@ INSTALLED_APPS.extend([
     'aap.fuel',
     'aap.traffic_incidents',
     'aap.subscriber_transmit_references',
+    'aap.revision_history',
+    'aap.story_lineage',
+    'aap.geocode',
 ])
 
 RENDITIONS = {
@@ -209,6 +212,28 @@ NITF_INCLUDE_SCHEMA = False
 # Set to False for production, True will inject the test value for category into the output
 TEST_SMS_OUTPUT = env('TEST_SMS_OUTPUT', True)
 
+#: Hold the vocabularies used by the AAP formatters in a process wide snapshot
+FORMATTER_VOCABULARY_SNAPSHOT = strtobool(env('FORMATTER_VOCABULARY_SNAPSHOT', 'true'))
+#: Seconds after which the _etag and _updated of a snapshot vocabulary are checked, the changes made by other
+#: processes, e.g. the API for the Celery workers, are only picked up then
+FORMATTER_VOCABULARY_SNAPSHOT_TTL = int(env('FORMATTER_VOCABULARY_SNAPSHOT_TTL', 30))
+#: Render the wire formats once per published item version and reuse the output for all subscribers
+FORMATTER_RENDER_CACHE = strtobool(env('FORMATTER_RENDER_CACHE', 'true'))
+#: Share the users, desks and stages read by the formatters across the publish job
+FORMATTER_IDENTITY_CACHE = strtobool(env('FORMATTER_IDENTITY_CACHE', 'true'))
+#: Transmit the publish queue of many destinations concurrently instead of one item at a time
+TRANSMIT_RUNNER_ENABLED = strtobool(env('TRANSMIT_RUNNER_ENABLED', 'false'))
+#: Number of items the concurrent transmit sends at the same time
+TRANSMIT_RUNNER_CONCURRENCY = int(env('TRANSMIT_RUNNER_CONCURRENCY', 16))
+#: Number of processes parsing the files of the parallel file feeds
+INGEST_PARSER_PROCESSES = int(env('INGEST_PARSER_PROCESSES', 4))
+#: Megabytes each parser process can allocate
+INGEST_PARSER_MEMORY_LIMIT = int(env('INGEST_PARSER_MEMORY_LIMIT', 512))
+#: Files parsed by a parser process before it is replaced
+INGEST_PARSER_MAX_TASKS = int(env('INGEST_PARSER_MAX_TASKS', 100))
+#: Fewer waiting files than this are parsed in the ingest worker
+INGEST_PARSER_MIN_FILES = int(env('INGEST_PARSER_MIN_FILES', 4))
+
 AMAZON_CONTAINER_NAME = env('AMAZON_CONTAINER_NAME', '')
 AMAZON_ACCESS_KEY_ID = env('AMAZON_ACCESS_KEY_ID', '')
 AMAZON_SECRET_ACCESS_KEY = env('AMAZON_SECRET_ACCESS_KEY', '')